@@ -0,0 +1,98 @@
+# скорость оценки позиций (позиций в секунду): core.search.evaluate по одной позиции против
+# core.vector_eval - по одной, пачками и через аккумулятор (оценка всех ходов из позиции как дельта)
+# запуск: python -m benchmarks.eval_throughput --positions 5000 --batch 1024 --hidden 32
+import argparse
+import time
+import chess
+import numpy as np
+from benchmarks.position_state import scripted_game
+from core.search import evaluate
+from core.vector_eval import Network, Accumulator, encode_batch, pack_batch, unpack
+
+
+def sample_positions(count):
+    boards = []
+    seed = 0
+    while len(boards) < count:
+        board = chess.Board()
+        for move in scripted_game(120, seed):
+            board.push(move)
+            boards.append(board.copy(stack=False))
+        seed += 1
+    return boards[:count]
+
+
+def rate(func, items, repeat=3):
+    # лучший из нескольких прогонов, позиций в секунду
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return items / best
+
+
+def batched(network, boards, batch):
+    for i in range(0, len(boards), batch):
+        network.evaluate_batch(boards[i:i + batch])
+
+
+def children(network, boards):
+    # все дочерние позиции: ход - оценка - возврат, аккумулятор обновляется на 2-4 столбца весов
+    total = 0
+    for board in boards:
+        acc = Accumulator(network, board.copy(stack=False))
+        for move in list(board.legal_moves):
+            acc.push(move)
+            acc.evaluate()
+            acc.pop()
+            total += 1
+    return total
+
+
+def children_full(network, boards):
+    # то же, но каждая дочерняя позиция кодируется и считается заново
+    for board in boards:
+        board = board.copy(stack=False)
+        for move in list(board.legal_moves):
+            board.push(move)
+            network.evaluate(board)
+            board.pop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скорость оценки позиций: по одной, пачками, через аккумулятор")
+    parser.add_argument("--positions", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1024)
+    parser.add_argument("--hidden", type=int, default=32, help="нейронов скрытого слоя у сети")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    boards = sample_positions(args.positions)
+    n = len(boards)
+    parents = boards[::25]
+    n_children = sum(board.legal_moves.count() for board in parents)
+    turns = np.array([board.turn for board in boards])
+    planes = encode_batch(boards)
+    packed = pack_batch(boards)
+    print(f"позиций {n}, пачка {args.batch}, кодировка {packed.nbytes // n} байт/позицию "
+          f"(плоскости {planes.nbytes // n} байт)")
+
+    rows = [("python evaluate, по одной", rate(lambda: [evaluate(b) for b in boards], n, args.repeat))]
+    for name, network in (("PST", Network.pst()), (f"сеть {args.hidden}", Network.random(args.hidden))):
+        rows.append((f"{name}: по одной", rate(lambda: [network.evaluate(b) for b in boards[:n // 10]],
+                                               n // 10, args.repeat)))
+        rows.append((f"{name}: пачками", rate(lambda: batched(network, boards, args.batch), n, args.repeat)))
+        rows.append((f"{name}: пачками, без кодирования",
+                     rate(lambda: network.evaluate_planes(unpack(packed), turns), n, args.repeat)))
+        rows.append((f"{name}: ходы, заново", rate(lambda: children_full(network, parents), n_children, args.repeat)))
+        rows.append((f"{name}: ходы, аккумулятор", rate(lambda: children(network, parents), n_children, args.repeat)))
+
+    base = rows[0][1]
+    for name, value in rows:
+        print(f"{name:<36}{value:>12.0f} поз/с  {value / base:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# замена интерпретатора Tcl/Tk для замеров без дисплея (и без Xvfb):
+# виджеты tkinter создаются как обычно, но вызовы Tk ничего не рисуют, поэтому
+# замер показывает стоимость нашего кода и форматирования аргументов tkinter, без самой отрисовки
+import itertools
+import tkinter as tk
+
+
+class FakeTk:
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def call(self, *args):
+        if len(args) > 1 and args[1] == "create":
+            return next(self._ids)  # номер нового элемента холста
+        if len(args) > 1 and args[1] == "index":
+            return "1.0"
+        return ""
+
+    def getint(self, value):
+        return int(value) if value != "" else 0
+
+    def getdouble(self, value):
+        return float(value or 0)
+
+    def getboolean(self, value):
+        return bool(value)
+
+    def splitlist(self, value):
+        return () if value == "" else (value,)
+
+    def createcommand(self, *args):
+        pass
+
+    def deletecommand(self, *args):
+        pass
+
+
+class FakeRoot(tk.Misc):
+    def __init__(self):
+        self.tk = FakeTk()
+        self._w = "."
+        self.children = {}
+        self._last_child_ids = None
+        self.master = None
+        self._tclCommands = None
+
+    def destroy(self):
+        pass
+
+
+def make_root():
+    # настоящий скрытый корень Tk, если есть дисплей, иначе заглушка; второе значение - название режима
+    try:
+        root = tk.Tk()
+        root.withdraw()
+        return root, "tk"
+    except tk.TclError:
+        return FakeRoot(), "fake-tk"
@@ -0,0 +1,59 @@
+# ускорение параллельного поиска: время до фиксированной глубины и узлы в секунду для 1..N процессов
+# запуск: python -m benchmarks.parallel_search --depth 5 --max-workers 8
+import argparse
+import os
+import time
+import chess
+from core.parallel import ParallelEngine
+
+# фиксированный набор позиций (дебют, миттельшпиль, эндшпиль)
+POSITIONS = [
+    chess.STARTING_FEN,
+    "r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1"
+]
+
+
+def worker_counts(max_workers):
+    n = 1
+    while n < max_workers:
+        yield n
+        n *= 2
+    yield max_workers
+
+
+def run(depth, max_workers):
+    rows = []
+    base_time = None
+    for workers in worker_counts(max_workers):
+        with ParallelEngine(workers=workers) as engine:
+            engine.search(chess.Board(), depth=2)  # прогрев процессов
+            nodes = 0
+            start = time.perf_counter()
+            for fen in POSITIONS:
+                nodes += engine.search(chess.Board(fen), depth=depth).nodes
+            elapsed = time.perf_counter() - start
+
+        if base_time is None:
+            base_time = elapsed
+        rows.append({
+            'workers': workers,
+            'seconds': round(elapsed, 3),
+            'nodes': nodes,
+            'nps': int(nodes / elapsed),
+            'speedup': round(base_time / elapsed, 2)
+        })
+        print(f"{workers:>3} проц.  {elapsed:8.2f} c  {nodes:>10} узл.  {int(nodes / elapsed):>8} узл/с  "
+              f"ускорение x{base_time / elapsed:.2f}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Масштабирование параллельного поиска")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run(args.depth, args.max_workers)
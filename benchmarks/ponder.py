@@ -0,0 +1,92 @@
+# обдумывание на времени соперника: задержка ответа компьютера с ponder и без него
+# "человек" - отдельный движок с небольшим лимитом узлов, который после выбора хода ещё --human секунд
+# "думает" (sleep), а компьютер в это время обдумывает предсказанный ответ
+# задержка - от хода человека до хода компьютера, как её видит игрок
+# запуск: python -m benchmarks.ponder [--moves 12] [--time 0.5] [--human 0.5]
+import argparse
+import statistics
+import threading
+import time
+import chess
+from core.engine_thread import Ponderer, SearchThread
+from core.search import Engine
+from benchmarks.parallel_search import POSITIONS
+
+
+def play(fen, moves, time_limit, human_time, human_nodes, ponder):
+    # moves ходов компьютера (он играет за сторону, которая ходит в fen); возвращает (задержки, Ponderer)
+    board = chess.Board(fen)
+    human = Engine()
+    ponderer = Ponderer(SearchThread(Engine()))
+    latencies = []
+    last = None
+    for _ in range(moves):
+        if board.is_game_over():
+            break
+        done = threading.Event()
+        box = []
+
+        def on_done(result):
+            box.append(result)
+            done.set()
+
+        start = time.perf_counter()
+        ponderer.think(board, time_limit, on_done)
+        done.wait()
+        if board.move_stack:
+            latencies.append(time.perf_counter() - start)
+        last = box[0]
+        board.push(last.move)
+        if board.is_game_over():
+            break
+
+        # ход человека: сначала выбираем (без помех для измерений), потом "думаем", пока компьютер обдумывает
+        reply = human.search(board, nodes=human_nodes).move
+        if ponder and len(last.pv) >= 2 and board.is_legal(last.pv[1]):
+            ponderer.ponder(board, last.pv[1])
+        time.sleep(human_time)
+        board.push(reply)
+    ponderer.cancel()
+    return latencies, ponderer
+
+
+def run(moves=12, time_limit=0.5, human_time=0.5, human_nodes=2000, positions=POSITIONS[:4]):
+    result = {}
+    for ponder in (False, True):
+        latencies = []
+        hits = misses = 0
+        saved = 0.0
+        for fen in positions:
+            values, ponderer = play(fen, moves, time_limit, human_time, human_nodes, ponder)
+            latencies += values
+            hits += ponderer.stats.hits
+            misses += ponderer.stats.misses
+            saved += ponderer.stats.time_saved
+        result["ponder" if ponder else "plain"] = {
+            "median_ms": statistics.median(latencies) * 1000,
+            "mean_ms": statistics.mean(latencies) * 1000,
+            "hits": hits, "misses": misses, "time_saved": saved, "replies": len(latencies)
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка ответа компьютера с обдумыванием на времени соперника")
+    parser.add_argument("--moves", type=int, default=12, help="ходов компьютера в каждой позиции")
+    parser.add_argument("--time", type=float, default=0.5, help="секунд на ход компьютера")
+    parser.add_argument("--human", type=float, default=0.5, help="сколько секунд думает человек")
+    parser.add_argument("--human-nodes", type=int, default=2000, help="лимит узлов движка, играющего за человека")
+    args = parser.parse_args()
+    result = run(args.moves, args.time, args.human, args.human_nodes)
+    for name, title in (("plain", "без обдумывания"), ("ponder", "с обдумыванием")):
+        row = result[name]
+        line = f"{title:16} ответов {row['replies']:3}, задержка: медиана {row['median_ms']:6.0f} мс, " \
+               f"среднее {row['mean_ms']:6.0f} мс"
+        if name == "ponder":
+            total = row["hits"] + row["misses"]
+            line += f", угадано {row['hits']} из {total}, сэкономлено {row['time_saved']:.1f} с"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# стоимость одного хода пользователя: прямые вызовы chess.Board (как раньше) против PositionState
+# запуск: python -m benchmarks.position_state
+import random
+import time
+import chess
+from core.game_engine import ChessGame
+
+
+def scripted_game(plies=200, seed=1):
+    # детерминированная "случайная" партия, чтобы замеры были сравнимы между запусками
+    rng = random.Random(seed)
+    board = chess.Board()
+    moves = []
+    while len(moves) < plies and not board.is_game_over():
+        move = rng.choice(list(board.legal_moves))
+        moves.append(move)
+        board.push(move)
+    return moves
+
+
+def per_move_before(moves):
+    # то же, что делал интерфейс до кэша: выбор фигуры, проверка хода, статус, подсветка шаха
+    board = chess.Board()
+    for move in moves:
+        possible = [m for m in board.legal_moves if m.from_square == move.from_square]
+        assert move in possible
+        if move in board.legal_moves:
+            board.push(move)
+        board.is_check()
+        if board.is_game_over():
+            board.is_checkmate() or board.is_stalemate() or board.is_insufficient_material()
+            board.is_checkmate()
+
+
+def per_move_after(moves):
+    game = ChessGame()
+    for move in moves:
+        possible = game.state.moves_from.get(move.from_square, [])
+        assert move in possible
+        game.make_move(move.uci())
+        game.state.is_check
+        if game.is_game_over:
+            game.get_game_result()
+            game.state.is_checkmate
+
+
+def measure(fn, moves, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(moves)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(moves) * 1e6  # микросекунд на ход
+
+
+if __name__ == "__main__":
+    moves = scripted_game()
+    before = measure(per_move_before, moves)
+    after = measure(per_move_after, moves)
+    print(f"ходов в партии: {len(moves)}")
+    print(f"до:    {before:8.1f} мкс/ход")
+    print(f"после: {after:8.1f} мкс/ход  (x{before / after:.2f})")
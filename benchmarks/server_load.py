@@ -0,0 +1,139 @@
+# нагрузочный тест сервера партий: много сессий, ходы по заранее сыгранным партиям,
+# ходов в секунду и задержка "move -> moved" (медиана, p99), память процесса сервера
+# запуск: python -m benchmarks.server_load --sessions 1000 10000 --duration 10 [--idle 2]
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from benchmarks.position_state import scripted_game
+
+SCRIPT_PLIES = 60  # длина заготовленной партии; дойдя до конца, сессия начинает заново (reset)
+SCRIPTS = 50  # сколько разных партий раздаём сессиям
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def server_rss_mb(pid):
+    # резидентная память процесса сервера (только Linux, иначе None)
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+async def start_server(directory, idle):
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "core.server", "--port", "0", "--directory", directory,
+        "--idle", str(idle), "--evict-interval", str(max(0.5, idle / 2)),
+        stdout=asyncio.subprocess.PIPE
+    )
+    _, host, port = (await proc.stdout.readline()).decode().split()
+    return proc, host, int(port)
+
+
+async def request(reader, writer, line):
+    # ответ на move - строка moved (или error); строки over про конец партии пропускаем
+    writer.write((line + "\n").encode())
+    await writer.drain()
+    while True:
+        reply = (await reader.readline()).decode()
+        if not reply.startswith("over"):
+            return reply
+
+
+class StartLine:
+    # все клиенты сначала создают свои сессии, а ходить начинают одновременно
+    def __init__(self, clients, duration):
+        self.waiting = clients
+        self.duration = duration
+        self.event = asyncio.Event()
+        self.start = self.deadline = None
+
+    async def ready(self):
+        self.waiting -= 1
+        if self.waiting == 0:
+            self.start = time.perf_counter()
+            self.deadline = self.start + self.duration
+            self.event.set()
+        await self.event.wait()
+
+
+async def client(host, port, n_sessions, scripts, start_line, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    sessions = []  # [id, номер партии, сколько ходов сделано]
+    for i in range(n_sessions):
+        session_id = int((await request(reader, writer, "new")).split()[1])
+        await request(reader, writer, f"leave {session_id}")  # без подписчиков партию можно выгрузить на диск
+        sessions.append([session_id, i % len(scripts), 0])
+
+    await start_line.ready()
+    deadline = start_line.deadline
+    moves = 0
+    while time.perf_counter() < deadline:
+        for session in sessions:
+            session_id, script, ply = session
+            if ply == len(scripts[script]):
+                await request(reader, writer, f"reset {session_id}")
+                session[2] = ply = 0
+            start = time.perf_counter()
+            reply = await request(reader, writer, f"move {session_id} {scripts[script][ply]}")
+            latencies.append(time.perf_counter() - start)
+            if reply.startswith("error"):
+                await request(reader, writer, f"reset {session_id}")  # например, троекратное повторение
+                session[2] = 0
+            else:
+                session[2] += 1
+                moves += 1
+            if time.perf_counter() >= deadline:
+                break
+    stats = await request(reader, writer, "stats")
+    writer.close()
+    return moves, stats
+
+
+async def run(n_sessions, connections, duration, idle):
+    scripts = [[m.uci() for m in scripted_game(SCRIPT_PLIES, seed)] for seed in range(SCRIPTS)]
+    with tempfile.TemporaryDirectory() as directory:
+        proc, host, port = await start_server(directory, idle)
+        try:
+            connections = min(connections, n_sessions)
+            per_client = [n_sessions // connections + (i < n_sessions % connections) for i in range(connections)]
+            latencies = []
+            start_line = StartLine(connections, duration)
+            results = await asyncio.gather(*(client(host, port, n, scripts, start_line, latencies)
+                                             for n in per_client))
+            wall = time.perf_counter() - start_line.start
+            moves = sum(m for m, _ in results)
+            stats = results[-1][1].split()
+            rss = server_rss_mb(proc.pid)
+        finally:
+            proc.terminate()
+            await proc.wait()
+
+    print(f"сессий {n_sessions:6d}, клиентов {connections}: {moves / wall:8.0f} ходов/с, "
+          f"задержка медиана {percentile(latencies, 0.5) * 1000:6.2f} мс, p99 {percentile(latencies, 0.99) * 1000:6.2f} мс, "
+          f"в памяти {stats[2]}, на диске {stats[4]}"
+          + (f", RSS сервера {rss:.0f} МБ" if rss is not None else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервера партий")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд на каждый прогон")
+    parser.add_argument("--idle", type=float, default=30.0, help="через сколько секунд сервер выгружает партию")
+    args = parser.parse_args()
+    for n in args.sessions:
+        asyncio.run(run(n, args.connections, args.duration, args.idle))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# время холодного старта в отдельных процессах (каждый замер - свежий интерпретатор):
+# импорт gui.main_window, появление меню (первый кадр) и переход из меню к партии (load_game_modules)
+# запуск: python -m benchmarks.startup [--repeat 5]
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# каждая программа печатает миллисекунды от своего старта (perf_counter в начале программы)
+IMPORT = """
+import time; t = time.perf_counter()
+import gui.main_window
+print((time.perf_counter() - t) * 1000)
+"""
+GAME_MODULES = """
+import gui.main_window, time; t = time.perf_counter()
+gui.main_window.load_game_modules()
+print((time.perf_counter() - t) * 1000)
+"""
+FIRST_FRAME = """
+import time; t = time.perf_counter()
+import tkinter as tk
+try:
+    from gui.main_window import MainWindow
+    app = MainWindow()
+    app.update()  # меню нарисовано
+except tk.TclError:
+    print("nan")  # нет дисплея
+else:
+    print((time.perf_counter() - t) * 1000)
+    app.destroy()
+"""
+
+
+def measure(program, repeat):
+    # лучший результат из repeat запусков (мс) или None, если замер невозможен
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", program], cwd=ROOT, capture_output=True, text=True)
+        try:
+            value = float(out.stdout.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            return None
+        if value != value:  # nan
+            return None
+        best = value if best is None else min(best, value)
+    return best
+
+
+def run(repeat=5):
+    return {
+        "import_ms": measure(IMPORT, repeat),
+        "first_frame_ms": measure(FIRST_FRAME, repeat),
+        "game_modules_ms": measure(GAME_MODULES, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время холодного старта интерфейса")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    result = run(args.repeat)
+    print(f"импорт gui.main_window:      {result['import_ms']:7.1f} мс")
+    if result["first_frame_ms"] is None:
+        print("первый кадр меню:           нет дисплея")
+    else:
+        print(f"первый кадр меню:           {result['first_frame_ms']:7.1f} мс")
+    print(f"модули партии (в фоне):     {result['game_modules_ms']:7.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
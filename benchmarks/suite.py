@@ -0,0 +1,257 @@
+# набор замеров производительности: perft, make_move, горячие пути интерфейса, NPS движка и холодный старт
+# запуск:    python -m benchmarks.suite -o bench.json
+# сравнение: python -m benchmarks.suite --baseline old.json [-o new.json] [--threshold 0.1]
+#            python -m benchmarks.suite --compare old.json new.json
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+import chess
+from core.game_engine import ChessGame
+from core.search import Engine
+from benchmarks import startup
+from benchmarks.position_state import scripted_game
+
+# (название, FEN, глубина, ожидаемое число узлов)
+PERFT_POSITIONS = [
+    ("start", chess.STARTING_FEN, 3, 8902),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", 2, 2039),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 3, 2812),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", 3, 9467),
+]
+
+ENGINE_POSITIONS = [
+    chess.STARTING_FEN,
+    "r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",
+    "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10",
+]
+
+# какое направление изменения метрики считается улучшением
+HIGHER_IS_BETTER = "higher"
+LOWER_IS_BETTER = "lower"
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def perft(game, depth):
+    # перебор всех позиций через ChessGame (state + push/pop), как это делает интерфейс
+    if depth == 1:
+        return len(game.state.legal_moves)
+    nodes = 0
+    for move in game.state.legal_moves:
+        game.push(move)
+        nodes += perft(game, depth - 1)
+        game.pop()
+    return nodes
+
+
+def bench_perft(metrics, repeat):
+    for name, fen, depth, expected in PERFT_POSITIONS:
+        game = ChessGame()
+        game.board = chess.Board(fen)
+        nodes = perft(game, depth)
+        if nodes != expected:
+            raise AssertionError(f"perft {name}: {nodes} узлов, ожидалось {expected}")
+        elapsed = best_of(lambda: perft(game, depth), repeat)
+        metrics[f"perft_{name}_nps"] = (nodes / elapsed, "nodes/s", HIGHER_IS_BETTER)
+
+
+def bench_make_move(metrics, games, repeat):
+    ucis = [[m.uci() for m in moves] for moves in games]
+    total = sum(len(g) for g in ucis)
+
+    def run():
+        for game_moves in ucis:
+            game = ChessGame()
+            for uci in game_moves:
+                game.make_move(uci)
+
+    metrics["make_move_us"] = (best_of(run, repeat) / total * 1e6, "us/move", LOWER_IS_BETTER)
+
+
+def bench_gui(metrics, games, repeat):
+    from benchmarks.headless_tk import make_root
+    from gui.board import ChessBoard
+    from gui.history_panel import MoveHistoryPanel
+
+    root, backend = make_root()
+    metrics["gui_backend_real_tk"] = (1.0 if backend == "tk" else 0.0, "flag", None)
+
+    class Window:  # минимум от MainWindow, который нужен доске
+        player_color = chess.WHITE
+
+    with contextlib.redirect_stdout(io.StringIO()):  # без картинок фигур доска печатает предупреждения
+        board = ChessBoard(root, ChessGame(), Window())
+    moves = games[0]
+    total = len(moves)
+
+    def draw_after_each_move():
+        board.game = ChessGame()
+        board.draw_board()
+        for move in moves:
+            board.game.push(move)
+            board.draw_board()
+
+    def select_each_move():
+        board.game = ChessGame()
+        for move in moves:
+            board.try_select_piece(move.from_square)
+            board.clear_selection()
+            board.game.push(move)
+
+    metrics["draw_board_us"] = (best_of(draw_after_each_move, repeat) / (total + 1) * 1e6, "us/call", LOWER_IS_BETTER)
+    metrics["try_select_piece_us"] = (best_of(select_each_move, repeat) / total * 1e6, "us/call", LOWER_IS_BETTER)
+
+    # переходы к случайным полуходам длинной партии (клик по истории): go_to + перерисовка изменившихся полей
+    long_game = ChessGame()
+    for move in scripted_game(300, seed=7):
+        long_game.push(move)
+    targets = random.Random(7).choices(range(long_game.line_length + 1), k=200)
+
+    def jump_to_plies():
+        board.game = long_game
+        for ply in targets:
+            long_game.go_to(ply)
+            board.draw_board()
+
+    metrics["jump_to_ply_us"] = (best_of(jump_to_plies, repeat) / len(targets) * 1e6, "us/jump", LOWER_IS_BETTER)
+
+    # история: по одному ходу (как после каждого хода) и полная перестройка длинной партии
+    lines = []
+    for i in range(2000):
+        if i % 2 == 0:
+            lines.append(f"{i // 2 + 1}. e2e4")
+        else:
+            lines[-1] += " - e7e5"
+            lines.append("")
+    panel = MoveHistoryPanel(root)
+
+    def append_each_move():
+        panel.reset([])
+        shown = []
+        for line in lines:
+            shown.append(line)
+            panel.sync_tail(shown)
+
+    metrics["history_append_us"] = (best_of(append_each_move, repeat) / len(lines) * 1e6, "us/move", LOWER_IS_BETTER)
+    metrics["update_history_display_us"] = (best_of(lambda: panel.reset(lines), repeat) * 1e6, "us/call",
+                                            LOWER_IS_BETTER)
+    root.destroy()
+
+
+def bench_engine(metrics, nodes, repeat):
+    engine = Engine(hash_mb=16)
+    best = 0.0
+    for _ in range(repeat):
+        total_nodes = 0
+        elapsed = 0.0
+        for fen in ENGINE_POSITIONS:
+            engine.tt.clear()
+            result = engine.search(chess.Board(fen), nodes=nodes)
+            total_nodes += result.nodes
+            elapsed += result.elapsed
+        best = max(best, total_nodes / elapsed)
+    metrics["engine_nps"] = (best, "nodes/s", HIGHER_IS_BETTER)
+
+
+def bench_startup(metrics, repeat):
+    result = startup.run(repeat)
+    metrics["startup_import_ms"] = (result["import_ms"], "ms", LOWER_IS_BETTER)
+    metrics["startup_game_modules_ms"] = (result["game_modules_ms"], "ms", LOWER_IS_BETTER)
+    if result["first_frame_ms"] is not None:
+        metrics["startup_first_frame_ms"] = (result["first_frame_ms"], "ms", LOWER_IS_BETTER)
+
+
+def run(repeat=3, engine_nodes=20000):
+    metrics = {}
+    games = [scripted_game(plies=300, seed=seed) for seed in range(1, 6)]
+    bench_perft(metrics, repeat)
+    bench_make_move(metrics, games, repeat)
+    bench_gui(metrics, games, repeat)
+    bench_engine(metrics, engine_nodes, repeat)
+    bench_startup(metrics, repeat)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "python_chess": chess.__version__,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "metrics": {
+            name: {"value": value, "unit": unit, "better": better}
+            for name, (value, unit, better) in metrics.items()
+        },
+    }
+
+
+def compare(baseline, current, threshold):
+    # возвращает список регрессий хуже порога (доля, например 0.1 = 10%)
+    regressions = []
+    for name, old in baseline["metrics"].items():
+        new = current["metrics"].get(name)
+        better = old.get("better")
+        if new is None or better is None or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        worse = -change if better == HIGHER_IS_BETTER else change
+        mark = "РЕГРЕССИЯ" if worse > threshold else ""
+        print(f"{name:30} {old['value']:14.2f} -> {new['value']:14.2f} {new['unit']:9} {change * 100:+7.1f}%  {mark}")
+        if worse > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def print_metrics(result):
+    for name, metric in result["metrics"].items():
+        print(f"{name:30} {metric['value']:14.2f} {metric['unit']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности PyChess")
+    parser.add_argument("-o", "--output", help="записать результаты в JSON")
+    parser.add_argument("--baseline", help="сравнить с сохранёнными результатами")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="сравнить два файла без запуска замеров")
+    parser.add_argument("--threshold", type=float, default=0.10, help="допустимое ухудшение (доля)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--engine-nodes", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        return 1 if compare(baseline, current, args.threshold) else 0
+
+    result = run(args.repeat, args.engine_nodes)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, result, args.threshold)
+        if regressions:
+            print(f"ухудшились: {', '.join(regressions)}")
+            return 1
+        return 0
+
+    print_metrics(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# задержки движка в режиме UCI, измеренные снаружи процесса, как их видит турнирная программа:
+# запуск до uciok, isready -> readyok, go movetime -> bestmove (перерасход времени) и stop -> bestmove
+# запуск: python -m benchmarks.uci_latency --movetime 200 --repeat 5 [--threads 2]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from benchmarks.parallel_search import POSITIONS
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+class UciProcess:
+    def __init__(self, threads=1):
+        self.proc = subprocess.Popen([sys.executable, MAIN, "--uci"], stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, text=True, bufsize=1)
+        self.send("uci")
+        self.wait_for("uciok")
+        if threads > 1:
+            self.send(f"setoption name Threads value {threads}")
+
+    def send(self, line):
+        self.proc.stdin.write(line + "\n")
+        self.proc.stdin.flush()
+
+    def wait_for(self, prefix):
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError("движок завершился")
+            if line.startswith(prefix):
+                return line.strip()
+
+    def roundtrip(self, command, prefix):
+        start = time.perf_counter()
+        self.send(command)
+        self.wait_for(prefix)
+        return time.perf_counter() - start
+
+    def close(self):
+        self.send("quit")
+        self.proc.wait(timeout=10)
+
+
+def ms(values):
+    return f"медиана {statistics.median(values) * 1000:7.1f} мс, максимум {max(values) * 1000:7.1f} мс"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержки движка в режиме UCI")
+    parser.add_argument("--movetime", type=int, default=200, help="мс на ход для go movetime")
+    parser.add_argument("--think", type=float, default=0.5, help="сколько секунд думать перед stop")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    engine = UciProcess(args.threads)
+    engine.send("isready")
+    engine.wait_for("readyok")
+    print(f"запуск до readyok:       {(time.perf_counter() - start) * 1000:7.1f} мс")
+
+    ready, overshoot, stop = [], [], []
+    for _ in range(args.repeat):
+        for fen in POSITIONS:
+            engine.send(f"position fen {fen}")
+            ready.append(engine.roundtrip("isready", "readyok"))
+            overshoot.append(engine.roundtrip(f"go movetime {args.movetime}", "bestmove") - args.movetime / 1000)
+            engine.send("go infinite")
+            time.sleep(args.think)
+            ready.append(engine.roundtrip("isready", "readyok"))  # во время поиска тоже отвечаем сразу
+            stop.append(engine.roundtrip("stop", "bestmove"))
+    engine.close()
+
+    print(f"isready -> readyok:      {ms(ready)}")
+    print(f"go movetime, перерасход: {ms(overshoot)}")
+    print(f"stop -> bestmove:        {ms(stop)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import mmap
+import os
+import struct
+import sys
+import time
+import chess
+
+# битовые базы эндшпилей "король + фигура против короля" (KQK, KRK, KPK)
+# строятся ретроградным анализом и хранятся как битовые массивы: 1 бит на позицию - "сильная сторона выигрывает"
+#
+# позиция всегда приводится к виду "сильная сторона - белые" (иначе доска отражается по вертикали),
+# её индекс: (белый король << 12) | (черный король << 6) | поле фигуры, отдельно для хода белых и черных
+# индекс совершенный (разные позиции - разные индексы), часть индексов просто не соответствует легальным позициям
+
+MAGIC = b"PYCHBB01"
+HEADER = struct.Struct("<8sBI")  # MAGIC | тип фигуры | число позиций
+N_POSITIONS = 64 * 64 * 64
+TABLE_BYTES = N_POSITIONS // 8
+TABLES = {"KQK": chess.QUEEN, "KRK": chess.ROOK, "KPK": chess.PAWN}
+BUILD_ORDER = ["KQK", "KRK", "KPK"]  # KPK опирается на KQK и KRK (превращение пешки)
+
+DEFAULT_DIR = os.path.join(
+    os.environ.get("PYCHESS_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "pychess"),
+    "bitbases"
+)
+
+_NEVER = 255  # у черных есть ничейный ход (взятие фигуры) или пат: позиция не может быть выигрышной
+
+_KING_MOVES = [[t for t in chess.SQUARES if chess.square_distance(s, t) == 1] for s in chess.SQUARES]
+_KING_MASKS = [chess.BB_KING_ATTACKS[s] for s in chess.SQUARES]
+_ORTHOGONAL = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+_DIAGONAL = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+def _make_rays(directions):
+    rays = []
+    for sq in chess.SQUARES:
+        sq_rays = []
+        for df, dr in directions:
+            ray = []
+            f, r = chess.square_file(sq) + df, chess.square_rank(sq) + dr
+            while 0 <= f < 8 and 0 <= r < 8:
+                ray.append(chess.square(f, r))
+                f, r = f + df, r + dr
+            sq_rays.append(ray)
+        rays.append(sq_rays)
+    return rays
+
+
+_RAYS = {
+    chess.ROOK: _make_rays(_ORTHOGONAL),
+    chess.QUEEN: _make_rays(_ORTHOGONAL + _DIAGONAL),
+}
+
+
+def index(wk, bk, p):
+    return (wk << 12) | (bk << 6) | p
+
+
+def _attacks(piece_type, sq, occupied):
+    # поля, которые бьёт белая фигура на sq при занятых полях occupied (битовая маска)
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[chess.WHITE][sq]
+    mask = 0
+    for ray in _RAYS[piece_type][sq]:
+        for t in ray:
+            mask |= chess.BB_SQUARES[t]
+            if occupied & chess.BB_SQUARES[t]:
+                break
+    return mask
+
+
+def _piece_unmoves(piece_type, p, occupied):
+    # откуда белая фигура могла прийти на p (без взятий: черных фигур кроме короля нет)
+    if piece_type == chess.PAWN:
+        prev = p - 8
+        if prev >= 8 and not occupied & chess.BB_SQUARES[prev]:
+            yield prev
+            if 24 <= p < 32 and not occupied & chess.BB_SQUARES[p - 16]:
+                yield p - 16
+        return
+    for ray in _RAYS[piece_type][p]:
+        for t in ray:
+            if occupied & chess.BB_SQUARES[t]:
+                break
+            yield t
+
+
+def generate(piece_type, tables=None):
+    # ретроградный анализ: от матов назад по "обратным ходам"
+    # возвращает два bytearray (ход белых, ход черных) со значениями 0/1 для каждого индекса
+    legal_w = bytearray(N_POSITIONS)
+    win_w = bytearray(N_POSITIONS)
+    win_b = bytearray(N_POSITIONS)
+    counter = bytearray(N_POSITIONS)  # сколько ходов черных ещё не ведут в выигрыш белых
+    frontier_w = []
+    frontier_b = []
+
+    pawn = piece_type == chess.PAWN
+    for wk in chess.SQUARES:
+        for bk in chess.SQUARES:
+            if bk == wk or chess.square_distance(wk, bk) <= 1:
+                continue
+            for p in chess.SQUARES:
+                if p == wk or p == bk or (pawn and not 8 <= p < 56):
+                    continue
+                i = index(wk, bk, p)
+                wk_bb = chess.BB_SQUARES[wk]
+                in_check = bool(_attacks(piece_type, p, wk_bb | chess.BB_SQUARES[bk]) & chess.BB_SQUARES[bk])
+                legal_w[i] = not in_check  # при ходе белых черный король не может стоять под шахом
+
+                # ходы черного короля (ладья/ферзь "просвечивают" поле, с которого король ушёл)
+                attacked = _attacks(piece_type, p, wk_bb) | _KING_MASKS[wk]
+                moves = 0
+                draw = False
+                for t in _KING_MOVES[bk]:
+                    if t == p:
+                        if not _KING_MASKS[wk] & chess.BB_SQUARES[p]:
+                            draw = True  # незащищённую фигуру можно взять - остаются голые короли
+                    elif not attacked & chess.BB_SQUARES[t] and t != wk:
+                        moves += 1
+                if draw or (moves == 0 and not in_check):
+                    counter[i] = _NEVER
+                elif moves == 0:
+                    win_b[i] = 1  # мат
+                    frontier_b.append(i)
+                else:
+                    counter[i] = moves
+
+    if pawn:
+        # превращение пешки: выигрыш, если после него получается выигранная позиция KQK или KRK
+        for wk in chess.SQUARES:
+            for bk in chess.SQUARES:
+                for p in range(48, 56):
+                    i = index(wk, bk, p)
+                    q = p + 8
+                    if not legal_w[i] or win_w[i] or q in (wk, bk):
+                        continue
+                    j = index(wk, bk, q)
+                    if any(tables[name].win_b(j) for name in ("KQK", "KRK")):
+                        win_w[i] = 1
+                        frontier_w.append(i)
+
+    while frontier_w or frontier_b:
+        while frontier_b:
+            # черные проигрывают в B - значит, белые выигрывают в каждой позиции, откуда в B ведёт их ход
+            i = frontier_b.pop()
+            wk, bk, p = i >> 12, (i >> 6) & 63, i & 63
+            for prev in _KING_MOVES[wk]:
+                if prev == bk or prev == p or chess.square_distance(prev, bk) <= 1:
+                    continue
+                j = index(prev, bk, p)
+                if legal_w[j] and not win_w[j]:
+                    win_w[j] = 1
+                    frontier_w.append(j)
+            occupied = chess.BB_SQUARES[wk] | chess.BB_SQUARES[bk]
+            for prev in _piece_unmoves(piece_type, p, occupied):
+                j = index(wk, bk, prev)
+                if legal_w[j] and not win_w[j]:
+                    win_w[j] = 1
+                    frontier_w.append(j)
+
+        while frontier_w:
+            # белые выигрывают в W - у каждой позиции черных, откуда есть ход в W, на один "спасительный" ход меньше
+            i = frontier_w.pop()
+            wk, bk, p = i >> 12, (i >> 6) & 63, i & 63
+            for prev in _KING_MOVES[bk]:
+                if prev == wk or prev == p or chess.square_distance(prev, wk) <= 1:
+                    continue
+                j = index(wk, prev, p)
+                if counter[j] == _NEVER or win_b[j]:
+                    continue
+                counter[j] -= 1
+                if counter[j] == 0:
+                    win_b[j] = 1
+                    frontier_b.append(j)
+
+    return win_w, win_b
+
+
+def _pack(bits):
+    out = bytearray(len(bits) // 8)
+    for byte in range(len(out)):
+        base = byte * 8
+        value = 0
+        for bit in range(8):
+            if bits[base + bit]:
+                value |= 1 << bit
+        out[byte] = value
+    return out
+
+
+class BitbaseTable:
+    # одна таблица, отображённая в память с диска
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, piece_type, n = HEADER.unpack_from(self.data)
+        if magic != MAGIC or n != N_POSITIONS or len(self.data) != HEADER.size + 2 * TABLE_BYTES:
+            raise ValueError(f"повреждённая битовая база: {path}")
+        self.piece_type = piece_type
+
+    def win_w(self, i):
+        return self.data[HEADER.size + (i >> 3)] >> (i & 7) & 1
+
+    def win_b(self, i):
+        return self.data[HEADER.size + TABLE_BYTES + (i >> 3)] >> (i & 7) & 1
+
+
+def write_table(path, piece_type, win_w, win_b):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, piece_type, N_POSITIONS))
+        f.write(_pack(win_w))
+        f.write(_pack(win_b))
+    os.replace(tmp, path)
+
+
+class Bitbases:
+    # набор таблиц; отсутствующие строятся один раз и сохраняются на диск, дальше только mmap
+
+    def __init__(self, directory=DEFAULT_DIR, build=True, verbose=False):
+        self.directory = directory
+        self.tables = {}
+        for name in BUILD_ORDER:
+            path = os.path.join(directory, f"{name}.bin")
+            if not os.path.exists(path):
+                if not build:
+                    continue
+                os.makedirs(directory, exist_ok=True)
+                start = time.perf_counter()
+                win_w, win_b = generate(TABLES[name], self.tables)
+                write_table(path, TABLES[name], win_w, win_b)
+                if verbose:
+                    print(f"{name}: построена за {time.perf_counter() - start:.1f} c", file=sys.stderr)
+            self.tables[name] = BitbaseTable(path)
+
+    def probe(self, board: chess.Board):
+        # точный результат для стороны, которая ходит: 1 - выигрыш, 0 - ничья, -1 - проигрыш
+        # None - материал не покрыт базами
+        if chess.popcount(board.occupied) != 3:
+            return None
+        for sq in chess.scan_forward(board.occupied & ~board.kings):
+            piece = board.piece_at(sq)
+        name = {chess.QUEEN: "KQK", chess.ROOK: "KRK", chess.PAWN: "KPK"}.get(piece.piece_type)
+        table = self.tables.get(name)
+        if table is None:
+            return None
+
+        strong = piece.color
+        wk, bk, p = board.king(strong), board.king(not strong), sq
+        if strong == chess.BLACK:  # отражаем доску, чтобы сильная сторона стала белыми
+            wk, bk, p = wk ^ 56, bk ^ 56, p ^ 56
+        i = index(wk, bk, p)
+        if board.turn == strong:
+            return 1 if table.win_w(i) else 0
+        return -1 if table.win_b(i) else 0
+
+    def forced_result(self, board: chess.Board):
+        # итог при лучшей игре обеих сторон: "1-0", "0-1", "1/2-1/2" или None, если позиции нет в базах
+        result = self.probe(board)
+        if result is None:
+            return None
+        if result == 0:
+            return "1/2-1/2"
+        winner = board.turn if result > 0 else not board.turn
+        return "1-0" if winner == chess.WHITE else "0-1"
+
+
+if __name__ == "__main__":
+    # построить базы заранее: python -m core.bitbase [каталог]
+    Bitbases(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DIR, verbose=True)
@@ -0,0 +1,170 @@
+import threading
+import time
+from core.search import Engine, SearchResult
+
+
+class SearchThread:
+    # запускает поиск движка в фоновом потоке, чтобы не блокировать вызывающий код (например, интерфейс)
+    # колбэки вызываются из рабочего потока - переносить их в поток Tk должен вызывающий
+
+    def __init__(self, engine=None):
+        self.engine = engine or Engine()
+        self._thread = None
+        self._stop = None  # флаг остановки текущего поиска для движка
+        self._cancelled = None  # "токен отмены": результат отменённого поиска никому не нужен
+        self._lock = threading.Lock()  # одновременно идёт только один поиск (таблица перестановок общая)
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, board, on_done, on_progress=None, **limits):
+        # отменяем предыдущий поиск и запускаем новый; limits - те же, что у Engine.search
+        self.cancel()
+        stop = threading.Event()
+        cancelled = threading.Event()
+        self._stop = stop
+        self._cancelled = cancelled
+        board = board.copy()  # поток работает со своей копией доски
+
+        def on_iteration(result):
+            if on_progress is not None and not cancelled.is_set():
+                # отдаём снимок, потому что движок продолжит менять свой объект результата
+                on_progress(SearchResult(result.move, result.score, result.depth,
+                                         result.nodes, result.elapsed, list(result.pv)))
+
+        def run():
+            with self._lock:
+                if cancelled.is_set():
+                    return
+                result = self.engine.search(board, stop=stop, on_iteration=on_iteration, **limits)
+            if not cancelled.is_set():
+                on_done(result)
+
+        self._thread = threading.Thread(target=run, name="engine-search", daemon=True)
+        self._thread.start()
+        return stop
+
+    def finish(self):
+        # закончить текущий поиск досрочно, но с результатом: on_done получит лучший ход на этот момент
+        if self._stop is not None:
+            self._stop.set()
+
+    def cancel(self):
+        # не ждём завершения потока: движок проверяет флаг и сам выходит за несколько миллисекунд
+        if self._stop is not None:
+            self._cancelled.set()
+            self._stop.set()
+            self._stop = None
+            self._cancelled = None
+
+
+class PonderStats:
+    def __init__(self):
+        self.hits = 0  # соперник сыграл предсказанный ход - поиск продолжился
+        self.misses = 0  # сыграл другой ход - поиск начался заново (с тёплой таблицей перестановок)
+        self.time_saved = 0.0  # секунд, которые не пришлось думать после хода соперника
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self):
+        return f"угадано {self.hits} из {self.hits + self.misses}, сэкономлено {self.time_saved:.1f} с"
+
+
+class Ponderer:
+    # обдумывание на времени соперника: пока он думает, движок ищет позицию после предсказанного ответа
+    # если соперник сыграл этот ход, тот же поиск продолжается и получает только остаток времени на ход;
+    # если нет - поиск отменяется и запускается новый (таблица перестановок общая, так что он не с нуля)
+
+    def __init__(self, search: SearchThread):
+        self.search = search
+        self.stats = PonderStats()
+        self._lock = threading.Lock()  # колбэки поиска приходят из его потока
+        self._token = None  # текущий поиск-обдумывание; колбэки старых поисков сравнивают себя с ним
+        self._ponder_fen = None
+        self._started = 0.0
+        self._callbacks = None  # (on_done, on_progress) после попадания
+        self._result = None  # поиск закончился (например, нашёл мат) раньше, чем соперник сходил
+        self._timer = None
+
+    @property
+    def pondering(self) -> bool:
+        return self._token is not None and self._callbacks is None
+
+    def ponder(self, board, move):
+        # board - позиция, где ходит соперник, move - его ожидаемый ход; поиск без ограничения времени
+        self.cancel()
+        board = board.copy()
+        board.push(move)
+        token = object()
+        with self._lock:
+            self._token = token
+            self._ponder_fen = board.fen()
+            self._started = time.perf_counter()
+            self._callbacks = None
+            self._result = None
+        self.search.start(board, on_done=lambda result: self._done(token, result),
+                          on_progress=lambda result: self._progress(token, result))
+
+    def think(self, board, time_limit, on_done, on_progress=None) -> bool:
+        # ход движка в позиции board: продолжение обдумывания (True) или новый поиск (False)
+        with self._lock:
+            if self.pondering and board.fen() == self._ponder_fen:
+                elapsed = time.perf_counter() - self._started
+                self.stats.hits += 1
+                self.stats.time_saved += min(elapsed, time_limit)
+                self._callbacks = (on_done, on_progress)
+                result = self._result
+                if result is not None:
+                    self._token = None
+                else:
+                    # на ход даётся то же время, что без обдумывания: уже потраченное засчитывается
+                    self._timer = threading.Timer(max(0.0, time_limit - elapsed), self.search.finish)
+                    self._timer.daemon = True
+                    self._timer.start()
+            else:
+                if self.pondering:
+                    self.stats.misses += 1
+                result = None
+                self._callbacks = None
+        if self._callbacks is not None:
+            if result is not None:
+                on_done(result)
+            return True
+        self.cancel()
+        self.search.start(board, on_done=on_done, on_progress=on_progress, time_limit=time_limit)
+        return False
+
+    def _done(self, token, result):
+        with self._lock:
+            if token is not self._token:
+                return
+            if self._callbacks is None:
+                self._result = result  # отдадим, когда соперник сыграет предсказанный ход
+                return
+            on_done = self._callbacks[0]
+            self._token = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        on_done(result)
+
+    def _progress(self, token, result):
+        with self._lock:
+            if token is not self._token or self._callbacks is None or self._callbacks[1] is None:
+                return
+            on_progress = self._callbacks[1]
+        on_progress(result)
+
+    def cancel(self):
+        with self._lock:
+            self._token = None
+            self._callbacks = None
+            self._result = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.search.cancel()
@@ -1,24 +1,190 @@
 import chess
+from core import profiler
+
+KEYFRAME_INTERVAL = 16  #каждые столько полуходов ChessGame запоминает копию доски для быстрого перехода к ходу
+
+
+class PositionState:
+    #всё, что интерфейсу нужно знать о текущей позиции, считается один раз за полуход:
+    #легальные ходы (списком, множеством и по полям), шах и итог партии
+    def __init__(self, board: chess.Board):
+        self.legal_moves = list(board.legal_moves)
+        self.legal_set = set(self.legal_moves) #проверка легальности хода за O(1)
+        self.moves_from = {} #поле -> список ходов фигуры с этого поля
+        for move in self.legal_moves:
+            self.moves_from.setdefault(move.from_square, []).append(move)
+        self.is_check = board.is_check()
+        self.termination = self._termination(board)
+
+    def _termination(self, board):
+        #порядок тот же, что в get_game_result
+        if not self.legal_moves:
+            return chess.Termination.CHECKMATE if self.is_check else chess.Termination.STALEMATE
+        if board.is_insufficient_material():
+            return chess.Termination.INSUFFICIENT_MATERIAL
+        if board.is_seventyfive_moves():
+            return chess.Termination.SEVENTYFIVE_MOVES
+        if board.is_fivefold_repetition():
+            return chess.Termination.FIVEFOLD_REPETITION
+        return None
+
+    @property
+    def is_checkmate(self) -> bool:
+        return self.termination == chess.Termination.CHECKMATE
+
+    @property
+    def is_game_over(self) -> bool:
+        return self.termination is not None
 
 
 class ChessGame:
-    def __init__(self):
+    def __init__(self, keyframes=True):
         self.board = chess.Board() #создаём стандартную шахматную доску в начальной позиции
         self.resigned = False #флаг сдачи (изначально False)
+        self._state = None #кэш PositionState для текущей позиции
+        self._state_key = None
+        self.book = None #дебютная книга (core.opening_book.OpeningBook), если подключена
+        self.bitbases = None #битовые базы эндшпилей (core.bitbase.Bitbases), если подключены
+        self._redo = [] #ходы, отменённые через undo (последний отменённый - в конце списка)
+        self._keyframes = {} #полуход -> копия доски (со стеком ходов) на этом полуходе
+        self._last_keyframe = 0
+        #снимки при каждом KEYFRAME_INTERVAL-м ходе; для массового проигрывания партий без переходов
+        #(выгрузка обучающих данных) их можно выключить - тогда go_to запоминает снимки сам, по дороге
+        self.keyframes = keyframes
+
+    @property
+    def state(self) -> PositionState:
+        #снимок позиции пересчитывается только после хода (или если доску подменили целиком)
+        key = (id(self.board), len(self.board.move_stack))
+        if self._state is None or self._state_key != key:
+            self._state = PositionState(self.board)
+            self._state_key = key
+        return self._state
+
+    def book_move(self): #ход из дебютной книги для текущей позиции (или None)
+        if self.book is None:
+            return None
+        return self.book.choose(self.board)
+
+    def forced_result(self): #итог при лучшей игре по битовым базам: строка вроде "Белые выигрывают" или None
+        if self.bitbases is None or self.is_game_over:
+            return None
+        result = self.bitbases.forced_result(self.board)
+        if result == "1-0":
+            return "Белые выигрывают"
+        if result == "0-1":
+            return "Чёрные выигрывают"
+        if result == "1/2-1/2":
+            return "Теоретическая ничья"
+        return None
+
+    def invalidate(self): #сбросить кэш, если доску меняли в обход push/pop
+        self._state = None
+        self._redo = []
+        self._keyframes = {}
+        self._last_keyframe = 0
+
+    def push(self, move: chess.Move): #новый ход: отменённое продолжение партии (redo) больше не нужно
+        if self._redo:
+            self._redo = []
+            self._drop_keyframes_after(self.ply)
+        self._push(move)
+
+    def _push(self, move):
+        self.board.push(move)
+        self._state = None
+        if self.keyframes:
+            ply = len(self.board.move_stack)
+            if ply % KEYFRAME_INTERVAL == 0 and ply > self._last_keyframe:
+                self._keyframes[ply] = self.board.copy()
+                self._last_keyframe = ply
+
+    def pop(self) -> chess.Move: #отменить ход насовсем (для перебора); undo() оставляет его для redo
+        move = self.board.pop()
+        self._state = None
+        self._redo = []
+        ply = len(self.board.move_stack)
+        if self._last_keyframe > ply: #снимки дальше текущего хода относятся к брошенной линии
+            self._drop_keyframes_after(ply)
+        return move
+
+    def _drop_keyframes_after(self, ply):
+        for key in [k for k in self._keyframes if k > ply]:
+            del self._keyframes[key]
+        self._last_keyframe = max(self._keyframes, default=0)
+
+    # --- навигация по партии: undo/redo и переход к любому полуходу ---
+
+    @property
+    def ply(self) -> int: #сколько ходов сделано до текущей позиции
+        return len(self.board.move_stack)
+
+    @property
+    def line_length(self) -> int: #сколько ходов во всей партии, включая отменённые (redo)
+        return len(self.board.move_stack) + len(self._redo)
+
+    @property
+    def line(self): #все ходы партии по порядку, включая отменённые
+        return self.board.move_stack + self._redo[::-1]
+
+    def undo(self): #шаг назад; ход остаётся в партии, к нему можно вернуться через redo
+        if not self.board.move_stack:
+            return None
+        move = self.board.pop()
+        self._state = None
+        self._redo.append(move)
+        return move
+
+    def redo(self): #шаг вперёд по отменённым ходам
+        if not self._redo:
+            return None
+        move = self._redo.pop()
+        self._push(move)
+        return move
+
+    def go_to(self, ply): #переход к позиции после ply ходов партии: не больше KEYFRAME_INTERVAL ходов
+        ply = max(0, min(ply, self.line_length))
+        current = self.ply
+        if current <= ply <= current + KEYFRAME_INTERVAL:
+            for _ in range(ply - current):
+                self.redo()
+            return
+        if ply < current <= ply + KEYFRAME_INTERVAL:
+            for _ in range(current - ply):
+                self.undo()
+            return
+
+        #далеко: берём ближайший снимок не дальше цели и доигрываем меньше KEYFRAME_INTERVAL ходов
+        #(если снимки при ходах выключены, недостающие запоминаем по дороге для следующих переходов)
+        line = self.line
+        base = ply - ply % KEYFRAME_INTERVAL
+        while base and base not in self._keyframes:
+            base -= KEYFRAME_INTERVAL
+        board = self._keyframes[base].copy() if base else self.board.root()
+        for i, move in enumerate(line[base:ply], base + 1):
+            board.push(move)
+            if i % KEYFRAME_INTERVAL == 0 and i not in self._keyframes:
+                self._keyframes[i] = board.copy()
+                self._last_keyframe = max(self._last_keyframe, i)
+        self.board = board
+        self._redo = line[ply:][::-1]
+        self._state = None
 
+    @profiler.timed("game.make_move")
     def make_move(self, move_uci: str) -> bool:
         try:
             move = chess.Move.from_uci(move_uci) #пытаемся преобразовать строку `move_uci` в объект `chess.Move`
-            if move in self.board.legal_moves:
-                #является ли этот ход легальным (то есть находится ли он в списке `self.board.legal_moves`).
-                #если да, то выполняет ход с помощью `self.board.push(move)`
-                self.board.push(move)
+            legal = self.state.legal_set
+            if move in legal:
+                #является ли этот ход легальным (то есть находится ли он в множестве легальных ходов позиции).
+                #если да, то выполняет ход с помощью `self.push(move)`
+                self.push(move)
                 return True
 
             if len(move_uci) == 4:
                 move = chess.Move.from_uci(move_uci + "q")
-                if move in self.board.legal_moves:
-                    self.board.push(move)
+                if move in legal:
+                    self.push(move)
                     return True
 
             #если ход не был легальным, и при этом длина строки `move_uci` равна 4
@@ -33,34 +199,36 @@ class ChessGame:
 
     @property
     def is_game_over(self) -> bool:
-        return self.resigned or self.board.is_game_over()
+        return self.resigned or self.state.is_game_over
     #`return self.resigned or self.board.is_game_over()` - игра считается законченной, если:
     #- игрок сдался (`self.resigned` установлен в True)
-    #- ИЛИ на доске наступила одна из конечных ситуаций (мат, пат и т.д.), что проверяется методом `is_game_over()` из библиотеки `chess`
+    #- ИЛИ на доске наступила одна из конечных ситуаций (мат, пат и т.д.), она уже посчитана в `self.state`
 
     def resign(self): #вызывается когда игрок сдается
         self.resigned = True
 
+    @profiler.timed("game.get_game_result")
     def get_game_result(self) -> str:
-        if self.board.is_checkmate():
+        termination = self.state.termination
+        if termination == chess.Termination.CHECKMATE:
             winner = "чёрные" if self.board.turn == chess.WHITE else "белые"
             return f"Мат! Победили {winner.capitalize()}"
    #когда мат, то тот, кто сейчас должен ходить (чей ход, `self.board.turn`), находится под матом и проигрывает.
    #поэтому победитель - противоположный цвет: если сейчас ход белых (`chess.WHITE`), то они проиграли, значит, победили черные, и наоборот.
 
-        elif self.board.is_stalemate():
+        elif termination == chess.Termination.STALEMATE:
             return "Пат! Ничья"
         #пат - это ситуация, когда игрок, чей ход, не может сделать ни одного хода, но король не под шахом. Это ничья.
 
-        elif self.board.is_insufficient_material():
+        elif termination == chess.Termination.INSUFFICIENT_MATERIAL:
             return "Ничья! Недостаточно материала"
         #ничья, когда на доске недостаточно фигур, чтобы поставить мат
         #(например, король против короля, король против короля и слона и т.п.)
 
-        elif self.board.is_seventyfive_moves():
+        elif termination == chess.Termination.SEVENTYFIVE_MOVES:
             return "Ничья! Правило 75 ходов"
         #если в течение 75 ходов не было взятия фигуры и не было хода пешкой, то игра заканчивается вничью.
-        elif self.board.is_fivefold_repetition():
+        elif termination == chess.Termination.FIVEFOLD_REPETITION:
             return "Ничья! Пятикратное повторение"
         #если одна и та же позиция повторилась на доске пять раз, то игра заканчивается ничьей.
         return "Игра продолжается"
@@ -0,0 +1,187 @@
+import os
+import queue
+import struct
+import threading
+import chess
+from core import profiler
+from core.transposition import encode_move, decode_move
+
+# формат журнала партии:
+#   заголовок: MAGIC | версия (1 байт) | флаги (1 байт) | длина FEN (2 байта) | FEN начальной позиции
+#   дальше по 2 байта на полуход (ход, упакованный как в таблице перестановок)
+# файл только дописывается, поэтому при сбое теряется максимум последний ход
+MAGIC = b"PYCHESSJ"
+VERSION = 1
+FLAG_PLAYER_WHITE = 1
+RESIGN_RECORD = 0xFFFF  # особая запись: игрок сдался
+RECORD = struct.Struct("<H")
+HEADER = struct.Struct("<8sBBH")
+
+
+class JournalError(Exception):
+    pass
+
+
+class SavedGame:
+    def __init__(self, fen, player_color, moves, resigned):
+        self.fen = fen  # начальная позиция
+        self.player_color = player_color
+        self.moves = moves  # список chess.Move по порядку
+        self.resigned = resigned
+
+    def replay(self, game):
+        # проигрываем ходы в ChessGame, чтобы восстановить весь стек ходов (нужен для повторений)
+        game.board = chess.Board(self.fen)
+        game.invalidate()
+        for move in self.moves:
+            if move not in game.state.legal_set:
+                raise JournalError(f"нелегальный ход в журнале: {move.uci()}")
+            game.push(move)
+        game.resigned = self.resigned
+        return game
+
+
+def _header(fen, player_color):
+    fen_bytes = fen.encode("ascii")
+    flags = FLAG_PLAYER_WHITE if player_color == chess.WHITE else 0
+    return HEADER.pack(MAGIC, VERSION, flags, len(fen_bytes)) + fen_bytes
+
+
+def encode_journal(fen, player_color, codes, resigned=False) -> bytes:
+    # весь журнал партии одним куском: начальная позиция и упакованные ходы (encode_move)
+    data = _header(fen, player_color) + b"".join(RECORD.pack(code) for code in codes)
+    if resigned:
+        data += RECORD.pack(RESIGN_RECORD)
+    return data
+
+
+@profiler.timed("journal.load")
+def load_journal(path) -> SavedGame:
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise JournalError("файл журнала повреждён")
+    magic, version, flags, fen_len = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise JournalError("неизвестный формат журнала")
+
+    offset = HEADER.size + fen_len
+    fen = data[HEADER.size:offset].decode("ascii")
+    player_color = chess.WHITE if flags & FLAG_PLAYER_WHITE else chess.BLACK
+
+    moves = []
+    resigned = False
+    end = offset + (len(data) - offset) // RECORD.size * RECORD.size  # недописанный байт в конце отбрасываем
+    for (code,) in RECORD.iter_unpack(data[offset:end]):
+        if code == RESIGN_RECORD:
+            resigned = True
+        else:
+            moves.append(decode_move(code))
+    return SavedGame(fen, player_color, moves, resigned)
+
+
+class GameJournal:
+    # запись журнала в фоновом потоке: интерфейс только кладёт ход в очередь (O(1) на ход)
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="game-journal", daemon=True)
+        self._thread.start()
+
+    def start(self, board: chess.Board, player_color):
+        # новый журнал для позиции board (со всеми уже сделанными ходами)
+        self.rewrite(board, player_color)
+
+    @profiler.timed("journal.rewrite")
+    def rewrite(self, board: chess.Board, player_color, resigned=False):
+        # уплотнение: пишем журнал заново во временный файл и атомарно подменяем старый
+        codes = (encode_move(m) for m in board.move_stack)
+        self._queue.put(("rewrite", encode_journal(board.root().fen(), player_color, codes, resigned)))
+
+    def resume(self):
+        # продолжаем дописывать существующий журнал после загрузки
+        self._queue.put(("open", None))
+
+    def append(self, move: chess.Move):
+        self._queue.put(("append", RECORD.pack(encode_move(move))))
+
+    def mark_resigned(self):
+        self._queue.put(("append", RECORD.pack(RESIGN_RECORD)))
+
+    def delete(self):
+        self._queue.put(("delete", None))
+
+    def close(self):
+        self._queue.put(("close", None))
+
+    def flush(self):
+        # дождаться, пока всё из очереди окажется на диске
+        done = threading.Event()
+        self._queue.put(("sync", done))
+        done.wait()
+
+    def _run(self):
+        f = None
+        while True:
+            command, payload = self._queue.get()
+            if command == "sync":
+                payload.set()  # вне try: flush() не должен зависнуть, что бы ни случилось с файлом
+                continue
+            try:
+                if command == "append":
+                    if f is None:
+                        f = self._open_append()
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                elif command == "rewrite":
+                    if f is not None:
+                        f.close()
+                    tmp = f"{self.path}.tmp"
+                    with open(tmp, "wb") as out:
+                        out.write(payload)
+                        out.flush()
+                        os.fsync(out.fileno())
+                    os.replace(tmp, self.path)
+                    f = open(self.path, "ab")
+                elif command == "open":
+                    if f is None:
+                        f = self._open_append()
+                elif command == "delete":
+                    if f is not None:
+                        f.close()
+                        f = None
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                elif command == "close":
+                    if f is not None:
+                        f.close()
+                        f = None
+            except Exception as e:
+                # любая ошибка (в том числе повреждённый журнал) не должна останавливать поток записи
+                print(f"Ошибка записи журнала: {str(e)}")
+                if f is not None:
+                    try:
+                        f.close()
+                    except OSError:
+                        pass
+                f = None
+
+    def _open_append(self):
+        # если прошлый сеанс оборвался посреди записи, отрезаем недописанный байт
+        size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise JournalError("файл журнала повреждён")
+        magic, version, flags, fen_len = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise JournalError("неизвестный формат журнала")
+        body = size - HEADER.size - fen_len
+        if body < 0:
+            raise JournalError("файл журнала повреждён")
+        f = open(self.path, "ab")
+        if body % RECORD.size:
+            f.truncate(size - body % RECORD.size)
+        return f
@@ -0,0 +1,52 @@
+import random
+import chess
+import chess.polyglot
+
+DEFAULT_MAX_PLY = 20  # глубже этого полухода книгу не спрашиваем
+
+
+class OpeningBook:
+    # дебютная книга в формате Polyglot (.bin)
+    # файл отображается в память (mmap), а не читается целиком: поиск позиции - двоичный поиск
+    # по ключу Zobrist прямо в отображении, а несколько процессов делят одни и те же страницы кэша ОС
+
+    def __init__(self, path, max_ply=DEFAULT_MAX_PLY, mode="weighted", seed=None):
+        if mode not in ("weighted", "best"):
+            raise ValueError(f"неизвестный режим выбора хода: {mode}")
+        self.path = path
+        self.max_ply = max_ply  # "глубина" книги в полуходах
+        self.mode = mode  # weighted - случайно с учётом весов, best - всегда самый весомый ход
+        self.rng = random.Random(seed)
+        self.reader = chess.polyglot.MemoryMappedReader(path)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.reader)
+
+    def entries(self, board: chess.Board):
+        # все легальные книжные ходы позиции: список (ход, вес)
+        return [(entry.move, entry.weight) for entry in self.reader.find_all(board)]
+
+    def choose(self, board: chess.Board):
+        # книжный ход для позиции или None (позиции нет в книге или мы уже вышли за глубину книги)
+        if board.ply() >= self.max_ply:
+            return None
+        entries = self.entries(board)
+        if not entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.mode == "best":
+            return max(entries, key=lambda e: e[1])[0]
+        moves, weights = zip(*entries)
+        return self.rng.choices(moves, weights=weights)[0]
+
+    def close(self):
+        self.reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,91 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import shared_memory
+from core.search import Engine, SearchResult
+from core.transposition import TranspositionTable
+
+STOP_POLL = 0.005  # как часто проверяем внешний флаг остановки (секунд)
+
+# состояние процесса-помощника (заполняется в _init_worker)
+_worker_engine = None
+_worker_shm = None
+_worker_stop = None
+
+
+def _init_worker(shm_name, stop):
+    # каждый процесс подключается к общей таблице перестановок в разделяемой памяти
+    global _worker_engine, _worker_shm, _worker_stop
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_engine = Engine(tt=TranspositionTable(buffer=_worker_shm.buf))
+    _worker_stop = stop
+
+
+def _worker_search(board, index, limits):
+    # Lazy SMP: все ищут одну и ту же позицию, а делятся находками через общую таблицу
+    # нечётные помощники начинают со второй глубины, чтобы процессы расходились по дереву
+    result = _worker_engine.search(board, stop=_worker_stop, first_depth=1 + index % 2, **limits)
+    return index, result
+
+
+class ParallelEngine:
+    # параллельный поиск на нескольких ядрах (Lazy SMP с общей таблицей перестановок)
+
+    def __init__(self, workers=None, hash_mb=64):
+        self.workers = workers or os.cpu_count() or 1
+        self._shm = shared_memory.SharedMemory(create=True, size=TranspositionTable.buffer_size(hash_mb))
+        self._shm.buf[:] = bytes(self._shm.size)
+        self._stop = multiprocessing.Event()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self._shm.name, self._stop)
+        )
+        # процессы запускаются сейчас, в вызывающем потоке, а не при первом поиске:
+        # fork из фонового потока, пока главный ждёт ввода (stdin в режиме UCI), зависает на блокировке stdin
+        self._pool.submit(os.getpid).result()
+
+    def search(self, board, depth=None, nodes=None, time_limit=None, stop=None) -> SearchResult:
+        # те же ограничения, что у Engine.search; бюджет узлов делится между процессами
+        # stop - threading.Event вызывающего потока, передаём его помощникам через общий флаг
+        limits = {'depth': depth, 'time_limit': time_limit}
+        if nodes is not None:
+            limits['nodes'] = max(1, nodes // self.workers)
+
+        self._stop.clear()
+        futures = {self._pool.submit(_worker_search, board, i, limits) for i in range(self.workers)}
+        results = {}
+        while futures:
+            done, futures = wait(futures, timeout=STOP_POLL if stop is not None else None,
+                                 return_when=FIRST_COMPLETED)
+            if stop is not None and stop.is_set():
+                self._stop.set()
+            for future in done:
+                index, result = future.result()
+                results[index] = result
+            if 0 in results:
+                # главный процесс досчитал - помощники больше не нужны
+                self._stop.set()
+
+        # берём самый глубокий законченный результат, при равенстве - главного процесса
+        best = max(results.values(), key=lambda r: (r.depth, r is results[0]))
+        total = SearchResult(best.move, best.score, best.depth,
+                             sum(r.nodes for r in results.values()),
+                             max(r.elapsed for r in results.values()), best.pv)
+        return total
+
+    def clear(self):
+        # общая таблица обнуляется прямо в разделяемой памяти - помощники увидят это при следующем поиске
+        self._shm.buf[:] = bytes(self._shm.size)
+
+    def close(self):
+        self._stop.set()
+        self._pool.shutdown(wait=True)
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,263 @@
+import io
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import chess
+import chess.pgn
+
+# индекс базы партий PGN: один потоковый проход по файлу находит начало каждой партии,
+# а сама партия разбирается только когда её открывают (mmap + срез по смещениям)
+#
+# формат файла индекса (рядом с PGN, "<файл>.idx"):
+#   заголовок: MAGIC | версия | размер PGN | время изменения PGN | число партий
+#   смещения партий в PGN: count * 8 байт
+#   смещения строк заголовков: (count + 1) * 8 байт
+#   строки заголовков: для каждой партии поля TAGS через \t, в UTF-8
+MAGIC = b"PYCHPGNI"
+VERSION = 1
+HEADER = struct.Struct("<8sBQdQ")
+TAGS = ("Event", "Date", "White", "Black", "Result")
+PARALLEL_THRESHOLD = 64 * 1024 * 1024  # файлы меньше этого индексируются в одном процессе
+
+_TAG_RE = re.compile(rb'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"')
+
+
+class PgnError(Exception):
+    pass
+
+
+class MainlineVisitor(chess.pgn.BaseVisitor):
+    # лёгкий разбор партии: только заголовки и основная линия, без дерева GameNode и вариантов
+    def begin_game(self):
+        self.headers = {}
+        self.root = None
+        self.moves = []
+        self.error = None
+
+    def visit_header(self, tagname, tagvalue):
+        self.headers[tagname] = tagvalue
+
+    def visit_board(self, board):
+        if self.root is None:
+            self.root = board.copy(stack=False)
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def visit_move(self, board, move):
+        self.moves.append(move)
+
+    def handle_error(self, error):
+        if self.error is None:
+            self.error = error
+
+    def result(self):
+        return self
+
+
+def _is_tag(line):
+    return line.lstrip().startswith(b"[")
+
+
+def _previous_line_is_tag(mm, pos):
+    # последняя непустая строка перед pos - строка заголовка? (нужно на границе кусков файла)
+    end = pos
+    while end > 0:
+        start = mm.rfind(b"\n", 0, end - 1) + 1
+        line = mm[start:end].strip()
+        if line:
+            return line.startswith(b"[")
+        end = start
+    return False
+
+
+def _tag_fields(tags):
+    return "\t".join(tags.get(name, "?").replace("\t", " ") for name in TAGS)
+
+
+def scan_chunk(path, start, end):
+    # партии, первая строка заголовков которых начинается в [start, end): список (смещение, поля TAGS)
+    # последнюю партию куска дочитываем за end, пока не кончатся её заголовки
+    games = []
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return games
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if start > 0:
+                start = mm.find(b"\n", start - 1) + 1 or len(mm)  # к началу ближайшей строки
+            prev_tag = start > 0 and _previous_line_is_tag(mm, start)
+            mm.seek(start)
+            tags = None  # заголовки текущей партии, пока мы внутри них
+            while True:
+                pos = mm.tell()
+                if pos >= end and tags is None:
+                    break
+                line = mm.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue  # пустые строки не меняют, где мы находимся
+                if _is_tag(line):
+                    if not prev_tag:
+                        if pos >= end:
+                            break  # эта партия принадлежит следующему куску
+                        tags = {}
+                        games.append([pos, tags])
+                    if tags is not None:
+                        match = _TAG_RE.match(line.lstrip())
+                        if match:
+                            tags[match.group(1).decode("ascii", "replace")] = \
+                                match.group(2).decode("utf-8", "replace")
+                    prev_tag = True
+                else:
+                    tags = None
+                    prev_tag = False
+    return [(offset, _tag_fields(tags)) for offset, tags in games]
+
+
+def _chunks(size, parts):
+    step = max(1, size // parts)
+    bounds = list(range(0, size, step))[:parts] + [size]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def build_index(path, index_path=None, workers=None):
+    # один проход по PGN (большие файлы - кусками в нескольких процессах) и запись индекса на диск
+    index_path = index_path or f"{path}.idx"
+    stat = os.stat(path)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if stat.st_size >= PARALLEL_THRESHOLD else 1
+
+    if workers > 1:
+        chunks = _chunks(stat.st_size, workers * 4)  # кусков больше, чем процессов - ровнее загрузка
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(scan_chunk, [path] * len(chunks), *zip(*chunks)))
+        games = [game for part in parts for game in part]
+    else:
+        games = scan_chunk(path, 0, stat.st_size)
+
+    offsets = array("Q", (offset for offset, _ in games))
+    blob = bytearray()
+    tag_offsets = array("Q", [0])
+    for _, fields in games:
+        blob += fields.encode("utf-8")
+        tag_offsets.append(len(blob))
+
+    tmp = f"{index_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, stat.st_size, stat.st_mtime, len(offsets)))
+        f.write(offsets.tobytes())
+        f.write(tag_offsets.tobytes())
+        f.write(blob)
+    os.replace(tmp, index_path)
+    return index_path
+
+
+class PgnDatabase:
+    # открытая база партий: индекс читается с диска (или строится, если его нет или PGN изменился),
+    # партии разбираются по запросу
+
+    def __init__(self, path, index_path=None, workers=None, rebuild=False):
+        self.path = path
+        self.index_path = index_path or f"{path}.idx"
+        if rebuild or not self._index_is_fresh():
+            build_index(path, self.index_path, workers)
+
+        with open(self.index_path, "rb") as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, mtime, count = HEADER.unpack_from(self._index)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"повреждённый индекс PGN: {self.index_path}")
+        pos = HEADER.size
+        self.offsets = array("Q", self._index[pos:pos + 8 * count])
+        pos += 8 * count
+        self._tag_offsets = array("Q", self._index[pos:pos + 8 * (count + 1)])
+        self._tags_start = pos + 8 * (count + 1)
+
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def _index_is_fresh(self):
+        if not os.path.exists(self.index_path):
+            return False
+        stat = os.stat(self.path)
+        with open(self.index_path, "rb") as f:
+            data = f.read(HEADER.size)
+        if len(data) < HEADER.size:
+            return False
+        magic, version, size, mtime, count = HEADER.unpack(data)
+        return magic == MAGIC and version == VERSION and size == stat.st_size and mtime == stat.st_mtime
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def headers(self, i):
+        # основные заголовки партии i (словарь по TAGS) без разбора самой партии
+        start = self._tags_start + self._tag_offsets[i]
+        end = self._tags_start + self._tag_offsets[i + 1]
+        return dict(zip(TAGS, self._index[start:end].decode("utf-8").split("\t")))
+
+    def describe(self, i):
+        # короткая строка для списка партий
+        h = self.headers(i)
+        return f"{i + 1}. {h['White']} - {h['Black']}  {h['Result']}  {h['Date']}"
+
+    def text(self, i):
+        start = self.offsets[i]
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(self._data)
+        return self._data[start:end].decode("utf-8", "replace")
+
+    def read_game(self, i) -> chess.pgn.Game:
+        return chess.pgn.read_game(io.StringIO(self.text(i)))
+
+    def read_mainline(self, i):
+        # (заголовки, начальная позиция, ходы основной линии) - быстрее read_game для массовой обработки
+        visitor = chess.pgn.read_game(io.StringIO(self.text(i)), Visitor=MainlineVisitor)
+        if visitor is None:
+            raise PgnError(f"партия {i + 1} не найдена")
+        if visitor.error is not None:
+            raise PgnError(f"ошибка в партии {i + 1}: {visitor.error}")
+        return visitor.headers, visitor.root, visitor.moves
+
+    def replay(self, i, game):
+        # проигрываем основную линию партии i в ChessGame (как SavedGame.replay для журнала)
+        pgn = self.read_game(i)
+        if pgn is None:
+            raise PgnError(f"партия {i + 1} не найдена")
+        if pgn.errors:
+            raise PgnError(f"ошибка в партии {i + 1}: {pgn.errors[0]}")
+        game.board = pgn.board()
+        game.invalidate()
+        for move in pgn.mainline_moves():
+            if move not in game.state.legal_set:
+                raise PgnError(f"нелегальный ход в партии {i + 1}: {move.uci()}")
+            game.push(move)
+        return game
+
+    def close(self):
+        self._index.close()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # построить индекс заранее: python -m core.pgn_index база.pgn [число процессов]
+    source = sys.argv[1]
+    started = time.perf_counter()
+    build_index(source, workers=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    elapsed = time.perf_counter() - started
+    with PgnDatabase(source) as db:
+        megabytes = os.path.getsize(source) / 1e6
+        print(f"партий: {len(db)}, {megabytes:.1f} МБ за {elapsed:.2f} c ({megabytes / elapsed:.1f} МБ/с)",
+              file=sys.stderr)
@@ -0,0 +1,214 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import chess
+from core.pgn_index import PgnDatabase, PgnError
+from core.transposition import zobrist_hash, push_hashed, encode_move, decode_move
+
+# индекс позиций по сохранённым партиям: ключ Zobrist -> (партия, полуход, следующий ход)
+# хранится в SQLite; таблица positions без rowid упорядочена по ключу, поэтому все вхождения
+# позиции лежат рядом и находятся одним поиском по B-дереву даже при миллионах позиций
+#
+# ключи polyglot беззнаковые, а INTEGER в SQLite - знаковый: храним ключ как знаковое 64-битное число
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    source TEXT,
+    ref INTEGER,
+    white TEXT,
+    black TEXT,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER NOT NULL,
+    game INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    move INTEGER,
+    PRIMARY KEY (key, game, ply)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS imports (
+    source TEXT PRIMARY KEY,
+    games INTEGER NOT NULL
+);
+"""
+COMMIT_EVERY = 1000  # партий в одной транзакции при импорте
+
+
+def _signed(key):
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def _position_rows(board, moves):
+    # (ключ, полуход, следующий ход) для каждой позиции партии; board при этом проигрывается до конца
+    key = zobrist_hash(board)
+    rows = []
+    for ply, move in enumerate(moves):
+        rows.append((_signed(key), ply, encode_move(move)))
+        key = push_hashed(board, move, key)
+    rows.append((_signed(key), len(moves), None))
+    return rows
+
+
+def _extract(db, start, stop):
+    # разбор партий [start, stop) базы: (номер, результат, белые, черные, строки позиций)
+    games = []
+    for i in range(start, stop):
+        try:
+            headers, root, moves = db.read_mainline(i)
+        except PgnError:
+            continue  # битую партию пропускаем, импорт продолжается
+        games.append((i, headers.get("Result", "*"), headers.get("White", "?"), headers.get("Black", "?"),
+                      _position_rows(root, moves)))
+    return stop, games
+
+
+def _extract_worker(path, index_path, start, stop):
+    with PgnDatabase(path, index_path) as db:
+        return _extract(db, start, stop)
+
+
+def _extract_batches(db, batches, workers):
+    # результаты пачек строго по порядку; в полёте не больше двух пачек на процесс
+    if workers <= 1:
+        for start, stop in batches:
+            yield _extract(db, start, stop)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start, stop in batches:
+            pending.append(pool.submit(_extract_worker, db.path, db.index_path, start, stop))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class MoveStats:
+    # что играли в позиции: ход и результаты партий, где он был сделан
+    def __init__(self, move, games, white, draws, black):
+        self.move = move
+        self.games = games
+        self.white = white
+        self.draws = draws
+        self.black = black
+
+    def score(self, color):
+        # доля очков для стороны color (ничья - пол-очка)
+        wins = self.white if color == chess.WHITE else self.black
+        return (wins + self.draws / 2) / self.games if self.games else 0.0
+
+
+class PositionIndex:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    # --- пополнение ---
+
+    def add_game(self, board: chess.Board, result, white="?", black="?", source=None, ref=None):
+        # все позиции партии (от начальной до последней) с ходом, который в них сделали
+        # транзакцию не закрывает: вызывающий решает, когда делать commit()
+        rows = _position_rows(board.root(), board.move_stack)
+        return self._insert_game(rows, result, white, black, source, ref)
+
+    def _insert_game(self, rows, result, white, black, source, ref):
+        cursor = self.conn.execute(
+            "INSERT INTO games (source, ref, white, black, result) VALUES (?, ?, ?, ?, ?)",
+            (source, ref, white, black, result)
+        )
+        game_id = cursor.lastrowid
+        self.conn.executemany("INSERT OR IGNORE INTO positions VALUES (?, ?, ?, ?)",
+                              [(key, game_id, ply, move) for key, ply, move in rows])
+        return game_id
+
+    def add_pgn(self, db, progress=None, workers=1):
+        # импорт базы core.pgn_index.PgnDatabase; уже импортированные партии пропускаются,
+        # так что файл, в конец которого дописали партии, можно импортировать повторно
+        # с workers > 1 разбор партий и ключи считаются в процессах, а в SQLite пишет только этот процесс
+        source = os.path.abspath(db.path)
+        row = self.conn.execute("SELECT games FROM imports WHERE source = ?", (source,)).fetchone()
+        batches = [(start, min(start + COMMIT_EVERY, len(db)))
+                   for start in range(row[0] if row else 0, len(db), COMMIT_EVERY)]
+        added = 0
+        for stop, games in _extract_batches(db, batches, workers):
+            for ref, result, white, black, rows in games:
+                self._insert_game(rows, result, white, black, source, ref)
+            added += len(games)
+            self._mark_imported(source, stop)
+            self.commit()
+            if progress is not None:
+                progress(stop, len(db))
+        return added
+
+    def _mark_imported(self, source, games):
+        self.conn.execute(
+            "INSERT INTO imports (source, games) VALUES (?, ?) ON CONFLICT(source) DO UPDATE SET games = ?",
+            (source, games, games)
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    # --- запросы ---
+
+    def move_stats(self, board: chess.Board):
+        # ходы, сделанные в позиции board, от самого популярного
+        rows = self.conn.execute(
+            "SELECT p.move, COUNT(*), SUM(g.result = '1-0'), SUM(g.result = '1/2-1/2'), SUM(g.result = '0-1') "
+            "FROM positions p JOIN games g ON g.id = p.game "
+            "WHERE p.key = ? AND p.move IS NOT NULL "
+            "GROUP BY p.move ORDER BY COUNT(*) DESC",
+            (_signed(zobrist_hash(board)),)
+        ).fetchall()
+        return [MoveStats(decode_move(move), games, white, draws, black)
+                for move, games, white, draws, black in rows]
+
+    def games_with(self, board: chess.Board, limit=20):
+        # партии, в которых встретилась позиция: (id, полуход, белые, черные, результат, источник, номер в источнике)
+        return self.conn.execute(
+            "SELECT g.id, p.ply, g.white, g.black, g.result, g.source, g.ref "
+            "FROM positions p JOIN games g ON g.id = p.game "
+            "WHERE p.key = ? ORDER BY g.id LIMIT ?",
+            (_signed(zobrist_hash(board)), limit)
+        ).fetchall()
+
+    def count_games(self):
+        return self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def count_positions(self):
+        return self.conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # импорт баз PGN в индекс: python -m core.position_index positions.sqlite база.pgn [база2.pgn ...] [-j 4]
+    parser = argparse.ArgumentParser(description="Импорт партий PGN в индекс позиций")
+    parser.add_argument("index")
+    parser.add_argument("pgn", nargs="+")
+    parser.add_argument("-j", "--workers", type=int, default=1)
+    args = parser.parse_args()
+    with PositionIndex(args.index) as index:
+        for pgn_path in args.pgn:
+            started = time.perf_counter()
+            with PgnDatabase(pgn_path) as db:
+                added = index.add_pgn(db, lambda done, total: print(f"\r{pgn_path}: {done}/{total}",
+                                                                     end="", file=sys.stderr), args.workers)
+            elapsed = time.perf_counter() - started
+            print(f"\r{pgn_path}: добавлено партий {added} за {elapsed:.1f} c", file=sys.stderr)
+        print(f"всего партий: {index.count_games()}, позиций: {index.count_positions()}", file=sys.stderr)
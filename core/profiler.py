@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# встроенный профилировщик горячих мест: таймеры вокруг функций, счётчики,
+# кольцевой буфер последних событий и выгрузка в формате Chrome trace (chrome://tracing, Perfetto)
+#
+# включается до импорта модулей, которые он измеряет: PYCHESS_PROFILE=1 или python main.py --profile
+# выключенный @timed возвращает саму функцию без обёртки, поэтому в обычной игре лишней работы нет вовсе
+ENABLED = os.environ.get("PYCHESS_PROFILE", "") not in ("", "0")
+RING_SIZE = 10000  # сколько последних событий держим для процентилей и трассы
+
+_events = deque(maxlen=RING_SIZE)  # (имя, начало в нс, длительность в нс, номер потока)
+_totals = {}  # имя -> [вызовов, суммарно нс, максимум нс] за всё время, не только за окно буфера
+_counters = {}  # имя -> значение
+_origin = time.perf_counter_ns()
+
+
+def _record(name, start, duration):
+    # deque.append и обновление списка под GIL атомарны достаточно для статистики (поиск идёт в своём потоке)
+    _events.append((name, start, duration, threading.get_ident()))
+    total = _totals.get(name)
+    if total is None:
+        _totals[name] = [1, duration, duration]
+    else:
+        total[0] += 1
+        total[1] += duration
+        if duration > total[2]:
+            total[2] = duration
+
+
+def timed(name):
+    # декоратор: время каждого вызова функции под именем name
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, start, time.perf_counter_ns() - start)
+
+        wrapper.__name__ = func.__name__
+        wrapper.__qualname__ = func.__qualname__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorate
+
+
+def count(name, value=1):
+    # счётчик (например, узлов поиска)
+    if ENABLED:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def reset():
+    _events.clear()
+    _totals.clear()
+    _counters.clear()
+
+
+class TimerStats:
+    def __init__(self, name, calls, total_ms, max_ms, recent):
+        self.name = name
+        self.calls = calls  # вызовов за всё время
+        self.total_ms = total_ms
+        self.max_ms = max_ms
+        recent = sorted(recent)  # длительности (мс) последних вызовов из кольцевого буфера
+        self.p50_ms = recent[len(recent) // 2] if recent else 0.0
+        self.p99_ms = recent[min(len(recent) - 1, int(len(recent) * 0.99))] if recent else 0.0
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+def stats():
+    # сводка по таймерам, самые затратные сверху
+    recent = {}
+    for name, _, duration, _ in list(_events):
+        recent.setdefault(name, []).append(duration / 1e6)
+    result = [TimerStats(name, calls, total / 1e6, peak / 1e6, recent.get(name, []))
+              for name, (calls, total, peak) in list(_totals.items())]
+    result.sort(key=lambda s: s.total_ms, reverse=True)
+    return result
+
+
+def counters():
+    return dict(_counters)
+
+
+def report() -> str:
+    lines = [f"{'таймер':<24}{'вызовов':>8}{'сумма мс':>10}{'сред':>8}{'p50':>8}{'p99':>8}{'макс':>8}"]
+    for s in stats():
+        lines.append(f"{s.name:<24}{s.calls:>8}{s.total_ms:>10.1f}{s.mean_ms:>8.2f}"
+                     f"{s.p50_ms:>8.2f}{s.p99_ms:>8.2f}{s.max_ms:>8.2f}")
+    for name, value in sorted(_counters.items()):
+        lines.append(f"{name:<24}{value:>8}")
+    return "\n".join(lines)
+
+
+def export_chrome_trace(path):
+    # события кольцевого буфера как полные события ("ph": "X"), время в микросекундах от старта программы
+    pid = os.getpid()
+    trace = [{"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+              "ts": (start - _origin) / 1000, "dur": duration / 1000}
+             for name, start, duration, tid in list(_events)]
+    trace += [{"name": name, "ph": "C", "pid": pid, "tid": 0, "ts": (time.perf_counter_ns() - _origin) / 1000,
+               "args": {"value": value}} for name, value in sorted(_counters.items())]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+    return len(trace)
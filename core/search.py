@@ -0,0 +1,395 @@
+import time
+import chess
+from core import profiler
+from core.transposition import TranspositionTable, push_hashed, zobrist_hash, EXACT, LOWER, UPPER
+
+# стоимость фигур в сантипешках
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 320,
+    chess.BISHOP: 330,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 0
+}
+
+MATE_SCORE = 100000  # оценка мата (за вычетом расстояния до мата в полуходах)
+MATE_BOUND = MATE_SCORE - 1000  # всё что выше - это форсированный мат
+KNOWN_WIN = 20000  # выигрыш, доказанный битовой базой (меньше любого найденного мата)
+INF = 1000000
+MAX_PLY = 128
+
+# таблицы "фигура-поле" записаны так, как доска видна белым (первая строка - 8 горизонталь)
+# для белой фигуры на поле sq берем индекс sq ^ 56, для черной - просто sq
+PST = {
+    chess.PAWN: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0
+    ),
+    chess.KNIGHT: (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50
+    ),
+    chess.BISHOP: (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20
+    ),
+    chess.ROOK: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0
+    ),
+    chess.QUEEN: (
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20
+    ),
+    chess.KING: (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20
+    )
+}
+
+
+def evaluate(board: chess.Board) -> int:
+    # статическая оценка позиции: материал + таблицы "фигура-поле"
+    # результат всегда с точки зрения того, чей сейчас ход (так нужно для negamax)
+    score = 0
+    for piece_type, table in PST.items():
+        value = PIECE_VALUES[piece_type]
+        for sq in chess.scan_forward(board.pieces_mask(piece_type, chess.WHITE)):
+            score += value + table[sq ^ 56]
+        for sq in chess.scan_forward(board.pieces_mask(piece_type, chess.BLACK)):
+            score -= value + table[sq]
+    return score if board.turn == chess.WHITE else -score
+
+
+def _mop_up(board):
+    # база говорит только "выигрыш/ничья", поэтому выигрывающей стороне нужна подсказка, как продвигаться:
+    # прижать короля соперника к краю, подвести свой король ближе и продвинуть пешку
+    strong = chess.WHITE if board.occupied_co[chess.WHITE] & ~board.kings else chess.BLACK
+    weak_king = board.king(not strong)
+    strong_king = board.king(strong)
+    center = max(3 - chess.square_file(weak_king), chess.square_file(weak_king) - 4) + \
+        max(3 - chess.square_rank(weak_king), chess.square_rank(weak_king) - 4)
+    score = 20 * center + 10 * (14 - chess.square_manhattan_distance(strong_king, weak_king))
+    for sq in chess.scan_forward(board.pawns):
+        rank = chess.square_rank(sq)
+        score += 20 * (rank if strong == chess.WHITE else 7 - rank)
+    return score
+
+
+def _score_to_tt(score, ply):
+    # маты храним как расстояние от текущей позиции, а не от корня поиска
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class SearchAborted(Exception):
+    # внутреннее исключение: закончился бюджет узлов или времени
+    pass
+
+
+class SearchResult:
+    def __init__(self, move, score, depth, nodes, elapsed, pv):
+        self.move = move  # лучший найденный ход (chess.Move) или None, если ходов нет
+        self.score = score  # оценка в сантипешках с точки зрения стороны, которая ходит
+        self.depth = depth  # последняя полностью просчитанная глубина
+        self.nodes = nodes  # сколько позиций посетили
+        self.elapsed = elapsed  # сколько секунд шёл поиск
+        self.pv = pv  # главный вариант (список ходов)
+
+    @property
+    def nps(self) -> int:  # узлов в секунду
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+    def __repr__(self):
+        move = self.move.uci() if self.move else None
+        return f"SearchResult(move={move}, score={self.score}, depth={self.depth}, nodes={self.nodes}, nps={self.nps})"
+
+
+class Engine:
+    # компьютерный соперник: negamax с альфа-бета отсечением, итеративным углублением,
+    # форсированным поиском взятий и сортировкой ходов (MVV-LVA, killer-ходы, история)
+
+    def __init__(self, max_depth=64, hash_mb=16, tt=None, book=None, bitbases=None):
+        self.max_depth = max_depth
+        self.book = book  # дебютная книга: пока позиция в книге, поиск не запускается
+        self.bitbases = bitbases  # битовые базы эндшпилей (core.bitbase.Bitbases): точный результат без перебора
+        self.tt = tt if tt is not None else TranspositionTable(hash_mb)  # общая для всех поисков этого движка
+        self.nodes = 0
+        self._node_limit = None
+        self._deadline = None
+        self._stop = None
+        self._root_in_bitbase = False
+        self._killers = [[None, None] for _ in range(MAX_PLY)]
+        self._history = {}  # (цвет, откуда, куда) -> вес хода
+        self._pv = [[] for _ in range(MAX_PLY + 1)]
+        self._prev_pv = []  # главный вариант прошлой итерации - его ходы сортируем первыми
+
+    def clear(self):
+        # забыть всё, что движок узнал о прошлой партии
+        self.tt.clear()
+
+    @profiler.timed("engine.search")
+    def search(self, board: chess.Board, depth=None, nodes=None, time_limit=None,
+               stop=None, on_iteration=None, first_depth=1, use_book=True) -> SearchResult:
+        # ищем лучший ход для позиции board в пределах глубины / числа узлов / времени (в секундах)
+        # доска копируется, поэтому board (например, ChessGame.board) не меняется во время поиска
+        # stop - threading.Event для досрочной остановки из другого потока,
+        # on_iteration(result) вызывается после каждой завершённой глубины
+        # first_depth - с какой глубины начинать углубление (помощники в параллельном поиске пропускают первые)
+        start = time.perf_counter()
+        if use_book and self.book is not None:
+            move = self.book.choose(board)
+            if move is not None:
+                return SearchResult(move, 0, 0, 0, time.perf_counter() - start, [move])
+
+        board = board.copy()
+        max_depth = min(depth or self.max_depth, MAX_PLY - 1)
+        self._root_in_bitbase = self.bitbases is not None and self.bitbases.probe(board) is not None
+
+        self.nodes = 0
+        self._node_limit = nodes
+        self._deadline = start + time_limit if time_limit else None
+        self._stop = stop
+        self._killers = [[None, None] for _ in range(MAX_PLY)]
+        self._history = {}
+        self._prev_pv = []
+        self.tt.new_search()
+
+        legal = list(board.legal_moves)
+        result = SearchResult(legal[0] if legal else None, 0, 0, 0, 0.0, [])
+        if len(legal) <= 1:  # думать не о чем
+            result.elapsed = time.perf_counter() - start
+            return result
+
+        root_key = zobrist_hash(board)
+        for d in range(min(first_depth, max_depth), max_depth + 1):
+            try:
+                score = self._negamax(board, d, -INF, INF, 0, root_key, True)
+            except SearchAborted:
+                # недосчитанную итерацию используем, только если она уже нашла ход лучше
+                # (первым всегда считается прошлый лучший ход, так что pv[0] уже не хуже него)
+                if self._pv[0]:
+                    result.move = self._pv[0][0]
+                    result.pv = list(self._pv[0])
+                break
+            result.move = self._pv[0][0]
+            result.pv = list(self._pv[0])
+            self._prev_pv = result.pv
+            result.score = score
+            result.depth = d
+            if on_iteration is not None:
+                result.nodes = self.nodes
+                result.elapsed = time.perf_counter() - start
+                on_iteration(result)
+            if abs(score) >= MATE_BOUND:  # мат найден - глубже искать незачем
+                break
+
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - start
+        profiler.count("engine.nodes", self.nodes)
+        return result
+
+    def _check_limits(self):
+        self.nodes += 1
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise SearchAborted()
+        if self.nodes & 255 == 0:
+            if self._stop is not None and self._stop.is_set():
+                raise SearchAborted()
+            if self._deadline is not None and time.perf_counter() >= self._deadline:
+                raise SearchAborted()
+
+    def _negamax(self, board, depth, alpha, beta, ply, key, on_pv=False):
+        # on_pv - узел лежит на главном варианте прошлой итерации (все ходы до него - из _prev_pv)
+        self._check_limits()
+        self._pv[ply] = []
+
+        if ply > 0:
+            # ничьи по правилам: повторение, 50 ходов, голые короли
+            if board.is_repetition(2) or board.halfmove_clock >= 100 or board.is_insufficient_material():
+                return 0
+            if ply >= MAX_PLY - 1:
+                return self._evaluate(board)
+
+        # позиция уже встречалась (другим порядком ходов) - берём готовую оценку вместо перебора
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_move, tt_score, tt_depth, tt_flag = entry
+            if ply > 0 and tt_depth >= depth:
+                tt_score = _score_from_tt(tt_score, ply)
+                if tt_flag == EXACT:
+                    return tt_score
+                if tt_flag == LOWER and tt_score >= beta:
+                    return tt_score
+                if tt_flag == UPPER and tt_score <= alpha:
+                    return tt_score
+
+        in_check = board.is_check()
+        if in_check:
+            depth += 1  # продлеваем поиск при шахе, чтобы не пропускать маты
+
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, ply)
+
+        # базы спрашиваем до генерации ходов: при попадании ходы не нужны вовсе
+        if ply > 0 and self.bitbases is not None and chess.popcount(board.occupied) == 3:
+            result = self.bitbases.probe(board)
+            if result == 0:
+                return 0
+            # если эндшпиль уже на доске, выигрыш надо довести до мата перебором, иначе - просто засчитать
+            if result is not None and not self._root_in_bitbase:
+                return result * (KNOWN_WIN + _mop_up(board) - ply)
+
+        moves = list(board.legal_moves)
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+
+        # ход прошлого главного варианта первым только на самом этом варианте, в остальных узлах - ход из таблицы
+        prev_pv_move = self._prev_pv[ply] if on_pv and ply < len(self._prev_pv) else None
+        pv_move = prev_pv_move or tt_move
+        moves.sort(key=lambda m: self._move_order_key(board, m, ply, pv_move), reverse=True)
+
+        alpha_orig = alpha
+        best = -INF
+        best_move = None
+        for move in moves:
+            child_key = push_hashed(board, move, key)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1, child_key,
+                                   prev_pv_move is not None and move == prev_pv_move)
+            board.pop()
+
+            if score > best:
+                best = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                self._pv[ply] = [move] + self._pv[ply + 1]
+            if alpha >= beta:
+                if not board.is_capture(move):
+                    self._store_killer(move, ply)
+                    hist_key = (board.turn, move.from_square, move.to_square)
+                    self._history[hist_key] = self._history.get(hist_key, 0) + depth * depth
+                break
+
+        if best >= beta:
+            flag = LOWER
+        elif best > alpha_orig:
+            flag = EXACT
+        else:
+            flag = UPPER
+        self.tt.store(key, depth, _score_to_tt(best, ply), flag, best_move)
+        return best
+
+    def _quiescence(self, board, alpha, beta, ply):
+        # продолжаем считать только взятия, пока позиция не станет "спокойной"
+        self._check_limits()
+        self._pv[ply] = []
+
+        stand_pat = self._evaluate(board)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        if ply >= MAX_PLY - 1:
+            return alpha
+
+        captures = list(board.generate_legal_captures())
+        captures.sort(key=lambda m: self._mvv_lva(board, m), reverse=True)
+
+        for move in captures:
+            board.push(move)
+            score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            board.pop()
+
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _evaluate(self, board):
+        score = evaluate(board)
+        if self._root_in_bitbase and chess.popcount(board.occupied) == 3 and board.occupied & ~board.kings:
+            # в базовом эндшпиле добавляем подсказку для выигрывающей стороны
+            strong = chess.WHITE if board.occupied_co[chess.WHITE] & ~board.kings else chess.BLACK
+            score += _mop_up(board) if board.turn == strong else -_mop_up(board)
+        return score
+
+    @staticmethod
+    def _mvv_lva(board, move):
+        # самая ценная жертва - самым дешёвым нападающим
+        if board.is_en_passant(move):
+            victim = chess.PAWN
+        else:
+            victim = board.piece_type_at(move.to_square)
+        attacker = board.piece_type_at(move.from_square)
+        return PIECE_VALUES.get(victim, 0) * 10 - PIECE_VALUES.get(attacker, 0) // 10
+
+    def _move_order_key(self, board, move, ply, pv_move):
+        if move == pv_move:
+            return 10 ** 9
+        if move.promotion:
+            return 10 ** 8 + PIECE_VALUES[move.promotion]
+        if board.is_capture(move):
+            return 10 ** 7 + self._mvv_lva(board, move)
+        killers = self._killers[ply]
+        if move == killers[0]:
+            return 10 ** 6 + 1
+        if move == killers[1]:
+            return 10 ** 6
+        return self._history.get((board.turn, move.from_square, move.to_square), 0)
+
+    def _store_killer(self, move, ply):
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
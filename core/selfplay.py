@@ -0,0 +1,144 @@
+import random
+import chess
+from core.game_engine import ChessGame
+from core.opening_book import OpeningBook, DEFAULT_MAX_PLY
+from core.search import Engine
+
+MAX_PLIES = 400  # после стольких полуходов партия признаётся ничьей
+
+
+class RandomPlayer:
+    # ходит случайным легальным ходом (для быстрых прогонов и проверки правил)
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def new_game(self):
+        pass
+
+    def reseed(self, seed):
+        self.rng.seed(seed)
+
+    def choose_move(self, game: ChessGame):
+        return self.rng.choice(game.state.legal_moves)
+
+
+class EngineMover:
+    # ходит лучшим ходом движка в пределах заданного бюджета
+    def __init__(self, depth=None, nodes=None, time_limit=None, hash_mb=16, book=None, stop=None):
+        self.engine = Engine(hash_mb=hash_mb, book=book)
+        self.limits = {'depth': depth, 'nodes': nodes, 'time_limit': time_limit}
+        self.stop = stop  # общий флаг (например, multiprocessing.Event): прервать поиск, партия больше не нужна
+        self.nodes = 0  # сколько узлов просчитано за всё время (для статистики)
+
+    def new_game(self):
+        self.engine.tt.clear()
+
+    def reseed(self, seed):
+        # игрок живёт в процессе много партий: выбор книжных ходов должен зависеть от сида партии
+        if self.engine.book is not None:
+            self.engine.book.rng.seed(seed)
+
+    def choose_move(self, game: ChessGame):
+        result = self.engine.search(game.board, stop=self.stop, **self.limits)
+        self.nodes += result.nodes
+        return result.move
+
+
+def make_player(spec, seed=None, stop=None):
+    # "random" или "engine[:depth=3,nodes=20000,time=0.1,hash=16,book=book.bin,book_ply=16]"
+    name, _, options = spec.partition(":")
+    if name == "random":
+        return RandomPlayer(seed)
+    if name == "engine":
+        kwargs = {}
+        book_path = None
+        book_ply = DEFAULT_MAX_PLY
+        for option in filter(None, options.split(",")):
+            key, _, value = option.partition("=")
+            if key == "depth":
+                kwargs['depth'] = int(value)
+            elif key == "nodes":
+                kwargs['nodes'] = int(value)
+            elif key == "time":
+                kwargs['time_limit'] = float(value)
+            elif key == "hash":
+                kwargs['hash_mb'] = int(value)
+            elif key == "book":
+                book_path = value
+            elif key == "book_ply":
+                book_ply = int(value)
+            else:
+                raise ValueError(f"неизвестный параметр движка: {key}")
+        if book_path:
+            # каждый процесс открывает книгу сам, но mmap делит страницы файла между процессами
+            kwargs['book'] = OpeningBook(book_path, max_ply=book_ply, seed=seed)
+        return EngineMover(stop=stop, **kwargs)
+    raise ValueError(f"неизвестный игрок: {spec}")
+
+
+def read_openings(path):
+    # дебюты из файла: FEN или ходы uci через пробел, по одному в строке (# - комментарий)
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def random_opening(rng, plies):
+    # случайные plies полуходов от начальной позиции (ходы uci через пробел, как в файле дебютов)
+    while True:
+        board = chess.Board()
+        for _ in range(plies):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        if not board.is_game_over():
+            return " ".join(move.uci() for move in board.move_stack)
+
+
+def opening_board(opening):
+    # дебют задаётся либо FEN, либо ходами в формате uci через пробел
+    if not opening:
+        return chess.Board()
+    if "/" in opening:
+        return chess.Board(opening)
+    board = chess.Board()
+    for uci in opening.split():
+        board.push_uci(uci)
+    return board
+
+
+def game_result(game: ChessGame):
+    # возвращает (результат "1-0"/"0-1"/"1/2-1/2", причина окончания)
+    board = game.board
+    termination = game.state.termination
+    if termination == chess.Termination.CHECKMATE:
+        return ("0-1" if board.turn == chess.WHITE else "1-0"), "checkmate"
+    if termination is not None:
+        return "1/2-1/2", termination.name.lower()
+    if board.is_repetition(3):
+        return "1/2-1/2", "threefold_repetition"
+    if board.halfmove_clock >= 100:
+        return "1/2-1/2", "fifty_moves"
+    return None, None
+
+
+def play_game(white, black, opening=None, max_plies=MAX_PLIES, stop=None):
+    # играет одну партию без интерфейса, возвращает (ChessGame, результат, причина)
+    # если выставлен флаг stop, партия бросается: результат None, причина "stopped"
+    game = ChessGame()
+    game.board = opening_board(opening)
+    game.invalidate()
+    white.new_game()
+    black.new_game()
+
+    start_ply = game.board.ply()
+    while True:
+        result, reason = game_result(game)
+        if result is None and game.board.ply() - start_ply >= max_plies:
+            result, reason = "1/2-1/2", "max_plies"
+        if result is not None:
+            return game, result, reason
+        if stop is not None and stop.is_set():
+            return game, None, "stopped"
+        player = white if game.board.turn == chess.WHITE else black
+        game.push(player.choose_move(game))
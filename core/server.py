@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from array import array
+import chess
+from core.game_engine import ChessGame
+from core.journal import encode_journal, load_journal, JournalError
+from core.selfplay import game_result
+from core.transposition import encode_move, decode_move
+
+# сервер множества партий в одном процессе: asyncio + текстовый построчный протокол
+#
+# запросы клиента (по одной команде в строке):
+#   new [fen]          -> created <id> <fen>     (создатель сразу подписан на партию)
+#   join <id>          -> state <id> <ply> <fen> (подписка на ходы партии)
+#   leave <id>         -> left <id>
+#   move <id> <uci>    -> всем подписчикам: moved <id> <ply> <uci> <fen>, а при конце партии ещё over <id> <итог> <причина>
+#   state <id>         -> state <id> <ply> <fen>
+#   moves <id>         -> moves <id> <uci> <uci> ...
+#   reset <id>         -> всем подписчикам: state <id> 0 <fen>
+#   close <id>         -> closed <id> (партия удаляется совсем)
+#   stats              -> stats active <n> evicted <n> moves <n>
+# ошибки: error <текст>
+#
+# неактивные партии (без подписчиков и без запросов дольше idle_timeout) выгружаются на диск
+# в формате журнала (core.journal) и поднимаются обратно при первом обращении
+DEFAULT_PORT = 8765
+IDLE_TIMEOUT = 300.0  # секунд без запросов до выгрузки партии на диск
+EVICT_INTERVAL = 5.0  # как часто ищем неактивные партии
+EVICT_BATCH = 1000  # сколько партий выгружаем за один проход (файлы пишутся в пуле потоков)
+STACK_SLACK = 16  # на сколько полуходов стек доски может перерасти нужный, прежде чем его обрежем
+DEFAULT_DIR = os.path.join(
+    os.environ.get("PYCHESS_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "pychess"),
+    "sessions"
+)
+
+
+class Session:
+    # одна партия на сервере; __slots__ - без словаря атрибутов у каждой из тысяч сессий
+    # вся партия - это начальный FEN и ходы по 2 байта, а в ChessGame доска хранит стек только
+    # с последнего взятия или хода пешкой: для проверки повторений позиции больше ничего не нужно
+    __slots__ = ("id", "root_fen", "moves", "game", "over", "subscribers", "last_active")
+
+    def __init__(self, session_id, game):
+        self.id = session_id
+        fen = game.board.root().fen()
+        self.root_fen = chess.STARTING_FEN if fen == chess.STARTING_FEN else fen  # одна строка на все обычные партии
+        self.moves = array("H", (encode_move(m) for m in game.board.move_stack))
+        self.game = game  # ChessGame: проверка ходов через make_move и итог партии
+        self.over = game_result(game)[0] is not None  # партия закончена, ходы больше не принимаются
+        self.subscribers = set()  # StreamWriter подписанных клиентов
+        self.last_active = time.monotonic()
+        self.trim()
+
+    def trim(self):
+        # обрезаем историю доски до последнего необратимого хода (копирование - раз в STACK_SLACK ходов)
+        board = self.game.board
+        keep = board.halfmove_clock
+        if len(board.move_stack) > keep + STACK_SLACK:
+            self.game.board = board.copy(stack=keep)
+        self.game.invalidate()  # кэш легальных ходов не держим между запросами
+
+
+class GameServer:
+    def __init__(self, directory=DEFAULT_DIR, idle_timeout=IDLE_TIMEOUT, evict_interval=EVICT_INTERVAL):
+        self.directory = directory
+        self.idle_timeout = idle_timeout
+        self.evict_interval = evict_interval
+        self.sessions = {}  # id -> Session, только партии в памяти
+        self.evicted = 0  # сколько партий сейчас лежит на диске
+        self.total_moves = 0
+        os.makedirs(directory, exist_ok=True)
+        stored = [int(name[:-4]) for name in os.listdir(directory) if name.endswith(".pcj") and name[:-4].isdigit()]
+        self.evicted = len(stored)
+        self._next_id = max(stored, default=0) + 1
+        self._server = None
+        self._evict_task = None
+
+    # --- хранение ---
+
+    def _path(self, session_id):
+        return os.path.join(self.directory, f"{session_id}.pcj")
+
+    def get(self, session_id):
+        # партия из памяти или с диска (после выгрузки); None - такой партии нет
+        session = self.sessions.get(session_id)
+        if session is None:
+            path = self._path(session_id)
+            if not os.path.exists(path):
+                return None
+            # файл не удаляем: если сервер упадёт до следующей выгрузки, партия не потеряется
+            session = Session(session_id, load_journal(path).replay(ChessGame(keyframes=False)))
+            self.evicted -= 1
+            self.sessions[session_id] = session
+        session.last_active = time.monotonic()
+        return session
+
+    def _write_journals(self, journals):
+        # (id, данные) -> файлы; каждый пишется атомарно, так что на диске всегда целый журнал
+        for session_id, data in journals:
+            path = self._path(session_id)
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    def _idle_sessions(self):
+        # партии без подписчиков, к которым давно не обращались (не больше EVICT_BATCH за раз)
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [s for s in self.sessions.values() if not s.subscribers and s.last_active < deadline]
+        return idle[:EVICT_BATCH]
+
+    @staticmethod
+    def _journal(session):
+        return session.id, encode_journal(session.root_fen, chess.WHITE, session.moves)
+
+    def evict_idle(self):
+        # выгрузка прямо в вызывающем потоке (при остановке сервера, когда цикл событий уже не нужен)
+        idle = self._idle_sessions()
+        self._write_journals([self._journal(session) for session in idle])
+        for session in idle:
+            del self.sessions[session.id]
+            self.evicted += 1
+        return len(idle)
+
+    async def evict_idle_async(self):
+        # файлы пишутся в пуле потоков, чтобы не останавливать цикл событий
+        idle = self._idle_sessions()
+        if not idle:
+            return 0
+        stamps = [(session, session.last_active, len(session.moves)) for session in idle]
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._write_journals, [self._journal(session) for session in idle])
+        evicted = 0
+        for session, last_active, n_moves in stamps:
+            if self.sessions.get(session.id) is not session:
+                # партию закрыли, пока писался файл: журнал ей больше не нужен
+                self._remove_journal(session.id)
+            elif session.subscribers or session.last_active != last_active or len(session.moves) != n_moves:
+                continue  # к партии обратились во время записи - остаётся в памяти
+            else:
+                del self.sessions[session.id]
+                self.evicted += 1
+                evicted += 1
+        return evicted
+
+    def _remove_journal(self, session_id):
+        path = self._path(session_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    async def _evict_loop(self):
+        while True:
+            await asyncio.sleep(self.evict_interval)
+            try:
+                await self.evict_idle_async()
+            except OSError as e:
+                print(f"ошибка выгрузки партий: {e}", file=sys.stderr)
+
+    # --- команды ---
+
+    def handle(self, line, writer):
+        # одна команда клиента; возвращает строку ответа (или None, если ответ уже разослан подписчикам)
+        tokens = line.split()
+        if not tokens:
+            return None
+        command, args = tokens[0], tokens[1:]
+        if command == "new":
+            game = ChessGame(keyframes=False)  # переходов по партии нет, а trim всё равно сбрасывает снимки
+            if args:
+                try:
+                    game.board = chess.Board(" ".join(args))
+                except ValueError:
+                    return "error bad fen"
+                if not game.board.is_valid():
+                    return "error bad fen"  # FEN разобрался, но позиция невозможна (нет короля, шах стороне не на ходу...)
+            session = Session(self._next_id, game)
+            self._next_id += 1
+            self.sessions[session.id] = session
+            session.subscribers.add(writer)
+            return f"created {session.id} {game.board.fen()}"
+        if command == "stats":
+            return f"stats active {len(self.sessions)} evicted {self.evicted} moves {self.total_moves}"
+
+        if not args or not args[0].isdigit():
+            return f"error {command}: session id expected"
+        session_id = int(args[0])
+        try:
+            session = self.get(session_id)
+        except (OSError, JournalError) as e:
+            return f"error session {session_id}: {e}"
+        if session is None:
+            return f"error no session {session_id}"
+
+        if command == "move":
+            return self._move(session, args[1] if len(args) > 1 else "", writer)
+        if command == "join":
+            session.subscribers.add(writer)
+            return self._state_line(session)
+        if command == "leave":
+            session.subscribers.discard(writer)
+            return f"left {session_id}"
+        if command == "state":
+            return self._state_line(session)
+        if command == "moves":
+            return " ".join(["moves", str(session_id)] + [decode_move(code).uci() for code in session.moves])
+        if command == "reset":
+            session.game = ChessGame(keyframes=False)
+            session.root_fen = chess.STARTING_FEN
+            session.moves = array("H")
+            session.over = False
+            self.broadcast(session, self._state_line(session))
+            return None if writer in session.subscribers else self._state_line(session)
+        if command == "close":
+            del self.sessions[session_id]
+            try:
+                self._remove_journal(session_id)
+            except OSError as e:
+                return f"error session {session_id}: {e}"
+            return f"closed {session_id}"
+        return f"error unknown command {command}"
+
+    def _state_line(self, session):
+        return f"state {session.id} {len(session.moves)} {session.game.board.fen()}"
+
+    def _move(self, session, uci, writer):
+        game = session.game
+        if session.over:
+            return f"error session {session.id}: game over"
+        if not game.make_move(uci):
+            return f"error session {session.id}: illegal move {uci}"
+        move = game.board.peek()  # make_move мог дописать превращение в ферзя
+        session.moves.append(encode_move(move))
+        self.total_moves += 1
+        lines = [f"moved {session.id} {len(session.moves)} {move.uci()} {game.board.fen()}"]
+        result, reason = game_result(game)
+        if result is not None:
+            session.over = True
+            lines.append(f"over {session.id} {result} {reason}")
+        session.trim()
+        for line in lines:
+            self.broadcast(session, line)
+        # тот, кто сходил, но не подписан на партию, получает ответ напрямую
+        return None if writer in session.subscribers else "\n".join(lines)
+
+    def broadcast(self, session, line):
+        # ответы не ждут drain: медленный подписчик не задерживает остальных
+        data = (line + "\n").encode()
+        for writer in list(session.subscribers):
+            if writer.is_closing():
+                session.subscribers.discard(writer)
+            else:
+                writer.write(data)
+
+    # --- сеть ---
+
+    async def _client(self, reader, writer):
+        joined = set()  # партии, на которые подписан этот клиент
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode(errors="replace").strip()
+                if line == "quit":
+                    break
+                reply = self.handle(line, writer)
+                # подписки запоминаем по успешному ответу, а не по номеру в запросе
+                command = line.split(maxsplit=1)[0] if line else ""
+                if reply and (command == "new" and reply.startswith("created ")
+                              or command == "join" and reply.startswith("state ")):
+                    joined.add(int(reply.split()[1]))
+                elif reply and (command == "leave" and reply.startswith("left ")
+                                or command == "close" and reply.startswith("closed ")):
+                    joined.discard(int(reply.split()[1]))
+                if reply is not None:
+                    writer.write((reply + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for session_id in joined:
+                session = self.sessions.get(session_id)
+                if session is not None:
+                    session.subscribers.discard(writer)
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self._server = await asyncio.start_server(self._client, host, port)
+        self._evict_task = asyncio.create_task(self._evict_loop())
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        # при остановке все партии из памяти уходят на диск, их можно продолжить после перезапуска
+        if self._evict_task is not None:
+            self._evict_task.cancel()
+        if self._server is not None:
+            self._server.close()
+        self.idle_timeout = -1.0
+        for session in self.sessions.values():
+            session.subscribers.clear()
+        while self.evict_idle():
+            pass
+
+
+async def _main(args):
+    server = GameServer(args.directory, args.idle, args.evict_interval)
+    host, port = await server.start(args.host, args.port)
+    print(f"listening {host} {port}", flush=True)  # нагрузочный тест узнаёт порт из этой строки
+    try:
+        await server.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервер партий с построчным протоколом")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 - выбрать свободный порт")
+    parser.add_argument("--directory", default=DEFAULT_DIR, help="куда выгружать неактивные партии")
+    parser.add_argument("--idle", type=float, default=IDLE_TIMEOUT, help="секунд до выгрузки неактивной партии")
+    parser.add_argument("--evict-interval", type=float, default=EVICT_INTERVAL)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        print("сервер остановлен", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
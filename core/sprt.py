@@ -0,0 +1,114 @@
+import math
+
+# статистика матча двух движков, сыгранного парами партий (один дебют, цвета меняются):
+# оценка разницы в силе (Эло), вероятность превосходства (LOS) и последовательный тест отношения
+# правдоподобий (SPRT), который останавливает матч, как только одна из гипотез подтверждена
+#
+# пара даёт одно из пяти значений очков первого движка: 0, 1/2, 1, 3/2, 2 (пентаномиальная модель);
+# дисперсия считается по парам, а не по партиям - так учитывается, что партии одной пары зависимы
+# (неравный дебют чаще даёт 1:1, чем 2:0)
+PAIR_SCORES = (0.0, 0.25, 0.5, 0.75, 1.0)  # очки пары, делённые на 2
+# априорные полпары в каждом из пяти исходов: без них матч, где все пары кончились одинаково
+# (например, разгром 2:0 в каждой паре), имеет нулевую дисперсию и никогда не остановился бы;
+# разгромный матч с ними решается примерно за 18 пар, а на обычный почти не влияет
+PRIOR_PAIRS = 0.5
+
+
+def expected_score(elo) -> float:
+    # доля очков при разнице в силе elo (логистическая модель)
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def elo_from_score(score) -> float:
+    score = min(max(score, 1e-6), 1.0 - 1e-6)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def los(wins, losses) -> float:
+    # вероятность того, что первый движок сильнее (ничьи на неё не влияют)
+    if wins + losses == 0:
+        return 0.5
+    return 0.5 * (1.0 + math.erf((wins - losses) / math.sqrt(2.0 * (wins + losses))))
+
+
+class Sprt:
+    # H0: разница elo0, H1: разница elo1; alpha и beta - допустимые вероятности ошибок первого и второго рода
+    # LLR считается в нормальном приближении обобщённого SPRT (как в fishtest):
+    #   LLR = N (s1 - s0) (2 m - s0 - s1) / (2 v),
+    # где N - число пар, m и v - среднее и дисперсия очков пары, s0 и s1 - ожидаемые очки при elo0 и elo1
+
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower = math.log(beta / (1.0 - alpha))  # ниже - принимаем H0
+        self.upper = math.log((1.0 - beta) / alpha)  # выше - принимаем H1
+        self.pairs = [0] * len(PAIR_SCORES)  # сколько пар закончились с каждым счётом
+        self.wins = self.draws = self.losses = 0  # по партиям, с точки зрения первого движка
+
+    def add_pair(self, first, second):
+        # очки первого движка в двух партиях пары (1, 0.5 или 0)
+        for score in (first, second):
+            if score == 1:
+                self.wins += 1
+            elif score == 0:
+                self.losses += 1
+            else:
+                self.draws += 1
+        self.pairs[round((first + second) * 2)] += 1
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def _moments(self):
+        # число пар, среднее и дисперсия очков пары по счётчикам с априорными PRIOR_PAIRS
+        if not any(self.pairs):
+            return 0, 0.5, 0.0
+        counts = [count + PRIOR_PAIRS for count in self.pairs]
+        n = sum(counts)
+        mean = sum(count * score for count, score in zip(counts, PAIR_SCORES)) / n
+        variance = sum(count * (score - mean) ** 2 for count, score in zip(counts, PAIR_SCORES)) / n
+        return n, mean, variance
+
+    def llr(self) -> float:
+        n, mean, variance = self._moments()
+        if n == 0:
+            return 0.0
+        s0 = expected_score(self.elo0)
+        s1 = expected_score(self.elo1)
+        return n * (s1 - s0) * (2.0 * mean - s0 - s1) / (2.0 * variance)
+
+    def decision(self):
+        # "H0", "H1" или None, пока матч надо продолжать
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+    def elo(self):
+        # (оценка разницы в Эло, половина 95% доверительного интервала)
+        n, mean, variance = self._moments()
+        if n == 0:
+            return 0.0, 0.0
+        margin = 1.96 * math.sqrt(variance / n)
+        low = elo_from_score(mean - margin)
+        high = elo_from_score(mean + margin)
+        return elo_from_score(mean), (high - low) / 2.0
+
+    def report(self) -> dict:
+        elo, margin = self.elo()
+        return {
+            "games": self.games,
+            "wins": self.wins, "draws": self.draws, "losses": self.losses,
+            "pentanomial": list(self.pairs),
+            "elo": round(elo, 2), "elo_95": round(margin, 2),
+            "los": round(los(self.wins, self.losses), 4),
+            "llr": round(self.llr(), 4),
+            "bounds": [round(self.lower, 4), round(self.upper, 4)],
+            "elo0": self.elo0, "elo1": self.elo1, "alpha": self.alpha, "beta": self.beta,
+            "decision": self.decision()
+        }
@@ -0,0 +1,321 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import chess
+import numpy as np
+from core.game_engine import ChessGame
+from core.pgn_index import PgnDatabase, PgnError
+from core.transposition import encode_move
+from core.vector_eval import PLANES, piece_masks
+
+# обучающие данные из партий: на каждый полуход - позиция (12 битовых плоскостей, как в core.vector_eval),
+# чей ход, сделанный ход (16 бит, как в таблице перестановок) и итог партии с точки зрения белых
+#
+# источники: базы PGN (core.pgn_index) и партии самоигры в формате jsonl (python selfplay.py)
+# работа делится на задания - пачки партий одного источника; задание пишет свои шарды .npy
+# по SHARD_SIZE записей прямо в отображённый в память файл и после этого дописывается строкой в manifest.jsonl
+# при повторном запуске выполненные задания пропускаются, а шарды недоделанных удаляются и пишутся заново
+#
+# в памяти в каждый момент - одна партия и один шард на процесс, сколько бы партий ни было в корпусе
+RECORD = np.dtype([
+    ("planes", "<u8", (PLANES,)),  # маски фигур: белые пешка..король, затем чёрные
+    ("turn", "u1"),  # 1 - ход белых
+    ("move", "<u2"),  # core.transposition.encode_move
+    ("result", "i1"),  # 1 - победа белых, 0 - ничья, -1 - победа чёрных
+])
+SHARD_SIZE = 1 << 16  # записей в шарде (6.5 МБ)
+JOB_GAMES = 1000  # партий PGN в одном задании
+JOB_BYTES = 4 << 20  # байт jsonl в одном задании
+# имена шардов ShardWriter (префикс _job_prefix), в том числе временных копий, оставшихся от сбоя в _close
+SHARD_NAME = re.compile(r"([0-9a-f]{8})-\d{12}-\d{4}\.npy(?:\.tmp\.npy)?")
+MANIFEST = "manifest.jsonl"
+BUFFER = 4096  # записей копим в списках и переносим в шард одним присваиванием среза
+RESULTS = {"1-0": 1, "0-1": -1, "1/2-1/2": 0}  # партии с другим итогом ("*") пропускаются
+
+
+class ShardWriter:
+    # записи одного задания в шарды <prefix>-<номер>.npy; последний шард обрезается до фактического размера
+    def __init__(self, directory, prefix, shard_size=SHARD_SIZE):
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.shards = []  # [(имя файла, записей)]
+        self._array = None
+        self._count = 0
+        self._buffer = []
+
+    def _open(self):
+        name = f"{self.prefix}-{len(self.shards):04d}.npy"
+        self._array = np.lib.format.open_memmap(os.path.join(self.directory, name), mode="w+",
+                                                dtype=RECORD, shape=(self.shard_size,))
+        self._count = 0
+        self.shards.append([name, 0])
+
+    def write(self, masks, turn, move, result):
+        self._buffer.append((masks, turn, move, result))
+        if len(self._buffer) >= BUFFER:
+            self._flush_buffer()
+
+    def _flush_buffer(self):
+        rows = self._buffer
+        while rows:
+            if self._array is None:
+                self._open()
+            take = rows[:self.shard_size - self._count]
+            rows = rows[len(take):]
+            self._array[self._count:self._count + len(take)] = np.array(take, dtype=RECORD)
+            self._count += len(take)
+            self.shards[-1][1] = self._count
+            if self._count == self.shard_size:
+                self._close()
+        self._buffer = []
+
+    def _close(self):
+        array, count = self._array, self._count
+        self._array = None
+        array.flush()
+        if count < self.shard_size:
+            # неполный шард переписываем в файл точного размера
+            path = os.path.join(self.directory, self.shards[-1][0])
+            tmp = f"{path}.tmp.npy"
+            np.save(tmp, array[:count])
+            del array
+            os.replace(tmp, path)
+
+    def close(self):
+        self._flush_buffer()
+        if self._array is not None:
+            self._close()
+        return [tuple(shard) for shard in self.shards]
+
+
+# --- партии ---
+
+def _pgn_games(path, start, stop):
+    # (начальная доска, ходы, итог) партий [start, stop) базы PGN
+    with PgnDatabase(path) as db:
+        for i in range(start, stop):
+            try:
+                headers, root, moves = db.read_mainline(i)
+            except PgnError:
+                yield None
+                continue
+            yield root, moves, headers.get("Result", "*")
+
+
+def _jsonl_games(path, start, stop):
+    # партии самоигры, строки которых начинаются в байтах [start, stop)
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()  # дочитываем строку, начатую в предыдущем задании
+        while f.tell() < stop:
+            line = f.readline()
+            if not line:
+                break
+            try:
+                record = json.loads(line)
+                board = chess.Board(record.get("start_fen", chess.STARTING_FEN))
+                moves = [chess.Move.from_uci(uci) for uci in record["moves"]]
+            except (ValueError, KeyError):
+                yield None
+                continue
+            yield board, moves, record.get("result", "*")
+
+
+def samples(games):
+    # генератор записей (маски фигур, чей ход, ход, итог): каждая партия проигрывается через ChessGame
+    # (с проверкой легальности); битые партии и партии без итога пропускаются
+    game = ChessGame(keyframes=False)  # переходов по партии не будет, снимки доски не нужны
+    for item in games:
+        if item is None:
+            continue
+        board, moves, result = item
+        if result not in RESULTS:
+            continue
+        outcome = RESULTS[result]
+        game.board = board
+        game.invalidate()
+        plies = []
+        for move in moves:
+            if not game.board.is_legal(move):  # дешевле, чем game.state: тот считает ещё все ходы и итог партии
+                plies = None
+                break
+            plies.append((piece_masks(game.board), game.board.turn, encode_move(move)))
+            game.push(move)
+        if plies is None:
+            continue
+        for masks, turn, move in plies:
+            yield masks, turn, move, outcome
+
+
+# --- задания ---
+
+def _source_kind(path):
+    return "jsonl" if path.endswith((".jsonl", ".json")) else "pgn"
+
+
+def _source_digest(source):
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:8]
+
+
+def _job_prefix(source, start):
+    return f"{_source_digest(source)}-{start:012d}"
+
+
+def _gaps(total, covered):
+    # части [0, total), не покрытые отрезками covered (выполненными заданиями)
+    pos = 0
+    for start, stop in sorted(covered):
+        if start > pos:
+            yield pos, min(start, total)
+        pos = max(pos, stop)
+        if pos >= total:
+            return
+    if pos < total:
+        yield pos, total
+
+
+def jobs(sources, job_games=JOB_GAMES, job_bytes=JOB_BYTES, finished=()):
+    # (источник, начало, конец) - номера партий для PGN, смещения в байтах для jsonl
+    # задания определяются отрезками, а не номерами: при продолжении делим на задания только то,
+    # что не покрыто выполненными (finished - пары (источник, (начало, конец))), даже если размер задания другой
+    covered = {}
+    for source, span in finished:
+        covered.setdefault(source, []).append(span)
+    for path in sources:
+        source = os.path.abspath(path)
+        if _source_kind(source) == "pgn":
+            with PgnDatabase(source) as db:  # строит индекс, если его ещё нет
+                total = len(db)
+            step = job_games
+        else:
+            total = os.path.getsize(source)
+            step = job_bytes
+        for gap_start, gap_stop in _gaps(total, covered.get(source, ())):
+            for start in range(gap_start, gap_stop, step):
+                yield source, start, min(start + step, gap_stop)
+
+
+def run_job(directory, source, start, stop, shard_size=SHARD_SIZE):
+    # одно задание целиком (в процессе пула); возвращает строку для манифеста
+    games = _pgn_games(source, start, stop) if _source_kind(source) == "pgn" else _jsonl_games(source, start, stop)
+    writer = ShardWriter(directory, _job_prefix(source, start), shard_size)
+    positions = 0
+    for masks, turn, move, result in samples(games):
+        writer.write(masks, turn, move, result)
+        positions += 1
+    return {
+        "source": source, "start": start, "stop": stop, "positions": positions,
+        "shards": writer.close(),
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # пик памяти процесса
+    }
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break  # строку оборвал сбой - задание считается невыполненным
+    return entries
+
+
+def _remove_unfinished(directory, done, sources):
+    # шарды заданий, которых нет в манифесте, остались от прерванного запуска;
+    # трогаем только файлы с именами наших шардов для этих источников - остальное в папке не наше
+    finished = {name for entry in done for name, _ in entry["shards"]}
+    digests = {_source_digest(os.path.abspath(path)) for path in sources}
+    for name in os.listdir(directory):
+        match = SHARD_NAME.fullmatch(name)
+        if match and match.group(1) in digests and name not in finished:
+            os.remove(os.path.join(directory, name))
+
+
+def _run_jobs(directory, todo, workers, shard_size):
+    # результаты заданий по мере готовности; в полёте не больше двух заданий на процесс
+    if workers <= 1:
+        for source, start, stop in todo:
+            yield run_job(directory, source, start, stop, shard_size)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for source, start, stop in todo:
+            pending.append(pool.submit(run_job, directory, source, start, stop, shard_size))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def extract(directory, sources, workers=1, shard_size=SHARD_SIZE, job_games=JOB_GAMES, progress=None):
+    # извлечение (или продолжение после прерывания); возвращает (позиций записано в этот раз, секунд)
+    os.makedirs(directory, exist_ok=True)
+    done = read_manifest(directory)
+    finished = [(entry["source"], (entry["start"], entry["stop"])) for entry in done]
+    _remove_unfinished(directory, done, sources)
+
+    # перезаписываем манифест без оборванной строки, дальше только дописываем
+    manifest_path = os.path.join(directory, MANIFEST)
+    with open(manifest_path, "w") as f:
+        for entry in done:
+            f.write(json.dumps(entry) + "\n")
+
+    todo = jobs(sources, job_games, finished=finished)
+    positions = 0
+    start = time.perf_counter()
+    with open(manifest_path, "a") as manifest:
+        for entry in _run_jobs(directory, todo, workers, shard_size):
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            os.fsync(manifest.fileno())  # задание считается выполненным только после записи на диск
+            positions += entry["positions"]
+            if progress is not None:
+                progress(entry, positions, time.perf_counter() - start)
+    return positions, time.perf_counter() - start
+
+
+def load_shards(directory):
+    # шарды из манифеста по порядку, отображёнными в память (только чтение)
+    for entry in read_manifest(directory):
+        for name, _ in entry["shards"]:
+            yield np.load(os.path.join(directory, name), mmap_mode="r")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обучающие данные из партий в шарды .npy")
+    parser.add_argument("output", help="папка для шардов и manifest.jsonl (при повторном запуске работа продолжается)")
+    parser.add_argument("sources", nargs="+", help="базы PGN или партии самоигры .jsonl")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="записей в шарде")
+    parser.add_argument("--job-games", type=int, default=JOB_GAMES, help="партий PGN в одном задании")
+    args = parser.parse_args(argv)
+
+    peak = [0.0]
+
+    def progress(entry, positions, elapsed):
+        peak[0] = max(peak[0], entry["rss_mb"])
+        print(f"\r{positions} позиций, {positions / elapsed:.0f} поз/с, "
+              f"пик памяти процесса {peak[0]:.0f} МБ", end="", file=sys.stderr, flush=True)
+
+    positions, elapsed = extract(args.output, args.sources, args.workers, args.shard_size, args.job_games, progress)
+    main_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(file=sys.stderr)
+    print(f"записано позиций: {positions} за {elapsed:.1f} с ({positions / max(elapsed, 1e-9):.0f} поз/с), "
+          f"пик памяти: главный процесс {main_rss:.0f} МБ, рабочие процессы {peak[0]:.0f} МБ", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+from array import array
+import chess
+import chess.polyglot
+
+# ключи совместимы с chess.polyglot.zobrist_hash (те же случайные числа и та же схема),
+# поэтому одним ключом можно пользоваться и в таблице, и в дебютных книгах polyglot
+RANDOM = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+TURN_KEY = RANDOM[780]
+_CASTLING_KEYS = ((chess.BB_H1, RANDOM[768]), (chess.BB_A1, RANDOM[769]),
+                  (chess.BB_H8, RANDOM[770]), (chess.BB_A8, RANDOM[771]))
+_castling_cache = {}  # clean_castling_rights -> часть ключа за права рокировки (только классические шахматы)
+
+# типы записей (какую границу оценки хранит запись)
+EXACT = 0
+LOWER = 1  # оценка >= score (было отсечение по beta)
+UPPER = 2  # оценка <= score (ни один ход не поднял alpha)
+
+ENTRY_BYTES = 16  # ключ + упакованные данные, по 8 байт
+BUCKET_SIZE = 2  # слот 0 - "глубина важнее", слот 1 - "заменять всегда"
+
+_MASK64 = (1 << 64) - 1
+_SCORE_OFFSET = 1 << 31
+
+
+def zobrist_hash(board: chess.Board) -> int:
+    return chess.polyglot.zobrist_hash(board)
+
+
+def _piece_key(piece_type, color, square):
+    return RANDOM[64 * ((piece_type - 1) * 2 + color) + square]
+
+
+def _castling_ep_key(board):
+    # часть ключа, которую проще пересчитать целиком: права рокировки и поле взятия на проходе;
+    # права берём "очищенные", как polyglot: без ладей и королей, стоящих не на своих местах
+    rights = board.clean_castling_rights()
+    if board.chess960:
+        # в шахматах 960 ладьи стоят где угодно: сторона рокировки зависит от положения короля
+        key = 0
+        if rights:
+            for i, (color, kingside) in enumerate(((chess.WHITE, True), (chess.WHITE, False),
+                                                   (chess.BLACK, True), (chess.BLACK, False))):
+                has_rights = (board.has_kingside_castling_rights(color) if kingside
+                              else board.has_queenside_castling_rights(color))
+                if has_rights:
+                    key ^= RANDOM[768 + i]
+    else:
+        key = _castling_cache.get(rights)
+        if key is None:
+            key = 0
+            for mask, value in _CASTLING_KEYS:
+                if rights & mask:
+                    key ^= value
+            _castling_cache[rights] = key
+
+    ep = board.ep_square
+    if ep is not None:
+        # как в polyglot: учитываем вертикаль, только если рядом стоит пешка, которая может взять
+        if board.turn == chess.WHITE:
+            ep_mask = chess.shift_down(chess.BB_SQUARES[ep])
+        else:
+            ep_mask = chess.shift_up(chess.BB_SQUARES[ep])
+        ep_mask = chess.shift_left(ep_mask) | chess.shift_right(ep_mask)
+        if ep_mask & board.pawns & board.occupied_co[board.turn]:
+            key ^= RANDOM[772 + chess.square_file(ep)]
+    return key
+
+
+def push_hashed(board: chess.Board, move: chess.Move, key: int) -> int:
+    # делаем ход и обновляем ключ позиции по разнице, а не считаем его заново по всей доске
+    key ^= _castling_ep_key(board) ^ TURN_KEY
+    color = board.turn
+    from_sq, to_sq = move.from_square, move.to_square
+    piece_type = board.piece_type_at(from_sq)
+
+    if piece_type == chess.KING and board.is_castling(move):
+        # рокировка: король и ладья переходят на стандартные поля (g/c и f/d)
+        rank = chess.square_rank(from_sq)
+        if chess.square_file(to_sq) > chess.square_file(from_sq):
+            rook_from, rook_to, king_to = chess.square(7, rank), chess.square(5, rank), chess.square(6, rank)
+        else:
+            rook_from, rook_to, king_to = chess.square(0, rank), chess.square(3, rank), chess.square(2, rank)
+        if board.occupied_co[color] & chess.BB_SQUARES[to_sq]:
+            rook_from = to_sq  # ход записан как "король берёт свою ладью" (так всегда в шахматах 960)
+        key ^= _piece_key(chess.KING, color, from_sq) ^ _piece_key(chess.KING, color, king_to)
+        key ^= _piece_key(chess.ROOK, color, rook_from) ^ _piece_key(chess.ROOK, color, rook_to)
+    else:
+        captured = board.piece_type_at(to_sq)
+        if captured:
+            key ^= _piece_key(captured, not color, to_sq)
+        elif piece_type == chess.PAWN and to_sq == board.ep_square:
+            victim = to_sq - 8 if color == chess.WHITE else to_sq + 8
+            key ^= _piece_key(chess.PAWN, not color, victim)
+        key ^= _piece_key(piece_type, color, from_sq)
+        key ^= _piece_key(move.promotion or piece_type, color, to_sq)
+
+    board.push(move)
+    return key ^ _castling_ep_key(board)
+
+
+def encode_move(move) -> int:
+    # ход в 16 бит: откуда (6) | куда (6) | фигура превращения (3); 0 - хода нет
+    if move is None:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code: int):
+    if not code:
+        return None
+    return chess.Move(code & 63, (code >> 6) & 63, (code >> 12) & 7 or None)
+
+
+class TranspositionTable:
+    # таблица перестановок фиксированного размера: память выделяется один раз при создании
+    # и дальше не растёт, сколько бы позиций ни было просмотрено
+
+    def __init__(self, size_mb=16, buffer=None):
+        if buffer is None:
+            n_buckets = max(1, (size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+            self._slots = array('Q', bytes(n_buckets * BUCKET_SIZE * ENTRY_BYTES))
+        else:
+            # внешний буфер (например, разделяемая память для нескольких процессов)
+            self._slots = memoryview(buffer).cast('B').cast('Q')
+            n_buckets = len(self._slots) // (BUCKET_SIZE * 2)
+        self.n_buckets = n_buckets
+        self.generation = 0
+
+        self.probes = 0  # сколько раз искали позицию
+        self.hits = 0  # сколько раз нашли
+        self.stores = 0  # сколько раз записывали
+        self.collisions = 0  # сколько раз затёрли запись другой позиции
+
+    @property
+    def size_bytes(self) -> int:
+        return self.n_buckets * BUCKET_SIZE * ENTRY_BYTES
+
+    @staticmethod
+    def buffer_size(size_mb) -> int:
+        # сколько байт нужно под таблицу заданного размера (для разделяемой памяти)
+        n_buckets = max(1, (size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+        return n_buckets * BUCKET_SIZE * ENTRY_BYTES
+
+    def clear(self):
+        memoryview(self._slots).cast('B')[:] = bytes(len(self._slots) * 8)
+        self.generation = 0
+        self.probes = self.hits = self.stores = self.collisions = 0
+
+    def new_search(self):
+        # записи прошлых поисков считаются устаревшими и вытесняются первыми
+        self.generation = (self.generation + 1) & 63
+
+    def probe(self, key: int):
+        # возвращает (ход, оценка, глубина, тип записи) или None
+        self.probes += 1
+        slots = self._slots
+        base = (key % self.n_buckets) * (BUCKET_SIZE * 2)
+        for i in range(base, base + BUCKET_SIZE * 2, 2):
+            data = slots[i + 1]
+            # ключ хранится как key ^ data: если запись порвалась при параллельной записи,
+            # то проверка просто не пройдёт
+            if data and slots[i] ^ data == key:
+                self.hits += 1
+                return (decode_move(data >> 48), (data & 0xFFFFFFFF) - _SCORE_OFFSET,
+                        (data >> 32) & 0xFF, (data >> 40) & 3)
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move):
+        self.stores += 1
+        slots = self._slots
+        base = (key % self.n_buckets) * (BUCKET_SIZE * 2)
+        data = ((score + _SCORE_OFFSET) & 0xFFFFFFFF) | (min(depth, 255) << 32) | (flag << 40) | \
+               (self.generation << 42) | (encode_move(move) << 48)
+
+        # слот 0 заменяем, если это та же позиция, запись не глубже новой или устарела
+        old = slots[base + 1]
+        old_key = slots[base] ^ old
+        if not old or old_key == key or (old >> 32) & 0xFF <= depth or (old >> 42) & 63 != self.generation:
+            if old_key == key and not move:
+                data |= old & (0xFFFF << 48)  # не теряем лучший ход, если новый не известен
+            elif old and old_key != key:
+                self.collisions += 1
+            slots[base] = (key ^ data) & _MASK64
+            slots[base + 1] = data
+            return
+
+        # иначе пишем в слот 1 безусловно
+        old = slots[base + 3]
+        if old and slots[base + 2] ^ old != key:
+            self.collisions += 1
+        slots[base + 2] = (key ^ data) & _MASK64
+        slots[base + 3] = data
+
+    def hashfull(self) -> int:
+        # заполненность в промилле по первой тысяче корзин (как в UCI)
+        slots = self._slots
+        count = min(1000, self.n_buckets)
+        used = sum(1 for i in range(count * BUCKET_SIZE) if slots[i * 2 + 1] and (slots[i * 2 + 1] >> 42) & 63 == self.generation)
+        return used * 1000 // (count * BUCKET_SIZE)
+
+    def stats(self) -> dict:
+        return {
+            'size_mb': self.size_bytes / (1024 * 1024),
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'stores': self.stores,
+            'collisions': self.collisions,
+            'hashfull': self.hashfull()
+        }
@@ -0,0 +1,249 @@
+import sys
+import threading
+import chess
+from core.game_engine import ChessGame
+from core.parallel import ParallelEngine
+from core.search import Engine, MATE_SCORE, MATE_BOUND
+
+# движок по протоколу UCI: команды читаются из stdin в главном потоке, поиск идёт в отдельном,
+# поэтому stop, isready и quit обрабатываются сразу, даже посреди поиска
+ENGINE_NAME = "PyChess"
+ENGINE_AUTHOR = "PyChess"
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+MAX_THREADS = 64
+MOVE_OVERHEAD = 0.05  # запас на задержки ввода-вывода (секунд), чтобы не просрочить время на часах
+DEFAULT_MOVES_TO_GO = 30  # на сколько ходов делим оставшееся время, если movestogo не задан
+
+
+def allocate_time(time_left, increment=0.0, moves_to_go=None):
+    # сколько секунд думать над ходом при игре на часах
+    moves = moves_to_go or DEFAULT_MOVES_TO_GO
+    budget = time_left / moves + increment * 0.8
+    budget = min(budget, time_left / 2)  # никогда не тратим больше половины оставшегося времени
+    return max(0.01, budget - MOVE_OVERHEAD)
+
+
+def format_score(score):
+    # оценка в терминах UCI: "cp 35" или "mate 3" (в ходах, а не полуходах)
+    if score >= MATE_BOUND:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"mate {-((MATE_SCORE + score + 1) // 2)}"
+    return f"cp {score}"
+
+
+class UciEngine:
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.game = ChessGame()
+        self.hash_mb = DEFAULT_HASH_MB
+        self.threads = 1
+        self.engine = None  # создаётся лениво: setoption обычно приходит до первого go
+        self._output_lock = threading.Lock()
+        self._thread = None
+        self._stop = None  # threading.Event текущего поиска
+        self._release = None  # для go infinite: bestmove выводится только после stop
+
+    def send(self, line):
+        with self._output_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    # --- команды ---
+
+    def handle(self, line) -> bool:
+        # обработка одной строки; False - пора завершаться
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}")
+            self.send(f"option name Threads type spin default 1 min 1 max {MAX_THREADS}")
+            self.send("option name Clear Hash type button")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")  # отвечаем сразу, не дожидаясь конца поиска
+        elif command == "setoption":
+            self.set_option(args)
+        elif command == "ucinewgame":
+            self.stop()
+            if self.engine is not None:
+                self.engine.clear()
+        elif command == "position":
+            self.stop()
+            self.set_position(args)
+        elif command == "go":
+            self.go(args)
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            self.close()
+            return False
+        return True
+
+    def set_option(self, args):
+        # setoption name <имя из нескольких слов> [value <значение>]
+        if "name" not in args:
+            return
+        rest = args[args.index("name") + 1:]
+        if "value" in rest:
+            name = " ".join(rest[:rest.index("value")]).lower()
+            value = " ".join(rest[rest.index("value") + 1:])
+        else:
+            name, value = " ".join(rest).lower(), None
+        self.stop()
+        try:
+            if name == "hash":
+                self.hash_mb = max(1, min(MAX_HASH_MB, int(value)))
+                self._reset_engine()
+            elif name == "threads":
+                self.threads = max(1, min(MAX_THREADS, int(value)))
+                self._reset_engine()
+            elif name == "clear hash":
+                self._reset_engine()
+            else:
+                self.send(f"info string unknown option {name}")
+        except (TypeError, ValueError):
+            self.send(f"info string bad value for {name}: {value}")
+
+    def _reset_engine(self):
+        # размер таблицы или число потоков поменялись - движок пересоздаётся при следующем go
+        if isinstance(self.engine, ParallelEngine):
+            self.engine.close()
+        self.engine = None
+
+    def _get_engine(self):
+        if self.engine is None:
+            if self.threads > 1:
+                self.engine = ParallelEngine(workers=self.threads, hash_mb=self.hash_mb)
+            else:
+                self.engine = Engine(hash_mb=self.hash_mb)
+        return self.engine
+
+    def set_position(self, args):
+        # position startpos [moves ...] | position fen <6 полей> [moves ...]
+        if not args:
+            return
+        moves = args[args.index("moves") + 1:] if "moves" in args else []
+        head = args[:args.index("moves")] if "moves" in args else args
+        try:
+            board = chess.Board() if head[0] == "startpos" else chess.Board(" ".join(head[1:]))
+        except ValueError:
+            self.send(f"info string bad fen {' '.join(head[1:])}")
+            return
+        self.game.board = board
+        self.game.invalidate()
+        for uci in moves:
+            try:
+                move = chess.Move.from_uci(uci)
+            except ValueError:
+                move = None
+            if move not in self.game.state.legal_set:
+                self.send(f"info string illegal move {uci}")
+                return
+            self.game.push(move)
+
+    def go(self, args):
+        self.stop()
+        limits, infinite = self.parse_go(args, self.game.board.turn,
+                                         on_error=lambda message: self.send(f"info string {message}"))
+        stop = threading.Event()
+        release = threading.Event()
+        self._stop = stop
+        self._release = release
+        board = self.game.board.copy()
+        engine = self._get_engine()
+        self._thread = threading.Thread(
+            target=self._search, args=(engine, board, limits, stop, release, infinite),
+            name="uci-search", daemon=True
+        )
+        self._thread.start()
+
+    @staticmethod
+    def parse_go(args, turn, on_error=None):
+        # ограничения для Engine.search и признак "думать до stop"
+        # on_error(текст) - о плохом значении параметра (сам параметр пропускается)
+        values = {}
+        infinite = False
+        i = 0
+        while i < len(args):
+            if args[i] == "infinite":
+                infinite = True
+                i += 1
+            elif i + 1 < len(args) and args[i] in ("wtime", "btime", "winc", "binc", "movestogo",
+                                                  "depth", "nodes", "movetime"):
+                try:
+                    values[args[i]] = int(args[i + 1])
+                except ValueError:
+                    if on_error is not None:
+                        on_error(f"bad value for {args[i]}: {args[i + 1]}")
+                i += 2
+            else:
+                i += 1
+        limits = {'depth': values.get('depth'), 'nodes': values.get('nodes'), 'time_limit': None}
+        if 'movetime' in values:
+            limits['time_limit'] = max(0.01, values['movetime'] / 1000 - MOVE_OVERHEAD)
+        else:
+            time_left = values.get('wtime' if turn == chess.WHITE else 'btime')
+            if time_left is not None and not infinite:
+                increment = values.get('winc' if turn == chess.WHITE else 'binc', 0)
+                limits['time_limit'] = allocate_time(time_left / 1000, increment / 1000, values.get('movestogo'))
+        return limits, infinite
+
+    def _search(self, engine, board, limits, stop, release, infinite):
+        def on_iteration(result):
+            if not stop.is_set():
+                self.send_info(result)
+
+        try:
+            if isinstance(engine, ParallelEngine):
+                result = engine.search(board, stop=stop, **limits)  # помощники в других процессах, прогресса нет
+            else:
+                result = engine.search(board, stop=stop, on_iteration=on_iteration, **limits)
+        except Exception as e:
+            # без bestmove оболочка ждала бы ответа вечно: сообщаем об ошибке и отдаём любой легальный ход
+            self.send(f"info string search failed: {e!r}")
+            move = next(iter(board.legal_moves), None)
+        else:
+            self.send_info(result)
+            move = result.move
+        if infinite:
+            release.wait()  # по протоколу при go infinite bestmove выводится только после stop
+        self.send(f"bestmove {move.uci() if move else '0000'}")
+
+    def send_info(self, result):
+        elapsed_ms = int(result.elapsed * 1000)
+        pv = " ".join(move.uci() for move in result.pv)
+        self.send(f"info depth {result.depth} score {format_score(result.score)} nodes {result.nodes} "
+                  f"nps {result.nps} time {elapsed_ms}" + (f" pv {pv}" if pv else ""))
+
+    def stop(self):
+        # прервать текущий поиск и дождаться bestmove (движок проверяет флаг каждые 256 узлов)
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._release.set()
+        self._thread.join()
+        self._thread = None
+
+    def close(self):
+        self._reset_engine()
+
+
+def main(stdin=sys.stdin, stdout=sys.stdout):
+    uci = UciEngine(stdout)
+    for line in stdin:
+        if not uci.handle(line):
+            break
+    else:
+        uci.stop()
+        uci.close()
+
+
+if __name__ == "__main__":
+    main()
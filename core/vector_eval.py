@@ -0,0 +1,183 @@
+import chess
+import numpy as np
+from core.search import PIECE_VALUES, PST
+
+# оценка позиций на NumPy: доска кодируется 12 битовыми плоскостями 8x8
+# (белые пешка..король, затем чёрные), и целые пачки позиций считаются одним матричным умножением
+#
+# сеть: 768 входов (плоскость * 64 + поле) -> скрытый слой -> одно число (оценка с точки зрения белых)
+# первый слой линейный, поэтому его выход (аккумулятор) после хода меняется на 2-4 столбца весов,
+# а не считается заново - так делают NNUE-движки
+# Network.pst() - частный случай без нелинейности: те же материал и таблицы "фигура-поле", что в core.search
+#
+# NumPy нужен только этому модулю (pip install numpy); поиск движка от него не зависит
+PLANES = 12
+FEATURES = PLANES * 64
+PIECE_TYPES = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING)
+
+
+def plane(color, piece_type) -> int:
+    return (0 if color == chess.WHITE else 6) + piece_type - 1
+
+
+def feature(color, piece_type, square) -> int:
+    return plane(color, piece_type) * 64 + square
+
+
+def piece_masks(board):
+    # 12 битовых масок фигур (порядок плоскостей)
+    return [board.pieces_mask(piece_type, color) for color in (chess.WHITE, chess.BLACK) for piece_type in PIECE_TYPES]
+
+
+def pack(board) -> np.ndarray:
+    # компактная форма: 12 чисел uint64 (96 байт на позицию)
+    return np.array(piece_masks(board), dtype="<u8")
+
+
+def pack_batch(boards) -> np.ndarray:
+    return np.array([piece_masks(board) for board in boards], dtype="<u8").reshape(-1, PLANES)
+
+
+def unpack(packed) -> np.ndarray:
+    # (..., 12) uint64 -> (..., 12, 64) uint8 из нулей и единиц; бит i маски - поле i
+    packed = np.ascontiguousarray(packed, dtype="<u8")
+    bits = np.unpackbits(packed.view(np.uint8), bitorder="little")
+    return bits.reshape(packed.shape + (64,))
+
+
+def encode(board) -> np.ndarray:
+    return unpack(pack(board))
+
+
+def encode_batch(boards) -> np.ndarray:
+    return unpack(pack_batch(boards))
+
+
+def _pst_weights():
+    # веса как у core.search.evaluate: белая фигура на sq берёт table[sq ^ 56], чёрная - table[sq] со знаком минус
+    weights = np.zeros((PLANES, 64), dtype=np.float32)
+    for piece_type, table in PST.items():
+        value = PIECE_VALUES[piece_type]
+        for sq in chess.SQUARES:
+            weights[plane(chess.WHITE, piece_type), sq] = value + table[sq ^ 56]
+            weights[plane(chess.BLACK, piece_type), sq] = -(value + table[sq])
+    return weights.reshape(FEATURES, 1)
+
+
+class Network:
+    def __init__(self, w1, b1, w2, b2=0.0, activation=True):
+        self.w1 = np.ascontiguousarray(w1, dtype=np.float32)  # (768, скрытых)
+        self.b1 = np.asarray(b1, dtype=np.float32)  # (скрытых,)
+        self.w2 = np.asarray(w2, dtype=np.float32)  # (скрытых,)
+        self.b2 = float(b2)
+        self.activation = activation  # clipped ReLU скрытого слоя; без неё сеть - просто линейная оценка
+        self.hidden = self.w1.shape[1]
+
+    @classmethod
+    def pst(cls):
+        # материал + таблицы "фигура-поле": результат совпадает с core.search.evaluate
+        return cls(_pst_weights(), [0.0], [1.0], activation=False)
+
+    @classmethod
+    def random(cls, hidden=32, seed=0):
+        # необученная сеть нужного размера (для замеров скорости и как начальные веса для обучения)
+        rng = np.random.default_rng(seed)
+        return cls(rng.normal(0, 0.1, (FEATURES, hidden)), np.zeros(hidden), rng.normal(0, 100, hidden))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["w1"], data["b1"], data["w2"], float(data["b2"]), bool(data["activation"]))
+
+    def save(self, path):
+        np.savez(path, w1=self.w1, b1=self.b1, w2=self.w2, b2=self.b2, activation=self.activation)
+
+    def output(self, accumulators):
+        # (N, скрытых) выходов первого слоя -> (N,) оценок с точки зрения белых
+        hidden = accumulators + self.b1
+        if self.activation:
+            hidden = np.clip(hidden, 0.0, 1.0)
+        return hidden @ self.w2 + self.b2
+
+    def evaluate_planes(self, planes, turns):
+        # planes: (N, 12, 64), turns: (N,) bool (True - ход белых); результат с точки зрения того, чей ход
+        n = planes.shape[0]
+        scores = self.output(planes.reshape(n, FEATURES).astype(np.float32) @ self.w1)
+        return np.where(turns, scores, -scores)
+
+    def evaluate_batch(self, boards) -> np.ndarray:
+        # оценки пачки позиций (целые сантипешки) - как core.search.evaluate, но одним умножением матриц
+        boards = list(boards)
+        turns = np.fromiter((board.turn for board in boards), dtype=bool, count=len(boards))
+        return np.rint(self.evaluate_planes(encode_batch(boards), turns)).astype(np.int32)
+
+    def evaluate(self, board) -> int:
+        return int(self.evaluate_batch([board])[0])
+
+
+class Accumulator:
+    # выход первого слоя для позиции на доске, обновляемый по ходам:
+    # push(move) прибавляет и вычитает столбцы весов только у изменившихся фигур, pop() возвращает прежний
+    # доска двигается вместе с аккумулятором (board.push / board.pop вызываются здесь)
+
+    def __init__(self, network, board):
+        self.network = network
+        self.board = board
+        self.value = self._full()
+        self._stack = []
+
+    def _full(self):
+        active = np.flatnonzero(encode(self.board))
+        return self.network.w1[active].sum(axis=0)
+
+    def refresh(self):
+        # доску поменяли в обход push/pop
+        self.value = self._full()
+        self._stack.clear()
+
+    def _changes(self, move):
+        # (убранные признаки, добавленные признаки) для хода, который ещё не сделан
+        board = self.board
+        color = board.turn
+        piece_type = board.piece_type_at(move.from_square)
+        removed = [feature(color, piece_type, move.from_square)]
+        added = [feature(color, move.promotion or piece_type, move.to_square)]
+        if board.is_castling(move):
+            # ход короля записан как e1g1 (или e1h1 в Chess960) - ладью двигаем отдельно
+            rank = chess.square_rank(move.from_square)
+            kingside = board.is_kingside_castling(move)
+            rook_from = move.to_square if board.piece_type_at(move.to_square) == chess.ROOK and \
+                board.color_at(move.to_square) == color else chess.square(7 if kingside else 0, rank)
+            king_to = chess.square(6 if kingside else 2, rank)
+            rook_to = chess.square(5 if kingside else 3, rank)
+            added = [feature(color, chess.KING, king_to), feature(color, chess.ROOK, rook_to)]
+            removed.append(feature(color, chess.ROOK, rook_from))
+        elif board.is_en_passant(move):
+            captured = move.to_square - 8 if color == chess.WHITE else move.to_square + 8
+            removed.append(feature(not color, chess.PAWN, captured))
+        else:
+            captured = board.piece_type_at(move.to_square)
+            if captured:
+                removed.append(feature(not color, captured, move.to_square))
+        return removed, added
+
+    def push(self, move):
+        removed, added = self._changes(move)
+        w1 = self.network.w1
+        value = self.value
+        self._stack.append(value)
+        for f in added:
+            value = value + w1[f]
+        for f in removed:
+            value = value - w1[f]
+        self.value = value
+        self.board.push(move)
+
+    def pop(self):
+        self.value = self._stack.pop()
+        return self.board.pop()
+
+    def evaluate(self) -> int:
+        # оценка текущей позиции с точки зрения того, чей ход
+        score = float(self.network.output(self.value[np.newaxis])[0])
+        return round(score if self.board.turn == chess.WHITE else -score)
@@ -0,0 +1,134 @@
+import queue
+import time
+import tkinter as tk
+import chess
+from core.engine_thread import SearchThread
+from core.search import Engine, MATE_SCORE, MATE_BOUND
+
+UPDATE_MS = 100  # как часто панель обновляется (не чаще 10 раз в секунду, сколько бы итераций ни закончилось)
+PV_MOVES = 12  # сколько ходов главного варианта показываем
+
+
+def format_eval(score, turn):
+    # оценка с точки зрения белых: "+0.35" или "#3" / "#-2" (мат в ходах)
+    if turn == chess.BLACK:
+        score = -score
+    if score >= MATE_BOUND:
+        return f"#{(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"#-{(MATE_SCORE + score + 1) // 2}"
+    return f"{score / 100:+.2f}"
+
+
+class AnalysisPanel(tk.LabelFrame):
+    # непрерывный анализ текущей позиции: бесконечный поиск в фоновом потоке,
+    # результаты итераций копятся в очереди, а панель забирает только последний раз в UPDATE_MS
+    # у анализа свой движок: таблица перестановок живёт между позициями, и после хода
+    # поиск быстро возвращается на набранную глубину
+
+    def __init__(self, parent, engine=None, font=('Courier New', 10)):
+        super().__init__(parent, text="Анализ", font=('Arial', 12))
+        self.search = SearchThread(engine or Engine())
+        self.running = False
+
+        self._queue = queue.Queue()
+        self._generation = 0  # номер позиции; итерации поиска по старым позициям выбрасываем
+        self._board = None  # копия позиции, которую анализируем (для записи варианта в SAN)
+        self._started = 0.0
+        self._last = None  # последняя законченная итерация
+        self._done = False
+        self._update_id = None
+
+        self.score_label = tk.Label(self, font=('Arial', 16, 'bold'), anchor=tk.W)
+        self.score_label.pack(fill=tk.X, padx=5)
+        self.info_label = tk.Label(self, font=font, anchor=tk.W)
+        self.info_label.pack(fill=tk.X, padx=5)
+        self.pv_label = tk.Label(self, font=font, justify=tk.LEFT, anchor=tk.NW, wraplength=220)
+        self.pv_label.pack(fill=tk.BOTH, padx=5, pady=(0, 5))
+
+    def start(self, board):
+        self.running = True
+        self.set_position(board)
+
+    def stop(self):
+        self.running = False
+        self._generation += 1
+        self.search.cancel()
+        if self._update_id is not None:
+            self.after_cancel(self._update_id)
+            self._update_id = None
+
+    def destroy(self):
+        self.stop()
+        super().destroy()
+
+    def set_position(self, board):
+        # новая позиция (ход, переход по истории): прежний поиск прерывается, новый начинается с глубины 1,
+        # но мелкие итерации почти целиком берутся из таблицы перестановок
+        if not self.running:
+            return
+        self._generation += 1
+        generation = self._generation
+        self._board = board.copy(stack=False)
+        self._started = time.perf_counter()
+        self._last = None
+        self._done = False
+        self.score_label.config(text="")
+        self.pv_label.config(text="")
+
+        if board.is_game_over():
+            self.search.cancel()
+            self.info_label.config(text="партия окончена")
+            return
+        self.info_label.config(text="считаю...")
+        self.search.start(
+            board,
+            on_done=lambda result: self._queue.put((generation, True, result)),
+            on_progress=lambda result: self._queue.put((generation, False, result)),
+            use_book=False  # в анализе нужна оценка, а не ход из книги
+        )
+        if self._update_id is None:
+            self._update_id = self.after(UPDATE_MS, self._update)
+
+    def _update(self):
+        self._update_id = None
+        while True:
+            try:
+                generation, finished, result = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generation:
+                continue
+            self._last = result
+            self._done = self._done or finished
+
+        if self._last is not None:
+            self._show(self._last)
+        if not self._done:
+            self._update_id = self.after(UPDATE_MS, self._update)
+
+    def _show(self, result):
+        board = self._board
+        self.score_label.config(text=format_eval(result.score, board.turn))
+        if self._done:
+            nodes, elapsed = result.nodes, result.elapsed
+            state = "готово"
+        else:
+            # узлы текущей (ещё не законченной) итерации: счётчик движка читаем без блокировки
+            nodes, elapsed = max(result.nodes, self.search.engine.nodes), time.perf_counter() - self._started
+            state = f"{elapsed:.0f} с"
+        nps = int(nodes / elapsed) if elapsed > 0 else 0
+        self.info_label.config(text=f"глубина {result.depth}, {nps} узл/с, {state}")
+
+        pv = board.copy(stack=False)
+        words = []
+        for move in result.pv[:PV_MOVES]:
+            if not pv.is_legal(move):
+                break
+            if pv.turn == chess.WHITE:
+                words.append(f"{pv.fullmove_number}.")
+            elif not words:
+                words.append(f"{pv.fullmove_number}...")
+            words.append(pv.san(move))
+            pv.push(move)
+        self.pv_label.config(text=" ".join(words))
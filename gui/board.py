@@ -1,8 +1,7 @@
 from tkinter import Canvas
 import tkinter as tk
-from PIL import Image, ImageTk
-from core.game_engine import ChessGame
-import os
+from core import profiler
+from gui import sprites
 import chess
 
 
@@ -22,43 +21,75 @@ class ChessBoard(Canvas):
         self.bind("<Button-1>", self.on_click)  # какая кнопка мыши будет активна (добавлен обработчик)
 
         self.load_piece_images()
+        self.create_board_items()
         self.draw_board()
 
+    def create_board_items(self):
+        # все элементы холста создаются один раз, дальше они только меняются (без delete("all"))
+        self.delete("all")
+        self.square_items = []  # клетки доски (индекс - номер поля chess)
+        self.piece_items = []  # по одной картинке на каждое поле, у пустого поля картинки нет
+        self.drawn_pieces = {}  # что сейчас нарисовано: поле -> ключ картинки ('wP', ...)
+
+        for sq in chess.SQUARES:
+            col = chess.square_file(sq)
+            row = 7 - chess.square_rank(sq)  # в ткинтер y растет вниз
+            x1 = col * self.sq_size
+            y1 = row * self.sq_size
+            color = "#f0d9b5" if (row + col) % 2 == 0 else "#b58863"  # определяем цвет если четная клетка - белый иначе черный
+            self.square_items.append(self.create_rectangle(
+                x1, y1, x1 + self.sq_size, y1 + self.sq_size, fill=color, outline="", tags="square"
+            ))
+
+        for sq in chess.SQUARES:
+            x, y = self.square_center(sq)
+            self.piece_items.append(self.create_image(
+                x, y, anchor=tk.CENTER, state=tk.HIDDEN, tags=("piece", f"piece_{sq}")
+            ))
+
+        # слои подсветки поверх фигур: их только показываем, прячем и двигаем
+        self.selected_item = self.create_rectangle(
+            0, 0, 0, 0, outline="blue", width=2, state=tk.HIDDEN, tags=("overlay", "selected_square")
+        )
+        self.check_item = self.create_rectangle(
+            0, 0, 0, 0, outline="red", width=3, state=tk.HIDDEN, tags=("overlay", "check_highlight")
+        )
+        self.move_dot_items = []  # пул кружков для возможных ходов (дорисовываем, если не хватает)
+        self.shown_dots = 0
+
+    def square_center(self, sq):
+        x = chess.square_file(sq) * self.sq_size + self.sq_size // 2
+        y = (7 - chess.square_rank(sq)) * self.sq_size + self.sq_size // 2
+        return x, y
+
+    def square_bbox(self, sq):
+        x1 = chess.square_file(sq) * self.sq_size
+        y1 = (7 - chess.square_rank(sq)) * self.sq_size
+        return x1, y1, x1 + self.sq_size, y1 + self.sq_size
+
+    @profiler.timed("board.draw_board")
     def draw_board(self):
-        self.delete("all")  # удаляем все что было на доске до этого, после исполнения этого метода
-
-        for r in range(8):
-            for c in range(8):
-                color = "#f0d9b5" if (r + c) % 2 == 0 else "#b58863"  # определяем цвет если четная клетка - белый иначе черный
-                x1 = c * self.sq_size
-                y1 = r * self.sq_size
-                x2 = x1 + self.sq_size
-                y2 = y1 + self.sq_size
-
-                self.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
-
-                # ИСПРАВЛЕНО: кириллическая 'с' -> латинская 'c'
-                convert_coord = chess.square(c, 7 - r)  # создание координаты с учетом разницы в нумерации (в ткинтер y растет вниз)
-                piec = self.game.board.piece_at(
-                    convert_coord)  # получаем фигуру на клетке текущей (белая пешка - True 1)
-                if piec:  # проверяем есть ли фигура на этой клетке (в piec хранится экз. класса chess.piece поэтому так делаем)
-                    img_key = self.get_piece_image_key(piec)
-                    # ИСПРАВЛЕНО: sq_pict -> piece_images
-                    img = self.piece_images.get(img_key)  # получаем значение из словаря с картинками
-
-                    if img:
-                        img_x = x1 + (self.sq_size - img.width()) // 2  # вычисляем координаты для центрирования фигуры в клетке
-                        img_y = y1 + (self.sq_size - img.height()) // 2
-
-                        self.create_image(  # размещаем фигуру на холсте с тегом для идентификации
-                            img_x, img_y, anchor=tk.NW, image=img,
-                            tags=f"piece_{convert_coord}"
-                        )
+        # перерисовываем только поля, на которых фигуры изменились с прошлого раза
+        # (после хода это откуда/куда, ладья при рокировке и пешка, взятая на проходе)
+        current = {sq: self.get_piece_image_key(piec) for sq, piec in self.game.board.piece_map().items()}
+        drawn = self.drawn_pieces
+
+        for sq in drawn.keys() - current.keys():
+            self.itemconfigure(self.piece_items[sq], image="", state=tk.HIDDEN)
+            del drawn[sq]
+
+        for sq, img_key in current.items():
+            if drawn.get(sq) != img_key:
+                img = self.piece_images.get(img_key)
+                if img:
+                    self.itemconfigure(self.piece_items[sq], image=img, state=tk.NORMAL)
+                else:
+                    self.itemconfigure(self.piece_items[sq], image="", state=tk.HIDDEN)
+                drawn[sq] = img_key
 
         # Подсвечиваем выбранную фигуру (если есть)
-        if self.selected_square is not None:
-            self.highlight_selected_square()
-            self.highlight_possible_moves()
+        self.highlight_selected_square()
+        self.highlight_possible_moves()
 
         # Подсвечиваем короля под шахом
         self.highlight_check()
@@ -76,104 +107,66 @@ class ChessBoard(Canvas):
 
         return f"{color_prefix}{piec_type}"  # wP - пример возвращенного зн-я
 
+    @staticmethod
+    def piece_size(size):  # размер картинки фигуры для доски со стороной size (чтобы заранее подготовить кэш)
+        return int(size // 8 * 0.9)  # Увеличим размер фигур
+
+    @profiler.timed("board.load_piece_images")
     def load_piece_images(self):
-        pieces = [
-            'bB', 'bK', 'bN', 'bP', 'bQ', 'bR',
-            'wB', 'wK', 'wN', 'wP', 'wQ', 'wR'
-        ]
-
-        piece_size = int(self.sq_size * 0.9)  # Увеличим размер фигур
-
-        for piece_code in pieces:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-
-            img_path = os.path.join(
-                current_dir, "assets", "pieces", f"{piece_code}.png"
-            )
-
-            if os.path.exists(img_path):
-                try:
-                    # Загружаем изображение с поддержкой альфа-канала (прозрачности)
-                    img = Image.open(img_path).convert("RGBA")
-
-                    # Создаем новое изображение с прозрачным фоном
-                    transparent_img = Image.new("RGBA", img.size, (0, 0, 0, 0))
-
-                    # Накладываем фигуру на прозрачный фон
-                    transparent_img.paste(img, (0, 0), img)
-
-                    # Масштабируем изображение
-                    transparent_img = transparent_img.resize(
-                        (piece_size, piece_size),
-                        Image.LANCZOS
-                    )
-
-                    # Конвертируем для Tkinter
-                    self.piece_images[piece_code] = ImageTk.PhotoImage(transparent_img)
-                except Exception as e:
-                    print(f"Ошибка загрузки {piece_code}.png: {str(e)}")
-                    self.piece_images[piece_code] = None
-            else:
-                print(f"Файл не найден: {img_path}")
-                self.piece_images[piece_code] = None
+        piece_size = self.piece_size(self.sq_size * 8)
+
+        # картинки берём из общего кэша: масштабируются они только один раз, дальше читаются готовыми с диска
+        self.piece_images = sprites.load_piece_set(piece_size)
 
     # визуальное выделение клеток (зеленый цвет) на которые может переместиться выбранная фигура
     def highlight_possible_moves(self):
-        for move in self.possible_moves:  # проход по списку возможных ходов
-
-            col = chess.square_file(move.to_square)
-            row = 7 - chess.square_rank(move.to_square)  # для рисование х-7
+        targets = [move.to_square for move in self.possible_moves]  # проход по списку возможных ходов
+        radius = self.sq_size // 6
 
-            x = col * self.sq_size + self.sq_size // 2
-            y = row * self.sq_size + self.sq_size // 2
-
-            radius = self.sq_size // 6
-            self.create_oval(
-                x - radius, y - radius,
-                x + radius, y + radius,
+        while len(self.move_dot_items) < len(targets):
+            self.move_dot_items.append(self.create_oval(
+                0, 0, 0, 0,
                 fill="green", outline="",
                 stipple="gray12",  # Эффект прозрачности
-                tags="possible_move"
-            )
+                state=tk.HIDDEN,
+                tags=("overlay", "possible_move")
+            ))
+
+        for i, item in enumerate(self.move_dot_items):
+            if i < len(targets):
+                x, y = self.square_center(targets[i])
+                self.coords(item, x - radius, y - radius, x + radius, y + radius)
+                self.itemconfigure(item, state=tk.NORMAL)
+            elif i < self.shown_dots:  # прячем только то, что было видно
+                self.itemconfigure(item, state=tk.HIDDEN)
+        self.shown_dots = len(targets)
 
     def highlight_selected_square(self):  # подсвечиваем выбранную клетку синей рамкой
-        col = chess.square_file(self.selected_square)  # получаем координаты выбранной клетки на шахматной доске (0-7)
-        row = 7 - chess.square_rank(self.selected_square)
-
-        x1 = col * self.sq_size
-        y1 = row * self.sq_size
-        x2 = x1 + self.sq_size
-        y2 = y1 + self.sq_size
-
-        self.create_rectangle(
-            x1, y1, x2, y2,
-            outline="blue", width=2,
-            tags="selected_square"
-        )
+        if self.selected_square is None:
+            self.itemconfigure(self.selected_item, state=tk.HIDDEN)
+            return
+        self.coords(self.selected_item, *self.square_bbox(self.selected_square))
+        self.itemconfigure(self.selected_item, state=tk.NORMAL)
 
     def highlight_check(self):  # подсвечиваем красной рамкой короля, если он под шахом
-        if self.game and self.game.board.is_check():
+        king_square = None
+        if self.game and self.game.state.is_check:
             king_color = self.game.board.turn  # определяем цвет короля, который под шахом
             king_square = self.game.board.king(king_color)  # фигура короля под шахом
 
-            if king_square is not None:
-                col = chess.square_file(king_square)
-                row = 7 - chess.square_rank(king_square)
-                x1 = col * self.sq_size
-                y1 = row * self.sq_size
-                x2 = x1 + self.sq_size
-                y2 = y1 + self.sq_size
-
-                self.create_rectangle(
-                    x1, y1, x2, y2,
-                    outline="red", width=3,
-                    tags="check_highlight"
-                )
+        if king_square is None:
+            self.itemconfigure(self.check_item, state=tk.HIDDEN)
+            return
+        self.coords(self.check_item, *self.square_bbox(king_square))
+        self.itemconfigure(self.check_item, state=tk.NORMAL)
 
     # обработчик кликов
+    @profiler.timed("board.on_click")
     def on_click(self, event):
         if not self.game or self.game.is_game_over:  # игнорируем клики по доске в случае проигрыша или когда игра не начата
             return
+        if self.game.board.turn != self.main_window.player_color:  # сейчас ходит компьютер
+            return
 
         col = event.x // self.sq_size  # преобразование координат клика мыши в шахматную клетку на доске
         row = event.y // self.sq_size
@@ -197,8 +190,8 @@ class ChessBoard(Canvas):
         if piece and piece.color == self.game.board.turn:  # есть ли фигура на доске и соотв-т ли ее цвет цвету хода игрока
             self.selected_square = square  # запоминаем выбранную клетку
 
-            self.possible_moves = [m for m in self.game.board.legal_moves if
-                                   m.from_square == square]  # список возможных ходов (для белой пешки: [Move.from_uci('e2e3'),  Move.from_uci('e2e4')])
+            # список возможных ходов (для белой пешки: [Move.from_uci('e2e3'),  Move.from_uci('e2e4')]), уже сгруппирован по полям
+            self.possible_moves = self.game.state.moves_from.get(square, [])
             self.draw_board()  # для отображения всех изменений (подсветка ходов легальных)
             return True
         return False
@@ -230,22 +223,23 @@ class ChessBoard(Canvas):
             return False
 
     def handle_successful_move(self):  # обрабатываем успешный ход
-        self.clear_selection()
-        self.draw_board()
+        self.clear_selection()  # заодно перерисовывает изменившиеся поля
 
         if self.game.is_game_over:
             # Если игра завершена, вызывается self.game.get_game_result(), который возвращает строку с результатом (например, "Мат! Победили Белые" или "Пат! Ничья"), это передаётся в update_status, чтобы отобразить его в интерфейсе
             self.main_window.update_status(self.game.get_game_result())
 
             # дополнительно проверяем, был ли мат -> вызывается show_play_again(), чтобы показать кнопку "Сыграть ещё раз"
-            if self.game.board.is_checkmate():
+            if self.game.state.is_checkmate:
                 self.main_window.show_play_again()
         else:
             # если игра не завершена, определяем, чей сейчас ход (self.game.board.turn)
             # chess.WHITE -> ход белых, chess.BLACK -> ход чёрных
             # формируем строку вида "Ход белых" или "Ход чёрных" и выводим через update_status
             turn = "белых" if self.game.board.turn == chess.WHITE else "чёрных"
-            self.main_window.update_status(f"Ход {turn}")
+            forced = self.game.forced_result()  # в простом эндшпиле исход известен заранее
+            self.main_window.update_status(f"Ход {turn}. {forced}" if forced else f"Ход {turn}")
+            self.main_window.request_engine_move()  # если теперь очередь компьютера - он начнёт думать
 
     def clear_selection(self):  # cбрасываем текущий выбор фигуры и обновляем доску
         self.selected_square = None
@@ -0,0 +1,94 @@
+import queue
+from core import profiler
+from core.engine_thread import SearchThread, Ponderer
+
+POLL_MS = 15  # как часто поток Tk забирает сообщения от движка (меньше одного кадра)
+
+
+class EnginePlayer:
+    # компьютерный соперник для окна Tk: поиск идёт в фоновом потоке,
+    # а результаты передаются обратно в поток Tk через очередь и after()
+    # пока думает игрок, движок может обдумывать его ожидаемый ответ (ponder)
+
+    def __init__(self, root, on_move, on_progress=None, time_limit=1.0, engine=None, ponder=True):
+        self.root = root
+        self.on_move = on_move  # on_move(chess.Move) - вызывается в потоке Tk
+        self.on_progress = on_progress  # on_progress(SearchResult) - тоже в потоке Tk
+        self.time_limit = time_limit
+        self.search = SearchThread(engine)
+        self.ponderer = Ponderer(self.search)
+        self.ponder_enabled = ponder
+        self.last_result = None  # последний ход компьютера: его главный вариант - предсказание ответа игрока
+        self.last_ponder_hit = False
+
+        self._queue = queue.Queue()
+        self._generation = 0  # номер текущего запроса, ответы на старые запросы выбрасываем
+        self._poll_id = None
+
+    @property
+    def thinking(self) -> bool:
+        return self._poll_id is not None
+
+    @property
+    def stats(self):
+        return self.ponderer.stats
+
+    def request_move(self, board):
+        self.cancel_poll()
+        generation = self._generation
+        self.last_ponder_hit = self.ponderer.think(
+            board, self.time_limit,
+            on_done=lambda result: self._queue.put((generation, True, result)),
+            on_progress=lambda result: self._queue.put((generation, False, result))
+        )
+        if self.last_ponder_hit:
+            profiler.count("ponder.hits")
+        self._poll_id = self.root.after(POLL_MS, self._poll)
+
+    def ponder(self, board):
+        # после своего хода: думаем над позицией после ответа, который движок считает лучшим для игрока
+        self.ponderer.cancel()
+        result = self.last_result
+        if not self.ponder_enabled or result is None or len(result.pv) < 2 or board.is_game_over():
+            return
+        if not board.move_stack or board.move_stack[-1] != result.pv[0] or not board.is_legal(result.pv[1]):
+            return
+        self.ponderer.ponder(board, result.pv[1])
+
+    def cancel_poll(self):
+        self._generation += 1
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def cancel(self):
+        self.cancel_poll()
+        self.ponderer.cancel()
+
+    def _poll(self):
+        self._poll_id = None
+        progress = None
+        done = None
+
+        # забираем всё, что накопилось, но показываем только последний прогресс
+        while True:
+            try:
+                generation, finished, result = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generation:
+                continue
+            if finished:
+                done = result
+            else:
+                progress = result
+
+        if progress is not None and self.on_progress is not None:
+            self.on_progress(progress)
+
+        if done is not None:
+            self.last_result = done
+            if done.move is not None:
+                self.on_move(done.move)
+            return
+        self._poll_id = self.root.after(POLL_MS, self._poll)
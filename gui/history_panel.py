@@ -0,0 +1,179 @@
+import tkinter as tk
+
+
+class MoveHistoryPanel(tk.Frame):
+    # панель истории ходов: в виджете Text лежат только видимые строки (окно из rows строк),
+    # а после хода дописывается или исправляется одна последняя строка, без перестройки всего списка
+
+    def __init__(self, parent, on_select=None, rows=20, width=20, font=('Courier New', 10)):
+        super().__init__(parent)
+        self.on_select = on_select  # on_select(ply) - пользователь кликнул по ходу
+        self.rows = rows
+        self.lines = []  # все строки истории (в том же формате, что MainWindow.move_history)
+        self.top = 0  # индекс первой видимой строки
+        self.follow = True  # держим ли окно прокрученным к последнему ходу
+        self.current = None  # полуход, после которого стоит позиция на доске (подсвечиваем последний сделанный ход)
+
+        self.text = tk.Text(
+            self,
+            height=rows,
+            width=width,
+            font=font,
+            wrap=tk.NONE,
+            cursor="arrow",
+            state=tk.DISABLED #запрет редактирования
+        )
+        #скроллбар управляет не самим Text, а окном строк
+        self.scrollbar = tk.Scrollbar(self, command=self.yview)
+
+        self.text.tag_configure("current", background="#cfe2ff")
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH)
+
+        self.text.bind("<Button-1>", self._on_click)
+        self.text.bind("<MouseWheel>", lambda e: self._on_wheel(-1 if e.delta > 0 else 1))
+        self.text.bind("<Button-4>", lambda e: self._on_wheel(-1))
+        self.text.bind("<Button-5>", lambda e: self._on_wheel(1))
+
+    # --- индекс "полуход -> строка" ---
+
+    @staticmethod
+    def ply_to_line(ply):
+        # пара ходов k занимает строку 2k (следом идёт пустая строка-разделитель)
+        return (ply // 2) * 2
+
+    def line_to_ply(self, line, col=0):
+        if line % 2 or line >= len(self.lines):
+            return None  # пустая строка-разделитель
+        text = self.lines[line]
+        sep = text.find(" - ")
+        black = sep != -1 and col > sep
+        return line + 1 if black else line  # строка 2k -> полуходы 2k (белые) и 2k+1 (черные)
+
+    # --- обновление содержимого ---
+
+    def reset(self, lines):
+        # полная замена (новая игра, загрузка) - единственный случай, когда перерисовывается всё окно
+        self.lines = list(lines)
+        self.top = max(0, len(self.lines) - self.rows)
+        self.follow = True
+        self._render()
+
+    def sync_tail(self, lines):
+        # история только растёт в конце, а меняться может лишь последняя строка:
+        # сравниваем хвост и трогаем в Text только то, что изменилось
+        start = max(0, len(self.lines) - 1)
+        for i in range(start, len(lines)):
+            if i < len(self.lines):
+                if self.lines[i] != lines[i]:
+                    self.lines[i] = lines[i]
+                    self._patch_line(i)
+            else:
+                self._append_line(lines[i])
+        self._update_scrollbar()
+        self._show_current()
+
+    def set_current(self, ply):
+        # подсветка хода, к которому перешли (None - без подсветки); окно прокручивается к нему
+        self.current = ply
+        if ply:
+            self.see_line(self.ply_to_line(ply - 1))
+        self._show_current()
+
+    def _show_current(self):
+        self.text.tag_remove("current", "1.0", tk.END)
+        if not self.current:
+            return
+        move = self.current - 1
+        line = self.ply_to_line(move)
+        if not self.top <= line < min(len(self.lines), self.top + self.rows):
+            return
+        text = self.lines[line]
+        sep = text.find(" - ")
+        if move % 2 == 0:
+            start, end = 0, (sep if sep != -1 else len(text))
+        else:
+            start, end = sep + 3, len(text)
+        ln = line - self.top + 1
+        self.text.tag_add("current", f"{ln}.{start}", f"{ln}.{end}")
+
+    def _patch_line(self, i):
+        if not self.top <= i < self.top + self.rows:
+            return  # строка не видна - поправится при прокрутке
+        ln = i - self.top + 1
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(f"{ln}.0", f"{ln}.end")
+        self.text.insert(f"{ln}.0", self.lines[i])
+        self.text.config(state=tk.DISABLED)
+
+    def _append_line(self, line):
+        visible = min(self.rows, len(self.lines) - self.top)
+        self.lines.append(line)
+        if not self.follow and visible >= self.rows:
+            return  # пользователь смотрит начало партии - новая строка за пределами окна
+
+        self.text.config(state=tk.NORMAL)
+        if visible >= self.rows:
+            # окно заполнено: сдвигаем его на строку вниз
+            self.text.delete("1.0", "2.0")
+            self.top += 1
+            visible -= 1
+        if visible:
+            self.text.insert("end-1c", "\n" + line)
+        else:
+            self.text.insert("1.0", line)
+        self.text.config(state=tk.DISABLED)
+
+    def _render(self):
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(self.lines[self.top:self.top + self.rows]))
+        self.text.config(state=tk.DISABLED)
+        self._update_scrollbar()
+        self._show_current()
+
+    # --- прокрутка ---
+
+    def _max_top(self):
+        return max(0, len(self.lines) - self.rows)
+
+    def _update_scrollbar(self):
+        n = len(self.lines)
+        if n <= self.rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / n, min(1.0, (self.top + self.rows) / n))
+
+    def scroll_to(self, top):
+        top = max(0, min(top, self._max_top()))
+        self.follow = top == self._max_top()
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def see_line(self, line):
+        # прокручиваем так, чтобы строка была видна (для перехода к ходу)
+        if line < self.top:
+            self.scroll_to(line)
+        elif line >= self.top + self.rows:
+            self.scroll_to(line - self.rows + 1)
+
+    def yview(self, *args):
+        if not args:
+            return
+        if args[0] == tk.MOVETO:
+            self.scroll_to(int(float(args[1]) * len(self.lines)))
+        elif args[0] == tk.SCROLL:
+            step = int(args[1])
+            self.scroll_to(self.top + (step * self.rows if args[2] == tk.PAGES else step))
+
+    def _on_wheel(self, step):
+        self.scroll_to(self.top + step * 3)
+        return "break"
+
+    def _on_click(self, event):
+        line, col = map(int, self.text.index(f"@{event.x},{event.y}").split("."))
+        ply = self.line_to_ply(self.top + line - 1, col)
+        if ply is not None and self.on_select is not None:
+            self.on_select(ply)
+        return "break"
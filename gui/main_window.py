@@ -1,12 +1,37 @@
-import pickle
-import chess
 import os
+import threading
 import tkinter as tk
-from core.game_engine import ChessGame
-from gui.board import ChessBoard
-from tkinter import messagebox
+from core import profiler
+from gui.profiler_overlay import ProfilerOverlay
+from tkinter import filedialog, messagebox
+
+SAVE_FILE = "chess_save.pcj" #журнал партии: заголовок + по 2 байта на каждый ход
+ENGINE_TIME = 1.0 #сколько секунд компьютер думает над ходом
+BOOK_FILE = "book.bin" #дебютная книга Polyglot (необязательна): пока позиция в книге, компьютер ходит мгновенно
+POSITION_INDEX = "positions.sqlite" #индекс позиций (python -m core.position_index): что играли в позиции
+BOARD_SIZE = 500 #сторона доски в пикселях
+
+
+def load_game_modules(): #модули для партии: chess, движок, базы, доска (вместе с chess.pgn и sqlite ~0.4 с)
+    #меню обходится без них, поэтому при запуске они не импортируются: MainWindow.prewarm загружает их
+    #в фоне, пока открыто меню, а prepare_game - на случай, если пользователь оказался быстрее
+    #повторный вызов ничего не стоит: модули уже в sys.modules
+    global chess, Bitbases, ChessGame, GameJournal, load_journal, OpeningBook, PositionIndex, Engine
+    global AnalysisPanel, ChessBoard, EnginePlayer, MoveHistoryPanel, PgnBrowser, PositionStatsPanel
+    import chess
+    from core.bitbase import Bitbases
+    from core.game_engine import ChessGame
+    from core.journal import GameJournal, load_journal
+    from core.opening_book import OpeningBook
+    from core.position_index import PositionIndex
+    from core.search import Engine
+    from gui.analysis_panel import AnalysisPanel
+    from gui.board import ChessBoard
+    from gui.engine_player import EnginePlayer
+    from gui.history_panel import MoveHistoryPanel
+    from gui.pgn_browser import PgnBrowser
+    from gui.position_stats import PositionStatsPanel
 
-SAVE_FILE = "chess_save.pkl"
 
 class MainWindow(tk.Tk):
     def __init__(self):#делаем главное окно
@@ -15,19 +40,92 @@ class MainWindow(tk.Tk):
         self.configure(bg='white')
         self.geometry("700x600")
 
-        self.game = ChessGame()
+        #книга, базы, партия, журнал и движок появляются в prepare_game, когда пользователь выберет партию
+        self.book = None
+        self.bitbases = None
+        self.position_index = None
+        self.position_stats = None #панель статистики позиции (есть, только если есть индекс)
+        self.game = None
+        self.journal = None #каждый ход сразу дописывается в файл в фоновом потоке
+        self.engine_player = None #компьютер играет за другой цвет, думает в фоновом потоке
         self.chess_board = None
-        self.player_color = chess.WHITE #цвет фигуры игрока по умолчанию
+        self.player_color = True #цвет фигуры игрока по умолчанию (chess.WHITE)
         self.move_history = [] #список с историей ходов
         self.has_saved_game = os.path.exists(SAVE_FILE) #(true/false) проверяем есть ли сохраненная игра
 
         self.status_var = tk.StringVar() #обновление интерфейса для отображения статуса игры
         self.btn_play_again = None #после шаха и мата кнопка сыграть еще раз
+        #у анализа свой движок: его таблица перестановок переживает смену позиций и пересоздание окна
+        self.analysis_engine = None
+        self.analysis = None
+        self.analysis_var = tk.BooleanVar(value=False)
+        self.ponder_var = tk.BooleanVar(value=True) #компьютер думает и во время хода игрока
+        self.ponder_label = None
+        self.profiler_overlay = None
+        if profiler.ENABLED: #сводка профилировщика по F12 (python main.py --profile)
+            self.bind_all("<F12>", lambda e: self.toggle_profiler())
 
         self.create_start_menu()
+        self.after_idle(self.prewarm) #меню уже на экране - можно загружать остальное
 
 
+    def prewarm(self): #фоновая загрузка модулей партии и картинок фигур, пока пользователь смотрит на меню
+        def run():
+            load_game_modules()
+            from gui import sprites
+            sprites.prerender(ChessBoard.piece_size(BOARD_SIZE)) #PIL и масштабирование - тоже здесь, вне потока Tk
+        threading.Thread(target=run, name="prewarm", daemon=True).start()
+
+    def prepare_game(self): #всё для партии создаётся один раз, при первом переходе из меню к игре
+        if self.engine_player is not None:
+            return
+        load_game_modules() #если фоновая загрузка ещё идёт - дожидаемся её
+        self.book = self.open_book()
+        self.bitbases = self.open_bitbases()
+        self.position_index = self.open_position_index()
+        self.game = self.create_chess_game()
+        self.journal = GameJournal(SAVE_FILE)
+        self.engine_player = EnginePlayer(self, self.apply_engine_move, self.show_engine_progress, ENGINE_TIME,
+                                          engine=Engine(book=self.book, bitbases=self.bitbases))
+
+    def open_book(self): #открываем дебютную книгу, если она есть
+        if not os.path.exists(BOOK_FILE):
+            return None
+        try:
+            return OpeningBook(BOOK_FILE)
+        except Exception as e:
+            print(f"Не удалось открыть дебютную книгу: {str(e)}")
+            return None
+
+    def open_bitbases(self): #битовые базы эндшпилей, если они уже построены (python -m core.bitbase)
+        try:
+            bitbases = Bitbases(build=False)
+        except Exception as e:
+            print(f"Не удалось открыть битовые базы: {str(e)}")
+            return None
+        return bitbases if bitbases.tables else None
+
+    def open_position_index(self): #индекс позиций по партиям из баз PGN и самоигры, если он есть
+        if not os.path.exists(POSITION_INDEX):
+            return None
+        try:
+            return PositionIndex(POSITION_INDEX)
+        except Exception as e:
+            print(f"Не удалось открыть индекс позиций: {str(e)}")
+            return None
+
+    def create_chess_game(self): #новая партия с подключенными книгой и базами
+        game = ChessGame()
+        game.book = self.book
+        game.bitbases = self.bitbases
+        return game
+
     def create_start_menu(self):#начальное меню с кнопками
+        if self.engine_player is not None:
+            self.engine_player.cancel()
+        self.chess_board = None
+        self.ponder_label = None
+        self.analysis = None #панель анализа уничтожается вместе с окном партии и останавливает свой поиск
         self.has_saved_game = os.path.exists(SAVE_FILE)
         for w in self.winfo_children(): #идем по списку дочерних элементов виджетов
             w.destroy()
@@ -68,6 +166,16 @@ class MainWindow(tk.Tk):
             )
             continue_btn.pack(pady=10)
 
+        pgn_btn = tk.Button( #кнопка открытия базы партий PGN
+            frame,
+            text='Открыть PGN',
+            command=self.open_pgn,
+            font=('Arial', 14),
+            width=20,
+            height=2,
+            bg='#d0d8e8'
+        )
+        pgn_btn.pack(pady=10)
 
         quit_btn = tk.Button( #кнопка выхода из игры
             frame,
@@ -81,6 +189,7 @@ class MainWindow(tk.Tk):
         quit_btn.pack(pady=10)
 
     def select_color(self): #окно выбора цвета фигур
+        self.prepare_game()
         for w in self.winfo_children():
             w.destroy()
 
@@ -131,7 +240,9 @@ class MainWindow(tk.Tk):
 
     def start_game(self, player_color): #начинаем игру с выбранным цветом
         self.player_color = player_color
+        self.game = self.create_chess_game()
         self.move_history = []
+        self.journal.start(self.game.board, self.player_color) #новый журнал вместо прошлого сохранения
         for w in self.winfo_children(): w.destroy()
         self.create_game_interface()
 
@@ -148,29 +259,37 @@ class MainWindow(tk.Tk):
                         #краю родительского контейнера
 
         # ИСПРАВЛЕНО: Передача game и main_window
-        self.chess_board = ChessBoard(board_frame, self.game, self, size=500)
+        self.chess_board = ChessBoard(board_frame, self.game, self, size=BOARD_SIZE)
         self.chess_board.pack()
 
 
-        history_frame = tk.LabelFrame(main_frame, text="История ходов", font=('Arial', 12))
-        history_frame.pack(side=tk.RIGHT, fill=tk.BOTH, padx=10, pady=10) #фрейм для истории ходов
+        side_frame = tk.Frame(main_frame) #справа от доски: история ходов и под ней статистика позиции
+        side_frame.pack(side=tk.RIGHT, fill=tk.BOTH)
 
-        self.history_text = tk.Text(
+        history_frame = tk.LabelFrame(side_frame, text="История ходов", font=('Arial', 12))
+        history_frame.pack(fill=tk.BOTH, padx=10, pady=10) #фрейм для истории ходов
+
+        #панель сама держит в Text только видимые строки и дописывает новые ходы по одному
+        self.history_panel = MoveHistoryPanel(
             history_frame,  #родительский контейнер
-            height=20,
+            on_select=lambda ply: self.navigate(ply + 1), #клик по ходу - позиция после этого хода
+            rows=20 if self.position_index is None else 12, #под историей ещё нужно место для статистики
             width=20,
-            font=('Courier New', 10),
-            state=tk.DISABLED #запрет редактирования
+            font=('Courier New', 10)
         )
+        self.history_panel.pack(fill=tk.BOTH)
 
-        scrollbar = tk.Scrollbar(history_frame, command=self.history_text.yview)
-        self.history_text.config(yscrollcommand=scrollbar.set)
-        #Обеспечивает двустороннюю связь:
-        #При прокрутке текста - ползунок скроллбара двигается
-        #При перемещении ползунка - текст прокручивается
+        self.position_stats = None
+        if self.position_index is not None:
+            self.position_stats = PositionStatsPanel(side_frame, self.position_index)
+            self.position_stats.pack(fill=tk.BOTH, padx=10)
 
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y) #справа растягивается по вертикали
-        self.history_text.pack(side=tk.LEFT, fill=tk.BOTH) #слева растягивается во все стороны
+        if self.analysis_engine is None:
+            self.analysis_engine = Engine(bitbases=self.bitbases)
+        #панель анализа видна только при включённом анализе
+        self.analysis = AnalysisPanel(side_frame, self.analysis_engine)
+        if self.analysis_var.get():
+            self.analysis.pack(fill=tk.BOTH, padx=10, pady=(10, 0))
 
         self.update_history_display()
 
@@ -216,6 +335,41 @@ class MainWindow(tk.Tk):
             command=self.return_to_menu
         ).pack(side=tk.LEFT, padx=10)
 
+        tk.Button( #вернуть свой последний ход (вместе с ответом компьютера)
+            control_frame,
+            text='◀',
+            command=self.take_back
+        ).pack(side=tk.LEFT, padx=(10, 0))
+
+        tk.Button( #вперёд по отменённым ходам
+            control_frame,
+            text='▶',
+            command=lambda: self.navigate(self.game.ply + 1)
+        ).pack(side=tk.LEFT)
+
+        tk.Checkbutton( #непрерывный анализ текущей позиции
+            control_frame,
+            text='Анализ',
+            variable=self.analysis_var,
+            command=self.toggle_analysis
+        ).pack(side=tk.LEFT, padx=10)
+
+        tk.Checkbutton( #обдумывание ожидаемого ответа игрока, пока он думает
+            control_frame,
+            text='Думать в ваше время',
+            variable=self.ponder_var,
+            command=self.toggle_ponder
+        ).pack(side=tk.LEFT)
+        self.ponder_label = tk.Label(control_frame, font=('Arial', 9), fg='gray')
+        self.ponder_label.pack(side=tk.LEFT, padx=5)
+        self.update_ponder_stats()
+
+        #листать партию с клавиатуры: стрелки - на полуход, Home/End - в начало и в конец
+        self.bind("<Left>", lambda e: self.navigate(self.game.ply - 1))
+        self.bind("<Right>", lambda e: self.navigate(self.game.ply + 1))
+        self.bind("<Home>", lambda e: self.navigate(0))
+        self.bind("<End>", lambda e: self.navigate(self.game.line_length))
+
         color_info = tk.Label(
             control_frame,
             text=f"Ваш цвет: {'белые' if self.player_color == chess.WHITE else 'черные'}",
@@ -225,16 +379,19 @@ class MainWindow(tk.Tk):
         color_info.pack(side=tk.RIGHT)
 
         self.update_status('Ход белых' if self.game.board.turn == chess.WHITE else 'Ход чёрных')
+        self.request_engine_move() #если сейчас ход компьютера (например, игрок выбрал черные)
 
+    @profiler.timed("gui.load_game")
     def load_saved_game(self): #загружаем сохраненную игру
+        self.prepare_game()
         try:
-            with open(SAVE_FILE, 'rb') as f: #открываем файл в бинарном режиме
-                save_data = pickle.load(f)
-            self.player_color = save_data['player_color']
-            self.move_history = save_data['move_history']  # ИСПРАВЛЕНО: move_history
-            self.game = ChessGame()
-            self.game.board = chess.Board(save_data['fen'])
-            self.game.resigned = save_data['resigned']
+            saved = load_journal(SAVE_FILE)
+            self.player_color = saved.player_color
+            self.game = saved.replay(self.create_chess_game()) #проигрываем все ходы, чтобы восстановить стек ходов (повторения)
+            self.move_history = []
+            for move in self.game.board.move_stack:
+                self.record_move(move)
+            self.journal.resume()
 
             for widget in self.winfo_children():
                 widget.destroy()
@@ -244,7 +401,109 @@ class MainWindow(tk.Tk):
             self.has_saved_game = False
             self.create_start_menu()
 
+    def open_pgn(self): #выбираем файл PGN и показываем список партий (индекс строится один раз и лежит рядом с файлом)
+        path = filedialog.askopenfilename(
+            title="База партий",
+            filetypes=[("PGN", "*.pgn"), ("Все файлы", "*.*")]
+        )
+        if path:
+            self.prepare_game()
+            PgnBrowser(self, path, self.load_pgn_game)
+
+    def load_pgn_game(self, db, index): #открываем партию из базы и продолжаем её за сторону, которая ходит
+        try:
+            game = db.replay(index, self.create_chess_game())
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить партию: {str(e)}")
+            return
+        self.engine_player.cancel()
+        self.game = game
+        self.player_color = game.board.turn
+        self.move_history = []
+        for move in game.board.move_stack:
+            self.record_move(move)
+        self.journal.start(game.board, self.player_color) #партия из базы становится текущим сохранением
+
+        for widget in self.winfo_children(): #вместе с остальным закрывается и окно со списком партий
+            widget.destroy()
+        self.create_game_interface()
+
+    def request_engine_move(self): #просим компьютер сходить, если сейчас его очередь
+        if self.game.is_game_over or self.game.board.turn == self.player_color:
+            return
+        self.update_status('Компьютер думает...')
+        self.engine_player.request_move(self.game.board)
+
+    def apply_engine_move(self, move): #ход компьютера (вызывается в потоке Tk)
+        if self.chess_board is None or self.game.is_game_over:
+            return
+        if self.game.make_move(move.uci()):
+            self.add_move_to_history(move)
+            self.chess_board.handle_successful_move()
+            self.update_ponder_stats()
+            if not self.game.is_game_over:
+                self.engine_player.ponder(self.game.board) #пока игрок думает, ищем ответ на его ожидаемый ход
+
+    def toggle_ponder(self):
+        self.engine_player.ponder_enabled = self.ponder_var.get()
+        if not self.engine_player.ponder_enabled and not self.engine_player.thinking:
+            self.engine_player.cancel() #останавливаем уже начатое обдумывание
+
+    def update_ponder_stats(self): #сколько ходов игрока компьютер угадал и сколько времени это сэкономило
+        if self.ponder_label is not None and self.ponder_label.winfo_exists():
+            stats = self.engine_player.stats
+            self.ponder_label.config(text=str(stats) if stats.hits + stats.misses else '')
+
+    def navigate(self, ply): #переход к позиции после ply ходов (undo/redo, клик по истории, стрелки)
+        if self.chess_board is None or not 0 <= ply <= self.game.line_length or ply == self.game.ply:
+            return
+        self.engine_player.cancel()
+        self.game.go_to(ply) #не больше KEYFRAME_INTERVAL ходов от ближайшего снимка доски
+        self.chess_board.selected_square = None
+        self.chess_board.possible_moves = []
+        self.chess_board.draw_board() #перерисуются только поля, где фигуры отличаются
+        self.history_panel.set_current(self.game.ply)
+        self.update_position_stats()
+        self.update_analysis()
+
+        if self.game.ply < self.game.line_length:
+            turn = 'белых' if self.game.board.turn == chess.WHITE else 'чёрных'
+            self.update_status(f'Просмотр: полуход {self.game.ply} из {self.game.line_length}, ход {turn}')
+        else:
+            if self.btn_play_again:
+                self.btn_play_again.pack_forget()
+            self.update_status()
+            self.request_engine_move()
+
+    def take_back(self): #вернуть ход: назад до ближайшей позиции, где ходит игрок
+        ply = self.game.ply - 1
+        if ply > 0 and self.game.board.turn == self.player_color: #шагом назад попадём на ход компьютера
+            ply -= 1
+        self.navigate(ply)
+
+    def show_engine_progress(self, result): #промежуточные результаты поиска в строке статуса
+        self.status_var.set(
+            f'Компьютер думает... глубина {result.depth}, оценка {result.score / 100:+.2f}, {result.nps} узл/с'
+        )
+
     def add_move_to_history(self, move): #добавляем ход в историю
+        if len(self.move_history) != self.game.ply - 1:
+            #ход сделан не в конце партии (после возврата назад): продолжение заменяется новым
+            self.move_history = []
+            for m in self.game.board.move_stack:
+                self.record_move(m)
+            self.journal.rewrite(self.game.board, self.player_color) #в журнале тоже больше нет отменённых ходов
+            self.update_history_display()
+            return
+        self.record_move(move)
+        self.journal.append(move) #O(1): ход уходит в очередь фонового потока записи
+        #на панели меняется только хвост: новая строка или дописанная последняя
+        self.history_panel.sync_tail(self.move_history)
+        self.history_panel.set_current(self.game.ply)
+        self.update_position_stats()
+        self.update_analysis()
+
+    def record_move(self, move): #добавляем запись о ходе в список move_history (строк в списке столько же, сколько ходов)
         move_str = move.uci()[:4]  #получаем ход без указания превращения в формате uci (e2e3)
         pair_number = len(self.move_history) // 2 + 1  #определяем номер пары
 
@@ -256,24 +515,30 @@ class MainWindow(tk.Tk):
             self.move_history[-1] += f" - {move_str}"
             #еобавляем пустую строку для разделения пар
             self.move_history.append("")
-        self.update_history_display()
-
-    def update_history_display(self): #обновляем отображение истории ходов
-        # 1.разблокируем поле для редактирования
-        self.history_text.config(state=tk.NORMAL)
 
-        # 2.полностью очищаем содержимое
-        self.history_text.delete(1.0, tk.END)
+    def update_history_display(self): #полностью обновляем отображение истории ходов (новая игра, загрузка)
+        self.history_panel.reset(self.move_history)
+        self.history_panel.set_current(self.game.ply)
+        self.update_position_stats()
+        self.update_analysis()
 
-        # 3.добавляем все ходы из списка истории ходов
-        for move in self.move_history:
-            self.history_text.insert(tk.END, move + "\n")
+    def update_position_stats(self): #ходы из базы для позиции, которая сейчас на доске
+        if self.position_stats is not None:
+            self.position_stats.update_position(self.game.board)
 
-        # 4.прокручиваем к концу
-        self.history_text.see(tk.END)
+    def update_analysis(self): #позиция на доске поменялась - анализ начинается заново (с той же таблицей перестановок)
+        if self.analysis is not None and self.analysis.running:
+            self.analysis.set_position(self.game.board)
 
-        # 5.снова блокируем редактирование
-        self.history_text.config(state=tk.DISABLED)
+    def toggle_analysis(self): #включение и выключение непрерывного анализа
+        if self.analysis is None:
+            return
+        if self.analysis_var.get():
+            self.analysis.pack(fill=tk.BOTH, padx=10, pady=(10, 0))
+            self.analysis.start(self.game.board)
+        else:
+            self.analysis.stop()
+            self.analysis.pack_forget()
 
     def return_to_menu(self):
         """Возвращает в главное меню"""
@@ -289,34 +554,30 @@ class MainWindow(tk.Tk):
         if response:
             self.save_game()
         else:
-            if os.path.exists(SAVE_FILE):
-                os.remove(SAVE_FILE)
-            self.game = ChessGame()
+            self.journal.delete()
+            self.journal.flush()
+            self.game = self.create_chess_game()
             self.move_history = []
             self.has_saved_game = False
 
         self.create_start_menu()
 
+    @profiler.timed("gui.save_game")
     def save_game(self):
         """Сохраняет текущую игру"""
-        save_data = {
-            'fen': self.game.board.fen(),
-            'player_color': self.player_color,
-            'move_history': self.move_history,
-            'resigned': self.game.resigned
-        }
-
-        try:
-            with open(SAVE_FILE, 'wb') as f:
-                pickle.dump(save_data, f)
-            self.has_saved_game = True
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось сохранить игру: {str(e)}")
+        #ходы уже в журнале, остаётся дождаться записи и закрыть файл
+        self.journal.close()
+        self.journal.flush()
+        self.has_saved_game = os.path.exists(SAVE_FILE)
+        if not self.has_saved_game:
+            messagebox.showerror("Ошибка", "Не удалось сохранить игру")
 
     def new_game(self):
         """Начинает новую игру"""
-        self.game = ChessGame()
+        self.engine_player.cancel()
+        self.game = self.create_chess_game()
         self.move_history = []
+        self.journal.start(self.game.board, self.player_color)
 
         if self.chess_board:
             self.chess_board.game = self.game
@@ -330,6 +591,15 @@ class MainWindow(tk.Tk):
         if self.btn_play_again:
             self.btn_play_again.pack_forget()
 
+        self.request_engine_move()
+
+    def toggle_profiler(self): #окно профилировщика поверх игры
+        if self.profiler_overlay is not None and self.profiler_overlay.winfo_exists():
+            self.profiler_overlay.destroy()
+            self.profiler_overlay = None
+        else:
+            self.profiler_overlay = ProfilerOverlay(self)
+
     def show_play_again(self):
         """Показывает кнопку 'Сыграть еще раз'"""
         self.btn_play_again.pack(side=tk.RIGHT)
@@ -337,8 +607,11 @@ class MainWindow(tk.Tk):
 
     def resign(self):
         """Обрабатывает сдачу игрока"""
+        self.engine_player.cancel() #останавливаем и поиск хода компьютера, и обдумывание на времени игрока
         self.game.resign()
-        winner = 'Чёрные' if self.game.board.turn == chess.WHITE else 'Белые'
+        self.journal.mark_resigned()
+        #сдаться можно и пока думает компьютер, поэтому победитель - соперник игрока, а не той стороны, чей ход
+        winner = 'Чёрные' if self.player_color == chess.WHITE else 'Белые'
         self.update_status(f'{winner} победили! Игрок сдался.')
         self.show_play_again()
 
@@ -0,0 +1,97 @@
+import threading
+import tkinter as tk
+from core.pgn_index import PgnDatabase
+
+POLL_MS = 50  # как часто проверяем, готов ли индекс
+
+
+class PgnBrowser(tk.Toplevel):
+    # окно со списком партий базы PGN
+    # в Listbox лежат только видимые строки: база может содержать миллионы партий,
+    # а заголовки берутся из индекса по мере прокрутки
+
+    def __init__(self, parent, path, on_open, rows=25, width=60):
+        super().__init__(parent)
+        self.title(path)
+        self.on_open = on_open  # on_open(PgnDatabase, номер партии) - пользователь выбрал партию
+        self.rows = rows
+        self.db = None
+        self.top = 0  # номер первой видимой партии
+        self._result = None  # (PgnDatabase или None, ошибка) из фонового потока
+
+        self.status = tk.Label(self, text="Индексация...", anchor=tk.W)
+        self.status.pack(fill=tk.X, padx=5, pady=5)
+
+        frame = tk.Frame(self)
+        frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.listbox = tk.Listbox(frame, height=rows, width=width, font=('Courier New', 10), activestyle=tk.NONE)
+        self.scrollbar = tk.Scrollbar(frame, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.listbox.bind("<Double-Button-1>", self._on_double_click)
+        self.listbox.bind("<Return>", self._on_double_click)
+        self.listbox.bind("<MouseWheel>", lambda e: self._on_wheel(-1 if e.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda e: self._on_wheel(-1))
+        self.listbox.bind("<Button-5>", lambda e: self._on_wheel(1))
+
+        # первый проход по большому файлу занимает время - индекс строим в фоне, окно не замирает
+        threading.Thread(target=self._open, args=(path,), name="pgn-index", daemon=True).start()
+        self.after(POLL_MS, self._poll)
+
+    def _open(self, path):
+        try:
+            self._result = (PgnDatabase(path), None)
+        except Exception as e:
+            self._result = (None, e)
+
+    def _poll(self):
+        if not self.winfo_exists():
+            return  # окно закрыли, пока строился индекс
+        if self._result is None:
+            self.after(POLL_MS, self._poll)
+            return
+        self.db, error = self._result
+        if error is not None:
+            self.status.config(text=f"Не удалось открыть базу: {str(error)}")
+            return
+        self.status.config(text=f"Партий: {len(self.db)}. Двойной щелчок - открыть партию")
+        self._render()
+
+    def _render(self):
+        self.listbox.delete(0, tk.END)
+        end = min(len(self.db), self.top + self.rows)
+        for i in range(self.top, end):
+            self.listbox.insert(tk.END, self.db.describe(i))
+        n = len(self.db)
+        if n <= self.rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / n, min(1.0, (self.top + self.rows) / n))
+
+    def scroll_to(self, top):
+        if self.db is None:
+            return
+        top = max(0, min(top, len(self.db) - self.rows))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def yview(self, *args):
+        if self.db is None or not args:
+            return
+        if args[0] == tk.MOVETO:
+            self.scroll_to(int(float(args[1]) * len(self.db)))
+        elif args[0] == tk.SCROLL:
+            step = int(args[1])
+            self.scroll_to(self.top + (step * self.rows if args[2] == tk.PAGES else step))
+
+    def _on_wheel(self, step):
+        self.scroll_to(self.top + step * 3)
+        return "break"
+
+    def _on_double_click(self, event):
+        selection = self.listbox.curselection()
+        if self.db is None or not selection:
+            return
+        self.on_open(self.db, self.top + selection[0])
@@ -0,0 +1,26 @@
+import tkinter as tk
+
+MAX_MOVES = 8  # сколько самых популярных ходов показываем
+
+
+class PositionStatsPanel(tk.LabelFrame):
+    # что играли в текущей позиции в партиях из индекса позиций (core.position_index)
+
+    def __init__(self, parent, index, font=('Courier New', 10)):
+        super().__init__(parent, text="Статистика позиции", font=('Arial', 12))
+        self.index = index
+        self.label = tk.Label(self, font=font, justify=tk.LEFT, anchor=tk.NW)
+        self.label.pack(fill=tk.BOTH, padx=5, pady=5)
+
+    def update_position(self, board):
+        # запрос к индексу - один поиск по ключу, можно делать после каждого хода
+        stats = [s for s in self.index.move_stats(board) if board.is_legal(s.move)]  # на случай коллизии ключей
+        if not stats:
+            self.label.config(text="Позиции нет в базе")
+            return
+        lines = [f"{'ход':<7}{'партий':>7}{'очки':>6}"]
+        for s in stats[:MAX_MOVES]:
+            lines.append(f"{board.san(s.move):<7}{s.games:>7}{s.score(board.turn) * 100:>5.0f}%")
+        total = sum(s.games for s in stats)
+        lines.append(f"всего: {total}")
+        self.label.config(text="\n".join(lines))
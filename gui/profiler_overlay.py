@@ -0,0 +1,50 @@
+import tkinter as tk
+from tkinter import filedialog, messagebox
+from core import profiler
+
+REFRESH_MS = 500  # как часто обновляется таблица
+
+
+class ProfilerOverlay(tk.Toplevel):
+    # окно со сводкой профилировщика (core.profiler): вызовы, сумма, среднее, p50/p99 и максимум в мс
+    # открывается по F12, если игра запущена с PYCHESS_PROFILE=1 или python main.py --profile
+
+    def __init__(self, parent, font=('Courier New', 9)):
+        super().__init__(parent)
+        self.title("Профилировщик")
+        self.attributes('-topmost', True)
+        self.label = tk.Label(self, font=font, justify=tk.LEFT, anchor=tk.NW, bg='black', fg='#9f9')
+        self.label.pack(fill=tk.BOTH, expand=True)
+
+        buttons = tk.Frame(self)
+        buttons.pack(fill=tk.X)
+        tk.Button(buttons, text='Сбросить', command=profiler.reset).pack(side=tk.LEFT)
+        tk.Button(buttons, text='Сохранить трассу', command=self.export_trace).pack(side=tk.LEFT, padx=5)
+
+        self._refresh_id = None
+        self.refresh()
+
+    def refresh(self):
+        self.label.config(text=profiler.report())
+        self._refresh_id = self.after(REFRESH_MS, self.refresh)
+
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(
+            parent=self, defaultextension=".json", initialfile="pychess-trace.json",
+            filetypes=[("Chrome trace", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            events = profiler.export_chrome_trace(path)
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить трассу: {str(e)}", parent=self)
+            return
+        messagebox.showinfo("Профилировщик", f"Сохранено событий: {events}\nОткрыть: chrome://tracing или ui.perfetto.dev",
+                            parent=self)
+
+    def destroy(self):
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        super().destroy()
@@ -0,0 +1,108 @@
+import glob
+import hashlib
+import os
+import threading
+import tkinter as tk
+
+PIECE_CODES = [
+    'bB', 'bK', 'bN', 'bP', 'bQ', 'bR',
+    'wB', 'wK', 'wN', 'wP', 'wQ', 'wR'
+]
+DEFAULT_THEME = "default"
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+# готовые (уже уменьшенные) картинки храним между запусками, путь можно переопределить переменной окружения
+CACHE_DIR = os.path.join(
+    os.environ.get("PYCHESS_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "pychess"),
+    "sprites"
+)
+
+_sprites = {}  # общий на весь процесс кэш: (фигура, размер, тема) -> PhotoImage
+
+
+def source_path(piece_code, theme=DEFAULT_THEME):
+    # тема по умолчанию лежит в assets/pieces, остальные - в assets/pieces_<тема>
+    folder = "pieces" if theme == DEFAULT_THEME else f"pieces_{theme}"
+    return os.path.join(ASSETS_DIR, folder, f"{piece_code}.png")
+
+
+def _cache_path(src, piece_code, size, theme):
+    # в имя файла входит отпечаток исходника (путь, время изменения, размер),
+    # поэтому после замены картинки старый кэш просто перестаёт совпадать
+    st = os.stat(src)
+    stamp = hashlib.sha1(f"{src}|{st.st_mtime_ns}|{st.st_size}".encode()).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"{theme}-{piece_code}-{size}-{stamp}.png")
+
+
+def _render(src, dst, piece_code, size, theme, fallback=True):
+    # единственное место, где нужен PIL: масштабируем исходник и сохраняем результат на диск
+    from PIL import Image
+
+    img = Image.open(src).convert("RGBA")  # Загружаем изображение с поддержкой альфа-канала (прозрачности)
+    transparent_img = Image.new("RGBA", img.size, (0, 0, 0, 0))  # Создаем новое изображение с прозрачным фоном
+    transparent_img.paste(img, (0, 0), img)  # Накладываем фигуру на прозрачный фон
+    transparent_img = transparent_img.resize((size, size), Image.LANCZOS)  # Масштабируем изображение
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for old in glob.glob(os.path.join(CACHE_DIR, f"{theme}-{piece_code}-{size}-*.png")):
+            if old != dst:  # актуальную версию мог только что записать фоновый prerender
+                os.remove(old)  # устаревшие версии этой же картинки
+        tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+        transparent_img.save(tmp, format="PNG")
+        os.replace(tmp, dst)  # атомарно: другой процесс не увидит недописанный файл
+    except OSError as e:
+        print(f"Не удалось сохранить кэш {piece_code}: {str(e)}")
+        if not fallback:
+            return None
+        from PIL import ImageTk
+        return ImageTk.PhotoImage(transparent_img)
+    return None
+
+
+def get_piece_image(piece_code, size, theme=DEFAULT_THEME):
+    # картинка фигуры нужного размера; загружается при первом обращении
+    key = (piece_code, size, theme)
+    if key in _sprites:
+        return _sprites[key]
+
+    src = source_path(piece_code, theme)
+    image = None
+    if not os.path.exists(src):
+        print(f"Файл не найден: {src}")
+    else:
+        try:
+            dst = _cache_path(src, piece_code, size, theme)
+            if not os.path.exists(dst):
+                image = _render(src, dst, piece_code, size, theme)
+            if image is None:
+                image = tk.PhotoImage(file=dst)  # PNG читает сам Tk, без PIL и без пересчёта размера
+        except Exception as e:
+            print(f"Ошибка загрузки {piece_code}.png: {str(e)}")
+            image = None
+
+    _sprites[key] = image
+    return image
+
+
+def prerender(size, theme=DEFAULT_THEME):
+    # готовит файлы кэша для набора фигур без обращения к Tk, поэтому его можно вызывать в фоновом потоке
+    # (PhotoImage потом создаёт get_piece_image в потоке Tk, уже без PIL)
+    for piece_code in PIECE_CODES:
+        src = source_path(piece_code, theme)
+        if not os.path.exists(src):
+            continue
+        try:
+            dst = _cache_path(src, piece_code, size, theme)
+            if not os.path.exists(dst):
+                _render(src, dst, piece_code, size, theme, fallback=False)
+        except Exception as e:
+            print(f"Ошибка подготовки {piece_code}.png: {str(e)}")
+
+
+def load_piece_set(size, theme=DEFAULT_THEME):
+    return {piece_code: get_piece_image(piece_code, size, theme) for piece_code in PIECE_CODES}
+
+
+def clear_memory_cache():
+    _sprites.clear()
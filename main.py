@@ -1,5 +1,18 @@
-from gui.main_window import MainWindow
+import os
+import sys
 
 if __name__ == "__main__":
-    app = MainWindow()
-    app.mainloop()
\ No newline at end of file
+    if "--profile" in sys.argv[1:]:
+        # встроенный профилировщик (core.profiler) включается до импорта измеряемых модулей
+        os.environ["PYCHESS_PROFILE"] = "1"
+    if "--uci" in sys.argv[1:]:
+        # движок без интерфейса для турнирных программ: python main.py --uci
+        from core.uci import main
+        main()
+        if "--profile" in sys.argv[1:]:
+            from core import profiler
+            print(profiler.report(), file=sys.stderr)
+    else:
+        from gui.main_window import MainWindow
+        app = MainWindow()
+        app.mainloop()
@@ -0,0 +1,126 @@
+# партии без интерфейса на всех ядрах: python selfplay.py -n 100 --white engine:nodes=5000 --black random
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import chess
+import chess.pgn
+from core.position_index import PositionIndex
+from core.selfplay import make_player, play_game, random_opening, read_openings, MAX_PLIES
+
+_players = {}  # игроки создаются один раз на процесс и переиспользуются между партиями
+
+
+def run_game(task):
+    game_id, white_spec, black_spec, opening, max_plies, fmt, seed = task
+    start = time.perf_counter()
+    key = (white_spec, black_spec)
+    if key not in _players:
+        _players[key] = (make_player(white_spec, seed), make_player(black_spec, seed + 1))
+    white, black = _players[key]
+    white.reseed(seed)
+    black.reseed(seed + 1)
+
+    game, result, reason = play_game(white, black, opening, max_plies)
+    plies = len(game.board.move_stack)
+
+    # текст готовим прямо в рабочем процессе, главный процесс только пишет его в файл
+    if fmt == "pgn":
+        pgn = chess.pgn.Game.from_board(game.board)
+        pgn.headers["Event"] = "PyChess self-play"
+        pgn.headers["Round"] = str(game_id)
+        pgn.headers["White"] = white_spec
+        pgn.headers["Black"] = black_spec
+        pgn.headers["Result"] = result
+        pgn.headers["Termination"] = reason
+        text = str(pgn) + "\n\n"
+    else:
+        text = json.dumps({
+            'id': game_id,
+            'white': white_spec,
+            'black': black_spec,
+            'start_fen': game.board.root().fen(),
+            'moves': [m.uci() for m in game.board.move_stack],
+            'result': result,
+            'termination': reason
+        }, ensure_ascii=False) + "\n"
+    record = (game.board.root().fen(), list(game.board.move_stack), result)  # для индекса позиций
+    return os.getpid(), plies, time.perf_counter() - start, text, record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Партии движка и случайных игроков без интерфейса")
+    parser.add_argument("-n", "--games", type=int, default=10)
+    parser.add_argument("--white", default="engine:nodes=5000", help="random или engine[:depth=..,nodes=..,time=..]")
+    parser.add_argument("--black", default="engine:nodes=5000")
+    parser.add_argument("--openings", help="файл с дебютами: FEN или ходы uci через пробел, по одному в строке")
+    parser.add_argument("--random-plies", type=int, default=8,
+                        help="без файла дебютов каждая партия начинается со стольких случайных полуходов (0 - без них)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--format", choices=["pgn", "jsonl"], default="jsonl")
+    parser.add_argument("-o", "--output", help="куда писать партии (по умолчанию stdout)")
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--index", help="добавлять сыгранные партии в индекс позиций (SQLite)")
+    args = parser.parse_args(argv)
+
+    openings = read_openings(args.openings) if args.openings else None
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    index = PositionIndex(args.index) if args.index else None
+
+    def tasks():
+        for i in range(args.games):
+            seed = args.seed + 2 * i
+            # без дебютов партии движков были бы одинаковыми: начинаем со случайных ходов по сиду партии
+            opening = openings[i % len(openings)] if openings else random_opening(random.Random(seed), args.random_plies)
+            yield i + 1, args.white, args.black, opening, args.max_plies, args.format, seed
+
+    busy = {}  # pid -> сколько секунд процесс играл
+    games = plies = 0
+    start = time.perf_counter()
+    pending = set()
+    task_iter = tasks()
+
+    # в полёте не больше нескольких партий на процесс - память не зависит от числа партий
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for task in task_iter:
+            pending.add(pool.submit(run_game, task))
+            if len(pending) >= args.workers * 2:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pid, game_plies, elapsed, text, (fen, moves, result) = future.result()
+                out.write(text)
+                out.flush()
+                if index is not None:
+                    board = chess.Board(fen)
+                    for move in moves:
+                        board.push(move)
+                    index.add_game(board, result, args.white, args.black, source="selfplay")
+                busy[pid] = busy.get(pid, 0.0) + elapsed
+                games += 1
+                if index is not None and games % 100 == 0:
+                    index.commit()  # при обрыве прогона теряется не больше сотни партий
+                plies += game_plies
+                task = next(task_iter, None)
+                if task is not None:
+                    pending.add(pool.submit(run_game, task))
+
+    wall = time.perf_counter() - start
+    if out is not sys.stdout:
+        out.close()
+    if index is not None:
+        index.close()
+
+    print(f"партий: {games} за {wall:.2f} c  ({games / wall:.2f} партий/с, {plies / wall:.0f} полуходов/с)",
+          file=sys.stderr)
+    for i, (pid, seconds) in enumerate(sorted(busy.items())):
+        print(f"  процесс {i + 1} (pid {pid}): загрузка {seconds / wall * 100:.0f}%", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import random
+from core.sprt import Sprt
+
+
+def _play(sprt, pair, limit=100):
+    # добавляем одинаковые пары, пока тест не примет решение; возвращает число сыгранных пар
+    for pairs in range(1, limit + 1):
+        sprt.add_pair(*pair)
+        if sprt.decision() is not None:
+            return pairs
+    return None
+
+
+def test_all_wins_accepts_h1():
+    sprt = Sprt(elo0=0, elo1=10)
+    assert _play(sprt, (1.0, 1.0)) is not None
+    assert sprt.decision() == "H1"
+    assert sprt.llr() >= sprt.upper
+    elo, margin = sprt.elo()
+    assert elo > 0 and margin > 0
+
+
+def test_all_losses_accepts_h0():
+    sprt = Sprt(elo0=0, elo1=10)
+    assert _play(sprt, (0.0, 0.0)) is not None
+    assert sprt.decision() == "H0"
+    assert sprt.llr() <= sprt.lower
+    elo, margin = sprt.elo()
+    assert elo < 0 and margin > 0
+
+
+def test_sweep_is_not_decided_by_a_single_pair():
+    sprt = Sprt(elo0=0, elo1=10)
+    sprt.add_pair(1.0, 1.0)
+    assert sprt.decision() is None
+
+
+def test_all_draws_stays_undecided_for_a_while():
+    # одни ничьи - признак равенства сил: H0 принимается, но не после пары партий
+    sprt = Sprt(elo0=0, elo1=10)
+    pairs = _play(sprt, (0.5, 0.5), limit=1000)
+    assert pairs is None or (pairs > 10 and sprt.decision() == "H0")
+
+
+def test_equal_engines_accept_h0():
+    rng = random.Random(1)
+    sprt = Sprt(elo0=0, elo1=10)
+    while sprt.decision() is None and sprt.games < 50000:
+        sprt.add_pair(rng.choice((1.0, 0.5, 0.5, 0.0)), rng.choice((1.0, 0.5, 0.5, 0.0)))
+    assert sprt.decision() == "H0"
+
+
+def test_empty_report():
+    report = Sprt().report()
+    assert report["games"] == 0 and report["llr"] == 0.0 and report["decision"] is None
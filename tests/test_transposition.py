@@ -0,0 +1,34 @@
+import random
+import chess
+import chess.polyglot
+import pytest
+from core.transposition import zobrist_hash, push_hashed
+
+
+def _random_game(board, rng, plies=120):
+    # проверяем ключ после каждого хода случайной партии
+    key = zobrist_hash(board)
+    for _ in range(plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        key = push_hashed(board, rng.choice(moves), key)
+        assert key == chess.polyglot.zobrist_hash(board), board.fen()
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_incremental_key_standard(seed):
+    _random_game(chess.Board(), random.Random(seed))
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_incremental_key_chess960(seed):
+    rng = random.Random(seed)
+    _random_game(chess.Board.from_chess960_pos(rng.randrange(960)), rng)
+
+
+def test_castling_written_as_king_takes_rook():
+    # в классических шахматах python-chess принимает и запись рокировки e1h1
+    board = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    key = push_hashed(board, chess.Move.from_uci("e1h1"), zobrist_hash(board))
+    assert key == chess.polyglot.zobrist_hash(board)
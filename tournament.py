@@ -0,0 +1,155 @@
+# матч двух движков парами партий с ранней остановкой по SPRT:
+# python tournament.py --first engine:nodes=5000 --second engine:nodes=2500 --report match.json
+# каждый дебют играется дважды со сменой цветов; пары играются параллельно в процессах,
+# после каждой пары отчёт JSON перезаписывается (его можно читать во время матча)
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from core.selfplay import make_player, play_game, random_opening, read_openings, MAX_PLIES
+from core.sprt import Sprt
+
+SCORES = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}  # очки белых
+
+_players = {}  # игроки создаются один раз на процесс и переиспользуются между парами
+_stop = None  # общий флаг остановки матча (заполняется в _init_worker)
+
+
+def _init_worker(stop):
+    global _stop
+    _stop = stop
+
+
+def run_pair(task):
+    # две партии из одного дебюта: сначала первый движок белыми, потом чёрными
+    # None - матч остановлен, пока пара игралась
+    pair_id, first_spec, second_spec, opening, max_plies, seed = task
+    start = time.perf_counter()
+    key = (first_spec, second_spec)
+    if key not in _players:
+        _players[key] = (make_player(first_spec, seed, _stop), make_player(second_spec, seed + 1, _stop))
+    first, second = _players[key]
+    first.reseed(seed)
+    second.reseed(seed + 1)
+
+    games = []
+    scores = []
+    for white, black, white_spec, black_spec in ((first, second, first_spec, second_spec),
+                                                 (second, first, second_spec, first_spec)):
+        game, result, reason = play_game(white, black, opening, max_plies, _stop)
+        if result is None:
+            return None
+        score = SCORES[result]
+        scores.append(score if white is first else 1.0 - score)
+        games.append({
+            'pair': pair_id,
+            'white': white_spec,
+            'black': black_spec,
+            'start_fen': game.board.root().fen(),
+            'moves': [m.uci() for m in game.board.move_stack],
+            'result': result,
+            'termination': reason
+        })
+    return os.getpid(), scores, games, time.perf_counter() - start
+
+
+def write_report(path, report):
+    # через временный файл: читатель никогда не увидит недописанный JSON
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Матч двух движков с ранней остановкой по SPRT")
+    parser.add_argument("--first", default="engine:nodes=5000", help="проверяемый движок: engine[:depth=..,nodes=..,time=..]")
+    parser.add_argument("--second", default="engine:nodes=2500", help="эталонный движок")
+    parser.add_argument("--pairs", type=int, default=1000, help="наибольшее число пар (SPRT обычно останавливает раньше)")
+    parser.add_argument("--openings", help="файл с дебютами: FEN или ходы uci через пробел, по одному в строке")
+    parser.add_argument("--random-plies", type=int, default=8, help="длина случайных дебютов, если файла дебютов нет")
+    parser.add_argument("--elo0", type=float, default=0.0, help="H0: разница в силе не больше elo0")
+    parser.add_argument("--elo1", type=float, default=10.0, help="H1: разница в силе не меньше elo1")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", default="tournament.json", help="отчёт JSON (обновляется после каждой пары)")
+    parser.add_argument("--games", help="куда дописывать сыгранные партии (jsonl, как у selfplay.py)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    openings = read_openings(args.openings) if args.openings else None
+
+    def tasks():
+        for i in range(args.pairs):
+            opening = openings[i % len(openings)] if openings else random_opening(rng, args.random_plies)
+            yield i + 1, args.first, args.second, opening, args.max_plies, args.seed + 2 * i
+
+    sprt = Sprt(args.elo0, args.elo1, args.alpha, args.beta)
+    out = open(args.games, "a", encoding="utf-8") if args.games else None
+    start = time.perf_counter()
+
+    def report(status):
+        return {
+            "first": args.first,
+            "second": args.second,
+            "status": status,  # running, H0 (улучшения нет), H1 (улучшение есть) или inconclusive
+            "pairs": sum(sprt.pairs),
+            "elapsed": round(time.perf_counter() - start, 2),
+            **sprt.report()
+        }
+
+    decision = None
+    pending = set()
+    task_iter = tasks()
+    stop = multiprocessing.Event()
+    pool = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(stop,))
+    try:
+        for task in task_iter:
+            pending.add(pool.submit(run_pair, task))
+            if len(pending) >= args.workers * 2:
+                break
+        while pending and decision is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if decision is not None:
+                    break  # решение уже принято другой парой из этой же пачки
+                pid, scores, games, elapsed = future.result()
+                sprt.add_pair(*scores)
+                if out is not None:
+                    for game in games:
+                        out.write(json.dumps(game, ensure_ascii=False) + "\n")
+                    out.flush()
+                decision = sprt.decision()
+                write_report(args.report, report(decision or "running"))
+                elo, margin = sprt.elo()
+                print(f"\rпартий {sprt.games}: +{sprt.wins} ={sprt.draws} -{sprt.losses}, "
+                      f"Эло {elo:+.1f} ± {margin:.1f}, LLR {sprt.llr():+.2f} [{sprt.lower:.2f}, {sprt.upper:.2f}]",
+                      end="", file=sys.stderr, flush=True)
+                if decision is None:
+                    task = next(task_iter, None)
+                    if task is not None:
+                        pending.add(pool.submit(run_pair, task))
+    finally:
+        # после решения недоигранные пары не нужны: ещё не начатые отменяем, а идущие прерываем флагом -
+        # поиск останавливается за несколько сотен узлов, и партия бросается
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        if out is not None:
+            out.close()
+
+    final = report(decision or "inconclusive")
+    write_report(args.report, final)
+    print(file=sys.stderr)
+    print(f"{final['status']}: партий {final['games']}, Эло {final['elo']:+.1f} ± {final['elo_95']:.1f}, "
+          f"LOS {final['los'] * 100:.1f}%, за {final['elapsed']:.1f} с")
+
+
+if __name__ == "__main__":
+    main()